@@ -0,0 +1,330 @@
+"""
+Headless pipeline: ingest a docs directory, generate test cases for a list
+of queries and a Selenium script for every case, without the Streamlit UI
+or the HTTP API (the backend services run in-process).
+
+Usage (from the project root):
+    python -m backend.cli --docs project_assets --queries queries.txt --out out/
+                          [--html project_assets/checkout.html] [--parallelism 4]
+                          [--max-test-cases 10] [--project NAME]
+                          [--skip-ingest] [--skip-scripts]
+
+The queries file holds one query per line; blank lines and lines starting
+with ``#`` are ignored. Scripts for a query's test cases are generated as
+soon as those cases are ready, so the two generation stages overlap.
+
+Outputs in ``--out``:
+    test_cases.jsonl   one test case per line, with the query that produced it
+    scripts/*.py       one script per test case, plus the page object module
+    summary.json       per-stage timings and failures, and LLM usage
+
+Exits with status 1 if any query or script failed.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+import argparse
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from backend.services.document_processor import document_processor
+from backend.services.vector_store import vector_store_service
+from backend.services.test_case_generator import test_case_generator
+from backend.services.selenium_generator import selenium_generator
+from backend.services.reindex import reindex_service
+from backend.services.usage import usage_tracker
+from backend.utils.helpers import script_filename
+from backend.utils.state_store import HTML_NAMESPACE, HTML_STATE_KEY, state_store
+from backend.models.schemas import TestCase
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ("md", "txt", "html", "json", "pdf")
+
+
+class StageTimer:
+    """Wall time, item counts and failures of one pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.items = 0
+        self.failures: List[Dict[str, str]] = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.started is None:
+                self.started = time.perf_counter()
+
+    def done(self, items: int = 1):
+        with self._lock:
+            self.items += items
+            self.finished = time.perf_counter()
+
+    def failed(self, item: str, error: str):
+        with self._lock:
+            self.failures.append({"item": item, "error": error})
+            self.finished = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "failed": len(self.failures),
+            "seconds": round(self.seconds, 2),
+            "items_per_second": round(self.items / self.seconds, 2) if self.seconds else 0.0,
+            "failures": self.failures
+        }
+
+
+def read_queries(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def find_documents(docs_dir: str) -> List[str]:
+    paths = []
+    for root, _, files in os.walk(docs_dir):
+        for filename in sorted(files):
+            if filename.rsplit(".", 1)[-1].lower() in SUPPORTED_EXTENSIONS:
+                paths.append(os.path.join(root, filename))
+    return sorted(paths)
+
+
+def find_html(docs_dir: str, html_path: Optional[str]) -> Optional[str]:
+    """The target page: --html, or the only HTML file in the docs directory"""
+    if html_path:
+        return html_path
+    pages = [path for path in find_documents(docs_dir) if path.lower().endswith(".html")]
+    return pages[0] if len(pages) == 1 else None
+
+
+def read_document(path: str, project: Optional[str]) -> Dict[str, Any]:
+    file_type = path.rsplit(".", 1)[-1].lower()
+    with open(path, "rb") as f:
+        content = f.read()
+    if file_type != "pdf":
+        content = content.decode("utf-8")
+    return {
+        "content": content,
+        "filename": os.path.basename(path),
+        "file_type": file_type,
+        "project": project
+    }
+
+
+def ingest(paths: List[str], html_path: Optional[str], project: Optional[str], parallelism: int, timer: StageTimer):
+    """Parse and chunk documents in parallel, then embed and upload them in one batch"""
+    if reindex_service.is_running():
+        raise RuntimeError("The knowledge base is being re-indexed; try again when it completes")
+
+    timer.start()
+    chunks = []
+    with ThreadPoolExecutor(max_workers=parallelism) as pool:
+        futures = {
+            pool.submit(lambda p: document_processor.process_multiple_documents([read_document(p, project)]), path): path
+            for path in paths
+        }
+        for future in as_completed(futures):
+            try:
+                chunks.extend(future.result())
+                timer.done()
+            except Exception as e:
+                logger.error(f"Error processing {futures[future]}: {str(e)}")
+                timer.failed(futures[future], str(e))
+
+    chunks_stored = vector_store_service.add_documents(chunks)
+    logger.info(f"Ingested {timer.items} documents into {chunks_stored} new chunks")
+
+    if html_path:
+        with open(html_path, encoding="utf-8") as f:
+            html_content = f.read()
+        state_store.set(HTML_NAMESPACE, HTML_STATE_KEY, html_content)
+        selenium_generator.prepare_html(html_content)
+    timer.done(0)
+
+
+def generate(
+    queries: List[str],
+    html_content: Optional[str],
+    out_dir: str,
+    max_test_cases: int,
+    filters: Optional[Dict[str, Any]],
+    parallelism: int,
+    case_timer: StageTimer,
+    script_timer: StageTimer
+):
+    """Generate test cases per query and scripts per case, writing each result as it completes"""
+    scripts_dir = os.path.join(out_dir, "scripts")
+    os.makedirs(scripts_dir, exist_ok=True)
+    write_lock, taken = threading.Lock(), set()
+    cases_file = open(os.path.join(out_dir, "test_cases.jsonl"), "w", encoding="utf-8")
+
+    def make_script(test_case: TestCase, filename: str):
+        script_timer.start()
+        result = selenium_generator.generate_script(test_case=test_case, html_content=html_content, filters=filters)
+        if not result["success"]:
+            script_timer.failed(test_case.test_id, result.get("error", "Failed to generate script"))
+            return
+        with open(os.path.join(scripts_dir, filename), "w", encoding="utf-8") as f:
+            f.write(result["script"])
+        script_timer.done()
+
+    case_pool = ThreadPoolExecutor(max_workers=parallelism)
+    script_pool = ThreadPoolExecutor(max_workers=parallelism)
+
+    # Pool threads account their LLM calls to the run's usage scope
+    def submit(pool: ThreadPoolExecutor, func, *args, **kwargs):
+        return pool.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+    try:
+        case_timer.start()
+        futures = {
+            submit(
+                case_pool,
+                test_case_generator.generate_test_cases,
+                query=query,
+                max_results=max_test_cases,
+                filters=filters
+            ): query
+            for query in queries
+        }
+        script_futures = []
+        for future in as_completed(futures):
+            query = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            if not result["success"]:
+                logger.error(f"Error generating test cases for '{query}': {result.get('error')}")
+                case_timer.failed(query, result.get("error", "Failed to generate test cases"))
+                continue
+
+            with write_lock:
+                # Several queries may number their cases alike
+                for test_case in result["test_cases"]:
+                    filename = script_filename(test_case.test_id, taken)
+                    cases_file.write(json.dumps({"query": query, "script": filename, **test_case.dict()}) + "\n")
+                    if html_content:
+                        script_futures.append(submit(script_pool, make_script, test_case, filename))
+                cases_file.flush()
+            case_timer.done(len(result["test_cases"]))
+
+        for future in script_futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error generating script: {str(e)}")
+                script_timer.failed("script", str(e))
+    finally:
+        case_pool.shutdown()
+        script_pool.shutdown()
+        cases_file.close()
+
+    if html_content:
+        for filename, source in selenium_generator.support_files(html_content).items():
+            with open(os.path.join(scripts_dir, filename), "w", encoding="utf-8") as f:
+                f.write(source)
+
+
+def print_summary(timers: List[StageTimer], total_seconds: float, usage: Dict[str, Any]):
+    print(f"\n{'stage':<12}{'items':>8}{'failed':>8}{'seconds':>10}{'items/s':>10}")
+    for timer in timers:
+        s = timer.summary()
+        print(f"{s['stage']:<12}{s['items']:>8}{s['failed']:>8}{s['seconds']:>10.2f}{s['items_per_second']:>10.2f}")
+    print(f"{'total':<12}{'':>8}{'':>8}{total_seconds:>10.2f}")
+    print(
+        f"LLM: {usage['calls']} calls ({usage['cached_calls']} cached), "
+        f"{usage['tokens']} tokens, ${usage['cost_usd']:.4f}"
+    )
+    for timer in timers:
+        for failure in timer.failures:
+            print(f"  {timer.name} failed: {failure['item']}: {failure['error']}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.cli",
+        description="Ingest docs, then generate test cases and Selenium scripts in bulk"
+    )
+    parser.add_argument("--docs", help="Directory of documents to ingest (md, txt, html, json, pdf)")
+    parser.add_argument("--queries", required=True, help="File with one test case query per line")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--html", help="Target page for scripts (default: the only HTML file in --docs)")
+    parser.add_argument("--parallelism", type=int, default=4, help="Concurrent jobs per stage")
+    parser.add_argument("--max-test-cases", type=int, default=10, help="Test cases per query")
+    parser.add_argument("--project", help="Tag ingested documents with a project and retrieve only from it")
+    parser.add_argument("--skip-ingest", action="store_true", help="Use the existing knowledge base")
+    parser.add_argument("--skip-scripts", action="store_true", help="Only generate test cases")
+    args = parser.parse_args(argv)
+    if not args.skip_ingest and not args.docs:
+        parser.error("--docs is required unless --skip-ingest is given")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    os.makedirs(args.out, exist_ok=True)
+
+    queries = read_queries(args.queries)
+    html_path = find_html(args.docs, args.html) if args.docs else args.html
+    timers = [StageTimer("ingest"), StageTimer("test_cases"), StageTimer("scripts")]
+    started = time.perf_counter()
+
+    if not args.skip_ingest:
+        ingest(find_documents(args.docs), html_path, args.project, args.parallelism, timers[0])
+
+    html_content = None
+    if not args.skip_scripts:
+        if html_path:
+            with open(html_path, encoding="utf-8") as f:
+                html_content = f.read()
+        else:
+            html_content = state_store.get(HTML_NAMESPACE, HTML_STATE_KEY, "")
+        if not html_content:
+            logger.error("No HTML page for scripts: pass --html or --skip-scripts")
+            return 2
+
+    with usage_tracker.scope(endpoint="cli", project=args.project) as usage:
+        generate(
+            queries,
+            html_content,
+            args.out,
+            args.max_test_cases,
+            {"project": args.project} if args.project else None,
+            args.parallelism,
+            timers[1],
+            timers[2]
+        )
+
+    total_seconds = time.perf_counter() - started
+    llm_usage = {key: usage[key] for key in ("calls", "cached_calls", "tokens")}
+    llm_usage["cost_usd"] = round(usage["cost_usd"], 6)
+    with open(os.path.join(args.out, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "total_seconds": round(total_seconds, 2),
+            "stages": [t.summary() for t in timers],
+            "llm_usage": llm_usage
+        }, f, indent=2)
+    print_summary(timers, total_seconds, llm_usage)
+
+    return 1 if any(timer.failures for timer in timers) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Shared embedding worker.
+
+Loads sentence-transformer models once and serves embeddings to every API
+process over a Unix socket (or local TCP port), so running the API with
+several workers does not load one copy of the model (and torch) per process.
+
+    uvicorn backend.embedding_worker:app --uds /tmp/qa-agent-embeddings.sock
+    EMBEDDING_WORKER_SOCKET=/tmp/qa-agent-embeddings.sock uvicorn backend.main:app --workers 4
+
+Texts from concurrent requests are queued and embedded in dynamic batches
+(``EMBEDDING_WORKER_MAX_BATCH`` texts or ``EMBEDDING_WORKER_MAX_WAIT_MS``),
+queries ahead of ingest. When ``EMBEDDING_WORKER_MAX_QUEUE`` texts are
+waiting, requests are refused with 503 and Retry-After, and clients back off.
+``EMBEDDING_WORKER_BATCHING=false`` embeds each request on its own instead.
+Vectors are returned as base64-encoded float32; query embeddings are cached
+here for all API processes.
+"""
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from collections import OrderedDict
+from typing import Dict, List
+import logging
+import os
+import threading
+
+# This process is the worker: it must load models itself, not call a worker
+os.environ["EMBEDDING_WORKER_SOCKET"] = ""
+os.environ["EMBEDDING_WORKER_URL"] = ""
+
+from backend.services.embedding_client import encode_vectors
+from backend.services.embeddings import EmbeddingService, embedding_service
+from backend.services.knowledge_base import knowledge_base_registry
+from backend.utils.batching import DynamicBatcher, QueueFull
+from backend.utils.helpers import compute_content_hash
+import numpy as np
+
+EMBEDDING_WORKER_MAX_MODELS = int(os.getenv("EMBEDDING_WORKER_MAX_MODELS", "2"))
+EMBEDDING_WORKER_BATCHING = os.getenv("EMBEDDING_WORKER_BATCHING", "true").lower() == "true"
+EMBEDDING_WORKER_MAX_BATCH = int(os.getenv("EMBEDDING_WORKER_MAX_BATCH", "64"))
+EMBEDDING_WORKER_MAX_WAIT_MS = float(os.getenv("EMBEDDING_WORKER_MAX_WAIT_MS", "5"))
+EMBEDDING_WORKER_MAX_QUEUE = int(os.getenv("EMBEDDING_WORKER_MAX_QUEUE", "4096"))
+# Bounds how long a query can wait behind ingest
+EMBEDDING_WORKER_MAX_BULK_BATCH = int(os.getenv("EMBEDDING_WORKER_MAX_BULK_BATCH", "16"))
+
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Embedding Worker", version="1.0.0")
+
+# Loaded models, least recently used first; the active model is preloaded
+models: "OrderedDict[str, EmbeddingService]" = OrderedDict({embedding_service.model_name: embedding_service})
+batchers: Dict[str, DynamicBatcher] = {}
+models_lock = threading.Lock()
+stats = {"requests": 0, "texts": 0, "query_cache_hits": 0}
+
+
+class EmbedRequest(BaseModel):
+    model: str
+    texts: List[str]
+    query: bool = False
+
+
+def get_model(name: str) -> EmbeddingService:
+    with models_lock:
+        if name in models:
+            models.move_to_end(name)
+            return models[name]
+        service = EmbeddingService(name, local=True)
+        models[name] = service
+        while len(models) > EMBEDDING_WORKER_MAX_MODELS:
+            evicted, _ = models.popitem(last=False)
+            batchers.pop(evicted, None)
+            logger.info(f"Unloaded embedding model {evicted}")
+        return service
+
+
+def get_batcher(service: EmbeddingService) -> DynamicBatcher:
+    batcher = batchers.get(service.model_name)
+    if batcher is None:
+        batcher = batchers[service.model_name] = DynamicBatcher(
+            service.embed_documents_array,
+            max_batch_size=EMBEDDING_WORKER_MAX_BATCH,
+            max_wait_ms=EMBEDDING_WORKER_MAX_WAIT_MS,
+            max_queue=EMBEDDING_WORKER_MAX_QUEUE,
+            max_bulk_batch_size=EMBEDDING_WORKER_MAX_BULK_BATCH
+        )
+    return batcher
+
+
+async def embed(request: EmbedRequest) -> np.ndarray:
+    service = await run_in_threadpool(get_model, request.model)
+    batcher = get_batcher(service)
+    stats["requests"] += 1
+    stats["texts"] += len(request.texts)
+
+    if not request.query:
+        if not EMBEDDING_WORKER_BATCHING:
+            return await run_in_threadpool(service.embed_documents_array, request.texts)
+        vectors = await batcher.submit(request.texts, priority="bulk")
+        return np.asarray(vectors, dtype=np.float32).reshape(len(request.texts), service.get_embedding_dimension())
+
+    # Queries: answer from the shared cache, batch only the misses
+    keys = [knowledge_base_registry.cache_key(service.model_name, compute_content_hash(t)) for t in request.texts]
+    vectors = [service.query_cache.get(key) for key in keys]
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    stats["query_cache_hits"] += len(request.texts) - len(missing)
+    if missing:
+        texts = [request.texts[i] for i in missing]
+        if EMBEDDING_WORKER_BATCHING:
+            computed = await batcher.submit(texts, priority="interactive")
+        else:
+            computed = await run_in_threadpool(service.embed_documents_array, texts)
+        for i, vector in zip(missing, computed):
+            vectors[i] = vector.tolist()
+            service.query_cache.set(keys[i], vectors[i])
+    return np.asarray(vectors, dtype=np.float32).reshape(len(request.texts), service.get_embedding_dimension())
+
+
+@app.post("/embed")
+async def embed_texts(request: EmbedRequest):
+    try:
+        return encode_vectors(await embed(request))
+    except QueueFull as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"Error embedding {len(request.texts)} texts: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/models/{name:path}")
+async def model_info(name: str):
+    """Dimension of a model, loading it if needed"""
+    try:
+        service = await run_in_threadpool(get_model, name)
+        return {"model": service.model_name, "dimension": service.get_embedding_dimension()}
+    except Exception as e:
+        logger.error(f"Error loading embedding model {name}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "healthy",
+        "pid": os.getpid(),
+        "models": list(models),
+        "batching": {name: batcher.snapshot() for name, batcher in batchers.items()},
+        "query_cache": {name: service.query_cache.stats() for name, service in models.items()},
+        **stats
+    }
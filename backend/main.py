@@ -1,7 +1,13 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Match
+from typing import List, Optional
+import hmac
+import json
 import logging
+import time
 from loguru import logger
 import os
 from dotenv import load_dotenv
@@ -10,17 +16,44 @@ from dotenv import load_dotenv
 from backend.services.document_processor import document_processor
 from backend.services.vector_store import vector_store_service
 from backend.services.embeddings import embedding_service
+from backend.services.llm_service import llm_service
 from backend.services.test_case_generator import test_case_generator
 from backend.services.selenium_generator import selenium_generator
+from backend.services.script_runner import script_runner
+from backend.services.script_repair import script_repair_service
+from backend.services.knowledge_base import document_key, knowledge_base_registry
+from backend.services.reindex import reindex_service
+from backend.services.test_case_store import test_case_store
+from backend.services.script_export import script_exporter
+from backend.services.usage import BudgetExceeded, usage_tracker
+from backend.utils.helpers import compute_content_hash
+from backend.utils.profiling import profiler
+from backend.utils.single_flight import SingleFlight
+from backend.utils.state_store import HTML_NAMESPACE, HTML_STATE_KEY, state_store
+from backend.utils.tracing import tracer
+from backend.utils.zip_stream import stream_zip
 
 # models
 from backend.models.schemas import (
     DocumentUploadResponse,
+    DocumentCheckRequest,
+    DocumentCheckResponse,
     KnowledgeBaseStatus,
     TestCaseGenerationRequest,
     TestCaseGenerationResponse,
+    TestSuiteCreateRequest,
+    TestCasePage,
+    TestCase,
     SeleniumScriptRequest,
     SeleniumScriptResponse,
+    ScriptRunRequest,
+    ScriptRunResult,
+    ScriptRunResponse,
+    ScriptRepairRequest,
+    ScriptRepairResponse,
+    CollectionMigrationRequest,
+    ReindexRequest,
+    RetrievalFilter,
     HealthCheck
 )
 
@@ -48,8 +81,101 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global state for HTML content
-html_content_store = {"checkout_html": ""}
+
+def _route_path(request: Request) -> str:
+    """Path template of the route serving the request, e.g. /api/test-suites/{suite_id}"""
+    return next(
+        (route.path for route in app.routes if route.matches(request.scope)[0] == Match.FULL),
+        request.url.path
+    )
+
+
+@app.middleware("http")
+async def account_llm_usage(request: Request, call_next):
+    """Attribute LLM calls to the endpoint and report their usage in response headers"""
+    with usage_tracker.scope(endpoint=_route_path(request)) as usage:
+        response = await call_next(request)
+    if usage["calls"] or usage["cached_calls"]:
+        response.headers["X-LLM-Calls"] = str(usage["calls"])
+        response.headers["X-LLM-Cached-Calls"] = str(usage["cached_calls"])
+        response.headers["X-LLM-Tokens"] = str(usage["tokens"])
+        response.headers["X-LLM-Cost-USD"] = f"{usage['cost_usd']:.6f}"
+    return response
+
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """Span per request, continuing the caller's trace from its traceparent header"""
+    route = _route_path(request)
+    with tracer.span(
+        f"{request.method} {route}",
+        traceparent=request.headers.get("traceparent"),
+        kind="server",
+        **{"http.method": request.method, "http.route": route}
+    ) as span:
+        response = await call_next(request)
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.set_error(f"HTTP {response.status_code}")
+    if span.sampled:
+        response.headers["X-Trace-Id"] = span.trace_id
+    return response
+
+
+@app.middleware("http")
+async def capture_slow_requests(request: Request, call_next):
+    """Keep the CPU profile of requests slower than PROFILING_SLOW_REQUEST_MS"""
+    if not profiler.slow_request_ms or request.url.path.startswith("/api/admin/"):
+        return await call_next(request)
+
+    profiler.ensure_sampling()
+    started = time.time()
+    response = await call_next(request)
+    ended = time.time()
+    if (ended - started) * 1000 >= profiler.slow_request_ms:
+        capture = await run_in_threadpool(
+            profiler.capture_slow_request,
+            request.method,
+            _route_path(request),
+            started,
+            ended,
+            response.headers.get("X-Trace-Id")
+        )
+        if capture:
+            response.headers["X-Profile-Id"] = capture["id"]
+    return response
+
+
+def _uploaded_html() -> str:
+    # The uploaded page lives in the shared state store, so every worker process sees it
+    return state_store.get(HTML_NAMESPACE, HTML_STATE_KEY, "")
+
+# Identical concurrent generation requests share one LLM call
+generation_flights = SingleFlight()
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _retrieval_filters(filters: Optional[RetrievalFilter]) -> Optional[dict]:
+    """Filter fields that are set, or None when nothing restricts retrieval"""
+    if filters is None:
+        return None
+    return filters.dict(exclude_none=True) or None
+
+
+def _ensure_writable():
+    """Knowledge base writes would be missed by a running re-index"""
+    if reindex_service.is_running():
+        raise HTTPException(
+            status_code=409,
+            detail="The knowledge base is being re-indexed; try again when it completes"
+        )
+
+
+def _filters_key(filters: Optional[dict]) -> Optional[str]:
+    return compute_content_hash(json.dumps(filters, sort_keys=True)) if filters else None
 
 
 @app.get("/")
@@ -86,11 +212,44 @@ async def health_check():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """Cache hit rates, latency saved, request coalescing, script validation, model routing, tracing and profiling"""
+    try:
+        return {
+            "kb_version": knowledge_base_registry.version,
+            "retrieval_cache": vector_store_service.get_cache_stats(),
+            "query_embedding_cache": embedding_service.query_cache.stats(),
+            "llm_response_cache": llm_service.response_cache.stats() if llm_service.response_cache else None,
+            "request_coalescing": {**generation_flights.stats, "in_flight": generation_flights.in_flight()},
+            "element_pruning": selenium_generator.element_indexes.get_stats(),
+            "script_validation": selenium_generator.validator.get_stats() if selenium_generator.validator else None,
+            "model_routing": llm_service.router.get_stats(),
+            "tracing": tracer.get_stats(),
+            "profiling": profiler.get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error collecting metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/usage")
+async def get_usage(days: int = Query(7, ge=1, le=366), project: Optional[str] = None):
+    """LLM calls, tokens and estimated cost per day, endpoint, project and model, with budget status"""
+    try:
+        return await run_in_threadpool(usage_tracker.report, days=days, project=project)
+    except Exception as e:
+        logger.error(f"Error reporting LLM usage: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/upload-documents", response_model=DocumentUploadResponse)
 async def upload_documents(
-    files: List[UploadFile] = File(...)
+    files: List[UploadFile] = File(...),
+    project: Optional[str] = Form(None)
 ):
     try:
+        _ensure_writable()
         logger.info(f"Received {len(files)} files for upload")
         
         documents = []
@@ -107,12 +266,14 @@ async def upload_documents(
             documents.append({
                 'content': content,
                 'filename': filename,
-                'file_type': file_extension
+                'file_type': file_extension,
+                'project': project
             })
         
-        chunks = document_processor.process_multiple_documents(documents)
-        
-        chunks_stored = vector_store_service.add_documents(chunks)
+        with profiler.memory("upload-documents", documents=len(documents)):
+            chunks = document_processor.process_multiple_documents(documents)
+            
+            chunks_stored = vector_store_service.add_documents(chunks)
         
         logger.info(f"Successfully processed {len(documents)} documents into {chunks_stored} chunks")
         
@@ -123,30 +284,65 @@ async def upload_documents(
             chunks_created=chunks_stored
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading documents: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/documents/check", response_model=DocumentCheckResponse)
+async def check_documents(request: DocumentCheckRequest):
+    """Compare file hashes against the knowledge base, so clients upload only new or changed files"""
+    try:
+        filenames = {document_key(doc.filename, request.project): doc.filename for doc in request.documents}
+        changed, unchanged = knowledge_base_registry.diff(
+            {document_key(doc.filename, request.project): doc.content_hash for doc in request.documents}
+        )
+        html_content = _uploaded_html()
+        html_stored = bool(
+            request.html
+            and html_content
+            and request.html.content_hash == compute_content_hash(html_content)
+            and document_key(request.html.filename, request.project) in knowledge_base_registry.documents
+        )
+        
+        return DocumentCheckResponse(
+            missing=[filenames[key] for key in changed],
+            stored=[filenames[key] for key in unchanged],
+            html_stored=html_stored,
+            kb_version=knowledge_base_registry.version
+        )
+    except Exception as e:
+        logger.error(f"Error checking documents: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/upload-html")
 async def upload_html(
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    project: Optional[str] = Form(None)
 ):
     try:
+        _ensure_writable()
         logger.info(f"Received HTML file: {file.filename}")
         
         content = await file.read()
         html_content = content.decode('utf-8')
         
-        html_content_store["checkout_html"] = html_content
+        state_store.set(HTML_NAMESPACE, HTML_STATE_KEY, html_content)
         
-        chunks = document_processor.process_document(
-            content=html_content,
-            filename=file.filename,
-            file_type='html'
-        )
-        
-        vector_store_service.add_documents(chunks)
+        with profiler.memory("upload-html", documents=1):
+            chunks = document_processor.process_document(
+                content=html_content,
+                filename=file.filename,
+                file_type='html',
+                project=project
+            )
+            
+            vector_store_service.add_documents(chunks)
+        # After ingest, so the indexes are built for the new knowledge base version
+        selenium_generator.prepare_html(html_content)
         
         logger.info(f"Successfully stored HTML file: {file.filename}")
         
@@ -156,6 +352,8 @@ async def upload_html(
             "chunks_created": len(chunks)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading HTML: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -166,12 +364,20 @@ async def get_knowledge_base_status():
     """Get status of the knowledge base"""
     try:
         collection_info = vector_store_service.get_collection_info()
+        snapshot = knowledge_base_registry.snapshot()
         
         return KnowledgeBaseStatus(
             is_built=collection_info.get("exists", False) and collection_info.get("points_count", 0) > 0,
             document_count=collection_info.get("points_count", 0),
-            total_chunks=collection_info.get("vectors_count", 0),
-            collection_exists=collection_info.get("exists", False)
+            # Recent Qdrant versions no longer report vectors_count
+            total_chunks=collection_info.get("vectors_count") or collection_info.get("points_count", 0),
+            collection_exists=collection_info.get("exists", False),
+            version=snapshot["version"],
+            fingerprint=snapshot["fingerprint"],
+            updated_at=snapshot["updated_at"],
+            collection=snapshot["collection"],
+            embedding_model=snapshot["embedding_model"],
+            documents=snapshot["documents"]
         )
     except Exception as e:
         logger.error(f"Error getting knowledge base status: {str(e)}")
@@ -183,34 +389,156 @@ async def generate_test_cases(request: TestCaseGenerationRequest):
     try:
         logger.info(f"Generating test cases for query: {request.query}")
         
-        result = test_case_generator.generate_test_cases(
+        kb_version = knowledge_base_registry.version
+        filters = _retrieval_filters(request.filters)
+        # LLM usage of the request is accounted to the project it retrieves from
+        usage_tracker.set_project(filters and filters.get("project"))
+        flight_key = (
+            "test-cases",
+            _normalize_query(request.query),
+            request.max_test_cases,
+            _filters_key(filters),
+            kb_version
+        )
+        result = await generation_flights.run(
+            flight_key,
+            test_case_generator.generate_test_cases,
             query=request.query,
-            max_results=request.max_test_cases
+            max_results=request.max_test_cases,
+            filters=filters
         )
         
         if not result["success"]:
             raise HTTPException(status_code=400, detail=result.get("error", "Failed to generate test cases"))
         
+        suite_id = test_case_store.create_suite(
+            [tc.dict() for tc in result["test_cases"]],
+            query=request.query,
+            sources_used=result["sources_used"],
+            kb_version=kb_version
+        )
+        
         return TestCaseGenerationResponse(
             success=True,
             test_cases=result["test_cases"],
             total_generated=result["total_generated"],
-            sources_used=result["sources_used"]
+            sources_used=result["sources_used"],
+            kb_version=kb_version,
+            suite_id=suite_id
         )
         
     except HTTPException:
         raise
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         logger.error(f"Error generating test cases: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/test-suites")
+async def create_test_suite(request: TestSuiteCreateRequest):
+    """Save test cases (imported or edited) as a suite that can be paged like a generated one"""
+    try:
+        suite_id = test_case_store.create_suite(
+            [tc.dict() for tc in request.test_cases],
+            query=request.query,
+            kb_version=knowledge_base_registry.version
+        )
+        return {"success": True, "suite_id": suite_id, "total": len(request.test_cases)}
+    except Exception as e:
+        logger.error(f"Error saving test suite: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/test-suites/{suite_id}/test-cases", response_model=TestCasePage)
+async def list_test_cases(
+    suite_id: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(25, ge=1, le=200),
+    feature: Optional[str] = None,
+    test_type: Optional[str] = None,
+    priority: Optional[str] = None,
+    search: Optional[str] = None
+):
+    """One page of a suite's test cases as compact rows, filtered and searched server-side"""
+    result = test_case_store.list_test_cases(
+        suite_id,
+        page=page,
+        page_size=page_size,
+        feature=feature,
+        test_type=test_type,
+        priority=priority,
+        search=search
+    )
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No test suite {suite_id}")
+    
+    return result
+
+
+@app.get("/api/test-suites/{suite_id}/test-cases/{test_id}", response_model=TestCase)
+async def get_test_case(suite_id: str, test_id: str):
+    """Full test case, steps included"""
+    test_case = test_case_store.get_test_case(suite_id, test_id)
+    
+    if test_case is None:
+        raise HTTPException(status_code=404, detail=f"No test case {test_id} in suite {suite_id}")
+    
+    return test_case
+
+
+@app.get("/api/test-suites/{suite_id}/scripts.zip")
+async def download_suite_scripts(
+    suite_id: str,
+    generate_missing: bool = False,
+    layout: str = Query("scripts", pattern="^(scripts|pytest)$")
+):
+    """
+    Stream a ZIP of the suite's scripts with the page, page objects, a pytest conftest and a manifest
+    
+    The archive is written entry by entry while it is sent. With generate_missing,
+    scripts not generated yet are generated (and stored) as the download proceeds.
+    layout=pytest assembles the scripts into a pytest suite sharing one browser.
+    """
+    try:
+        suite = test_case_store.get_suite(suite_id)
+        
+        if suite is None:
+            raise HTTPException(status_code=404, detail=f"No test suite {suite_id}")
+        
+        html_content = _uploaded_html()
+        if generate_missing and not html_content:
+            raise HTTPException(
+                status_code=400,
+                detail="No HTML content available. Please upload checkout.html first."
+            )
+        
+        # A sync generator: Starlette iterates it in the threadpool, so generation does not block the loop
+        archive = stream_zip(script_exporter.entries(
+            suite, html_content, generate_missing=generate_missing, layout=layout
+        ))
+        filename = f"{script_exporter.archive_name(suite_id)}.zip"
+        
+        return StreamingResponse(
+            archive,
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting scripts of suite {suite_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/generate-selenium-script", response_model=SeleniumScriptResponse)
 async def generate_selenium_script(request: SeleniumScriptRequest):
     try:
         logger.info(f"Generating Selenium script for test case: {request.test_case.test_id}")
         
-        html_content = request.html_content or html_content_store.get("checkout_html", "")
+        html_content = request.html_content or _uploaded_html()
         
         if not html_content:
             raise HTTPException(
@@ -218,33 +546,207 @@ async def generate_selenium_script(request: SeleniumScriptRequest):
                 detail="No HTML content available. Please upload checkout.html first."
             )
         
-        result = selenium_generator.generate_script(
+        kb_version = knowledge_base_registry.version
+        filters = _retrieval_filters(request.filters)
+        # LLM usage of the request is accounted to the project it retrieves from
+        usage_tracker.set_project(filters and filters.get("project"))
+        flight_key = (
+            "selenium-script",
+            compute_content_hash(json.dumps(request.test_case.dict(), sort_keys=True)),
+            compute_content_hash(html_content),
+            _filters_key(filters),
+            kb_version
+        )
+        result = await generation_flights.run(
+            flight_key,
+            selenium_generator.generate_script,
             test_case=request.test_case,
-            html_content=html_content
+            html_content=html_content,
+            filters=filters
         )
         
         if not result["success"]:
             raise HTTPException(status_code=400, detail=result.get("error", "Failed to generate script"))
         
+        if request.suite_id:
+            test_case_store.save_script(request.suite_id, result["test_case_id"], result["script"])
+        
         return SeleniumScriptResponse(
             success=True,
             script=result["script"],
             test_case_id=result["test_case_id"],
-            language="python"
+            language="python",
+            page_object=result.get("page_object"),
+            kb_version=kb_version,
+            validation=result.get("validation")
         )
         
     except HTTPException:
         raise
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         logger.error(f"Error generating Selenium script: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/run-selenium-scripts", response_model=ScriptRunResponse)
+async def run_selenium_scripts(request: ScriptRunRequest):
+    try:
+        logger.info(f"Running {len(request.scripts)} Selenium scripts")
+        
+        html_content = request.html_content or _uploaded_html()
+        
+        if not html_content:
+            raise HTTPException(
+                status_code=400,
+                detail="No HTML content available. Please upload checkout.html first."
+            )
+        
+        # Joins the browser workers for the whole batch; keep the event loop free meanwhile
+        results = await run_in_threadpool(
+            script_runner.run_scripts,
+            scripts=[item.dict() for item in request.scripts],
+            html_content=html_content,
+            timeout=request.timeout_seconds,
+            support_files=selenium_generator.support_files(html_content)
+        )
+        
+        passed = sum(1 for r in results if r["status"] == "passed")
+        
+        return ScriptRunResponse(
+            success=True,
+            results=results,
+            passed=passed,
+            failed=len(results) - passed
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error running Selenium scripts: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/repair-selenium-scripts", response_model=ScriptRepairResponse)
+async def repair_selenium_scripts(request: ScriptRepairRequest):
+    try:
+        logger.info(f"Repairing {len(request.items)} Selenium scripts")
+        
+        html_content = request.html_content or _uploaded_html()
+        
+        if not html_content:
+            raise HTTPException(
+                status_code=400,
+                detail="No HTML content available. Please upload checkout.html first."
+            )
+        
+        # Runs the scripts and makes LLM calls; keep the event loop free meanwhile
+        result = await run_in_threadpool(
+            script_repair_service.repair_scripts,
+            items=[{"test_case": item.test_case, "script": item.script} for item in request.items],
+            html_content=html_content,
+            max_attempts=request.max_attempts
+        )
+        
+        if request.suite_id:
+            for repaired in result["results"]:
+                test_case_store.save_script(request.suite_id, repaired["test_case_id"], repaired["script"])
+        
+        return ScriptRepairResponse(
+            success=True,
+            results=result["results"],
+            llm_calls=result["llm_calls"]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error repairing Selenium scripts: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/run-results/{test_case_id}", response_model=ScriptRunResult)
+async def get_run_result(test_case_id: str, script_hash: Optional[str] = None):
+    """Result of the script with ``script_hash``, or of the latest run of this test case id"""
+    result = script_runner.get_result(test_case_id, script_hash)
+    
+    if not result:
+        raise HTTPException(status_code=404, detail=f"No run result for {test_case_id}")
+    
+    return result
+
+
+@app.get("/api/run-results/{test_case_id}/screenshot")
+async def get_run_screenshot(test_case_id: str, script_hash: Optional[str] = None):
+    result = script_runner.get_result(test_case_id, script_hash)
+    
+    if not result or not result.get("screenshot_path"):
+        raise HTTPException(status_code=404, detail=f"No screenshot for {test_case_id}")
+    
+    return FileResponse(result["screenshot_path"], media_type="image/png")
+
+
+@app.on_event("shutdown")
+async def shutdown_runner():
+    script_runner.shutdown()
+    profiler.shutdown()
+
+
+@app.post("/api/knowledge-base/migrate")
+async def migrate_knowledge_base(request: CollectionMigrationRequest):
+    """Apply a collection profile (quantization, on-disk storage, HNSW) to the existing collection"""
+    try:
+        _ensure_writable()
+        collection_info = await run_in_threadpool(vector_store_service.migrate_collection, request.profile)
+        
+        return {
+            "success": True,
+            "message": f"Collection migrated to profile '{request.profile}'",
+            "collection": collection_info
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error migrating knowledge base: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/embeddings/reindex")
+async def start_reindex(request: ReindexRequest):
+    """Re-index the knowledge base with another embedding model in the background, then switch to it"""
+    try:
+        return reindex_service.start(request.model, drop_old=request.drop_old)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting re-index: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/embeddings/reindex")
+async def get_reindex_status():
+    """Progress, throughput and ETA of the current or last re-index"""
+    return reindex_service.status()
+
+
+@app.delete("/api/embeddings/reindex")
+async def cancel_reindex():
+    """Stop the running re-index after its current batch; starting it again resumes"""
+    return await run_in_threadpool(reindex_service.cancel)
+
+
 @app.delete("/api/knowledge-base/reset")
 async def reset_knowledge_base():
     try:
+        _ensure_writable()
         vector_store_service.delete_collection()
-        html_content_store["checkout_html"] = ""
+        state_store.delete(HTML_NAMESPACE, HTML_STATE_KEY)
+        test_case_store.clear()
         
         logger.info("Knowledge base reset successfully")
         
@@ -252,21 +754,88 @@ async def reset_knowledge_base():
             "success": True,
             "message": "Knowledge base reset successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error resetting knowledge base: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _check_admin(request: Request):
+    """404 unless profiling is enabled; 403 unless the request carries the PROFILING_TOKEN"""
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (PROFILING=false)")
+    if not profiler.token:
+        raise HTTPException(status_code=403, detail="Admin endpoints require PROFILING_TOKEN to be set")
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), profiler.token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/api/admin/profile", response_class=PlainTextResponse)
+async def take_profile(
+    request: Request,
+    seconds: float = Query(10, gt=0),
+    interval_ms: Optional[float] = Query(None, ge=1, le=1000)
+):
+    """Sample the backend's stacks for N seconds; folded stacks, ready for a flamegraph"""
+    _check_admin(request)
+    try:
+        capture = await run_in_threadpool(profiler.profile, seconds, interval_ms)
+        _, folded = profiler.get_capture(capture["id"])
+        return PlainTextResponse(folded, headers={"X-Profile-Id": capture["id"]})
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error profiling: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/admin/profiles")
+async def list_profiles(request: Request):
+    """Stored CPU profiles (on demand and slow requests) and memory diffs, newest first"""
+    _check_admin(request)
+    return {"profiles": await run_in_threadpool(profiler.list_captures), "stats": profiler.get_stats()}
+
+
+@app.get("/api/admin/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(request: Request, profile_id: str):
+    """Folded stacks of one stored profile"""
+    _check_admin(request)
+    capture = await run_in_threadpool(profiler.get_capture, profile_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    meta, folded = capture
+    return PlainTextResponse(folded, headers={"X-Profile-Kind": meta["kind"]})
+
+
 @app.get("/api/test-rag")
-async def test_rag(query: str):
+async def test_rag(
+    query: str,
+    source: Optional[List[str]] = Query(None),
+    file_type: Optional[List[str]] = Query(None),
+    section: Optional[str] = None,
+    page_from: Optional[int] = None,
+    page_to: Optional[int] = None,
+    project: Optional[str] = None
+):
     try:
+        filters = _retrieval_filters(RetrievalFilter(
+            sources=source,
+            file_types=file_type,
+            section=section,
+            page_from=page_from,
+            page_to=page_to,
+            project=project
+        ))
         results = vector_store_service.similarity_search(
             query=query,
-            k=5
+            k=5,
+            filters=filters
         )
         
         return {
             "query": query,
+            "filters": filters,
             "results_found": len(results),
             "results": results
         }
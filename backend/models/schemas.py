@@ -20,12 +20,60 @@ class DocumentUploadResponse(BaseModel):
     chunks_created: int
 
 
+class DocumentFingerprint(BaseModel):
+    """File name and SHA-256 of a file's raw bytes"""
+    filename: str
+    content_hash: str
+
+
+class DocumentCheckRequest(BaseModel):
+    """Files a client is about to upload, identified by content hash"""
+    documents: List[DocumentFingerprint] = []
+    html: Optional[DocumentFingerprint] = None
+    project: Optional[str] = Field(None, description="Project the files will be uploaded for")
+
+
+class DocumentCheckResponse(BaseModel):
+    """Which of the checked files the backend still needs"""
+    missing: List[str] = Field(..., description="New or changed files to upload")
+    stored: List[str] = Field(..., description="Files already ingested with identical content")
+    html_stored: bool = Field(False, description="The checked HTML is the current target page")
+    kb_version: int
+
+
+class KnowledgeBaseDocument(BaseModel):
+    """Manifest entry of one ingested source"""
+    source: str
+    project: Optional[str] = None
+    content_hash: str
+    file_type: str
+    chunks: int
+    ingested_at: Optional[str] = None
+
+
 class KnowledgeBaseStatus(BaseModel):
     """Status of the knowledge base"""
     is_built: bool
     document_count: int
     total_chunks: int
     collection_exists: bool
+    version: int = 0
+    fingerprint: Optional[str] = None
+    updated_at: Optional[str] = None
+    collection: Optional[str] = None
+    embedding_model: Optional[str] = None
+    documents: List[KnowledgeBaseDocument] = []
+
+
+class CollectionMigrationRequest(BaseModel):
+    """Collection profile to apply to the knowledge base collection"""
+    profile: str = Field(..., description="default, balanced, compact or binary")
+
+
+class ReindexRequest(BaseModel):
+    """Embedding model to re-index the knowledge base with"""
+    model: str = Field(..., description="Sentence-transformers model name")
+    drop_old: bool = Field(False, description="Delete the previous collection after the switch")
 
 
 class HealthCheck(BaseModel):
@@ -48,10 +96,21 @@ class TestCase(BaseModel):
     priority: Optional[str] = Field("Medium", description="Priority: High/Medium/Low")
 
 
+class RetrievalFilter(BaseModel):
+    """Restricts retrieval to matching knowledge base chunks"""
+    sources: Optional[List[str]] = Field(None, description="Source file names, e.g. api_endpoints.json")
+    file_types: Optional[List[str]] = Field(None, description="md, txt, json, pdf or html")
+    section: Optional[str] = Field(None, description="Section path; subsections match too")
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+    project: Optional[str] = None
+
+
 class TestCaseGenerationRequest(BaseModel):
     """Request to generate test cases"""
     query: str = Field(..., description="User query for test case generation")
     max_test_cases: Optional[int] = Field(10, description="Maximum test cases to generate")
+    filters: Optional[RetrievalFilter] = None
 
 
 class TestCaseGenerationResponse(BaseModel):
@@ -60,12 +119,45 @@ class TestCaseGenerationResponse(BaseModel):
     test_cases: List[TestCase]
     total_generated: int
     sources_used: List[str]
+    kb_version: Optional[int] = None
+    suite_id: Optional[str] = Field(None, description="Saved suite, for paging via /api/test-suites")
+
+
+class TestSuiteCreateRequest(BaseModel):
+    """Test cases to save as a suite (imported or edited)"""
+    query: str = ""
+    test_cases: List[TestCase]
+
+
+class TestCaseSummary(BaseModel):
+    """Compact row of a test case listing"""
+    test_id: str
+    feature: str
+    test_type: str
+    priority: Optional[str] = None
+    test_scenario: str
+    steps: int
+
+
+class TestCasePage(BaseModel):
+    """One page of a suite's test cases, after filtering"""
+    suite_id: str
+    query: str
+    total: int
+    matched: int
+    page: int
+    page_size: int
+    pages: int
+    items: List[TestCaseSummary]
+    facets: Dict[str, List[str]] = Field(..., description="Values of feature, test_type and priority in the suite")
 
 
 class SeleniumScriptRequest(BaseModel):
     """Request to generate Selenium script"""
     test_case: TestCase
     html_content: str
+    filters: Optional[RetrievalFilter] = None
+    suite_id: Optional[str] = Field(None, description="Store the script with this suite, for bulk export")
 
 
 class SeleniumScriptResponse(BaseModel):
@@ -73,4 +165,78 @@ class SeleniumScriptResponse(BaseModel):
     success: bool
     script: str
     test_case_id: str
-    language: str = "python"
\ No newline at end of file
+    language: str = "python"
+    page_object: Optional[str] = Field(None, description="Shared page object module the script imports")
+    kb_version: Optional[int] = None
+    validation: Optional[Dict[str, Any]] = Field(
+        None, description="Static validation: valid, errors, milliseconds, regenerations"
+    )
+
+class ScriptRunItem(BaseModel):
+    """Single generated script to execute"""
+    test_case_id: str
+    script: str
+
+
+class ScriptRunRequest(BaseModel):
+    """Request to execute generated Selenium scripts"""
+    scripts: List[ScriptRunItem]
+    html_content: Optional[str] = Field(None, description="HTML to test against (defaults to uploaded HTML)")
+    timeout_seconds: Optional[int] = Field(None, description="Per-script timeout in seconds")
+
+
+class ScriptRunResult(BaseModel):
+    """Outcome of one script execution"""
+    test_case_id: str
+    status: str = Field(..., description="passed/failed/error/timeout")
+    duration_ms: float
+    error: Optional[str] = None
+    traceback: Optional[str] = None
+    stdout: str = ""
+    stderr: str = ""
+    browser_log: List[str] = []
+    screenshot_path: Optional[str] = None
+    worker: Optional[int] = None
+    finished_at: Optional[str] = None
+    script_hash: Optional[str] = None
+    html_hash: Optional[str] = None
+
+
+class ScriptRunResponse(BaseModel):
+    """Response with script execution results"""
+    success: bool
+    results: List[ScriptRunResult]
+    passed: int
+    failed: int
+
+
+class ScriptRepairItem(BaseModel):
+    """Test case with its current (possibly failing) script"""
+    test_case: TestCase
+    script: str
+
+
+class ScriptRepairRequest(BaseModel):
+    """Request to repair failing Selenium scripts"""
+    items: List[ScriptRepairItem]
+    html_content: Optional[str] = Field(None, description="HTML to test against (defaults to uploaded HTML)")
+    max_attempts: Optional[int] = Field(None, description="Maximum regeneration attempts per failing script")
+    suite_id: Optional[str] = Field(None, description="Store repaired scripts with this suite, for bulk export")
+
+
+class ScriptRepairResult(BaseModel):
+    """Outcome of the repair loop for one test case"""
+    test_case_id: str
+    status: str = Field(..., description="Final run status: passed/failed/error/timeout")
+    script: str
+    attempts: int = Field(..., description="LLM regeneration attempts spent")
+    repaired: bool
+    from_cache: bool = False
+    error: Optional[str] = None
+
+
+class ScriptRepairResponse(BaseModel):
+    """Response with repaired scripts"""
+    success: bool
+    results: List[ScriptRepairResult]
+    llm_calls: int
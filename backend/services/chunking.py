@@ -0,0 +1,297 @@
+"""
+Structure-aware chunkers used by DocumentProcessor.
+
+Markdown and outlined text are chunked along their heading hierarchy,
+JSON per record (one API endpoint per chunk) in compact form, HTML per DOM
+region and PDF per page. Every chunk carries a ``section`` label, and small
+sibling sections are packed together up to the chunk size, so the index
+holds fewer, denser chunks that each stay on one topic.
+"""
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from bs4 import BeautifulSoup
+from typing import Any, List, Optional, Tuple
+import json
+import re
+
+ATX_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+UNDERLINE = re.compile(r"^\s*(=+|-+)\s*$")
+FENCE = re.compile(r"^\s*(```|~~~)")
+REGION_HEADINGS = ["h1", "h2", "h3"]
+SECTION_SEPARATOR = " > "
+
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or spaces after separators"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+class StructuredChunker:
+    """Split documents along their structure instead of at fixed offsets"""
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+        self.chunk_size = chunk_size
+        # Only used to split a single section that exceeds the chunk size
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+            is_separator_regex=False,
+            separators=["\n\n", "\n", ". ", " ", ""]
+        )
+
+    # ========================== OUTLINED TEXT ==========================
+    def split_outline(self, content: str) -> List[Document]:
+        """
+        Chunk Markdown or plain text by heading hierarchy
+
+        Recognizes ATX headings (``## Title``), setext headings (a line
+        underlined with ``===`` or ``---``) and ``====`` banners.
+        """
+        sections = self._outline_sections(content)
+        if not any(path for path, _ in sections):
+            return self._split_plain(content)
+        return self._pack_sections(sections)
+
+    def _outline_sections(self, content: str) -> List[Tuple[List[str], str]]:
+        """(heading path, body) per section, headings removed from the body"""
+        lines = content.splitlines()
+        sections: List[Tuple[List[str], str]] = []
+        path: List[str] = []
+        levels: List[int] = []
+        body: List[str] = []
+        in_fence = False
+
+        def flush():
+            text = "\n".join(body).strip()
+            if text:
+                sections.append((list(path), text))
+            body.clear()
+
+        def open_heading(level: int, title: str):
+            flush()
+            while levels and levels[-1] >= level:
+                levels.pop()
+                path.pop()
+            levels.append(level)
+            path.append(title)
+
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            if FENCE.match(line):
+                in_fence = not in_fence
+            if in_fence:
+                body.append(line)
+                i += 1
+                continue
+
+            atx = ATX_HEADING.match(line)
+            underline = UNDERLINE.match(lines[i + 1]) if i + 1 < len(lines) else None
+            if atx:
+                open_heading(len(atx.group(1)), atx.group(2).strip().rstrip(":"))
+            elif underline and line.strip() and not UNDERLINE.match(line) and len(underline.group(1)) >= 3:
+                open_heading(1 if underline.group(1)[0] == "=" else 2, line.strip().rstrip(":"))
+                i += 1
+            elif UNDERLINE.match(line) and len(line.strip()) >= 3:
+                # Banner rule or horizontal rule
+                pass
+            else:
+                body.append(line)
+            i += 1
+
+        flush()
+        return sections
+
+    def _pack_sections(self, sections: List[Tuple[List[str], str]]) -> List[Document]:
+        """
+        Merge consecutive sections up to the chunk size as long as they stay
+        under one parent heading (siblings, or a parent's intro and its children)
+        """
+        chunks: List[Document] = []
+        group: List[Tuple[List[str], str]] = []
+
+        def common_prefix(paths: List[List[str]]) -> List[str]:
+            prefix = []
+            for titles in zip(*paths):
+                if any(title != titles[0] for title in titles):
+                    break
+                prefix.append(titles[0])
+            return prefix
+
+        def block(path: List[str], text: str, prefix: List[str]) -> str:
+            label = SECTION_SEPARATOR.join(path[len(prefix):])
+            return f"{label}\n{text}" if label else text
+
+        def emit():
+            if not group:
+                return
+            prefix = common_prefix([path for path, _ in group])
+            if len(group) == 1:
+                section_path, blocks = group[0][0], [group[0][1]]
+            else:
+                section_path = prefix or [" | ".join(path[0] for path, _ in group if path)]
+                blocks = [block(path, text, prefix) for path, text in group]
+            chunks.extend(self._documents(section_path, "\n\n".join(blocks)))
+            group.clear()
+
+        for path, text in sections:
+            if group:
+                paths = [p for p, _ in group] + [path]
+                prefix = common_prefix(paths)
+                size = len(SECTION_SEPARATOR.join(prefix)) + 1
+                size += sum(len(block(p, t, prefix)) + 2 for p, t in group + [(path, text)])
+                if len(prefix) < max(len(p) for p in paths) - 1 or size > self.chunk_size:
+                    emit()
+            group.append((path, text))
+        emit()
+
+        return chunks
+
+    # ========================== JSON ==========================
+    def split_json(self, content: str) -> List[Document]:
+        """
+        One chunk per record of the document's collections (e.g. each API
+        endpoint), serialized compactly; top-level scalars form an overview
+        """
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError:
+            return self._split_plain(content)
+
+        overview, records = {}, []
+        if isinstance(data, dict):
+            for key, value in data.items():
+                if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+                    records.extend((key, item) for item in value)
+                elif isinstance(value, (dict, list)):
+                    records.append((key, value))
+                else:
+                    overview[key] = value
+        elif isinstance(data, list):
+            records = [("items", item) for item in data]
+        else:
+            overview["value"] = data
+
+        chunks: List[Document] = []
+        if overview:
+            chunks.extend(self._documents(["overview"], compact_json(overview)))
+        for key, record in records:
+            label = self._record_label(record)
+            section_path = [key, label] if label else [key]
+            chunks.extend(self._documents(section_path, compact_json(record)))
+        return chunks
+
+    def _record_label(self, record: Any) -> Optional[str]:
+        """``POST /api/apply_coupon Apply Coupon`` for endpoint-like records"""
+        if not isinstance(record, dict):
+            return None
+        parts = [str(record[key]) for key in ("method", "path", "name", "id", "title") if isinstance(record.get(key), (str, int))]
+        return " ".join(parts) or None
+
+    # ========================== HTML ==========================
+    def split_html(self, content: str) -> List[Document]:
+        """
+        Chunk HTML by DOM region: the container of each h1-h3 heading, with
+        nested regions folded into their outermost one, plus the text outside
+        every region. Headings placed directly in the body head the content
+        that follows them up to the next heading. Small neighbouring regions
+        are packed together.
+        """
+        soup = BeautifulSoup(content, "html.parser")
+        for tag in soup(["script", "style", "noscript", "template"]):
+            tag.decompose()
+        root = soup.body or soup
+        self._wrap_top_level_headings(soup, root)
+
+        regions = []
+        for heading in root.find_all(REGION_HEADINGS):
+            region = heading.parent if heading.parent is not None and heading.parent is not root else heading
+            if any(region is r or r in region.parents for r in regions):
+                continue
+            regions = [r for r in regions if region not in r.parents]
+            regions.append(region)
+
+        sections: List[Tuple[List[str], str]] = []
+        empty_titles: List[str] = []
+        for region in regions:
+            heading = region if region.name in REGION_HEADINGS else region.find(REGION_HEADINGS)
+            title = heading.get_text(" ", strip=True) if heading else self._region_selector(region)
+            text = self._html_text(region)
+            if text.startswith(title):
+                text = text[len(title):].lstrip("\n")
+            if text:
+                sections.append(([title], text))
+            else:
+                empty_titles.append(title)
+
+        for region in regions:
+            region.extract()
+        page_title = soup.title.get_text(strip=True) if soup.title else "page"
+        remainder = self._html_text(root)
+        if remainder:
+            sections.append(([page_title], remainder))
+        elif not sections and empty_titles:
+            # Nothing but headings: keep them rather than the page vanishing from the index
+            sections.append(([page_title], "\n".join(empty_titles)))
+
+        return self._pack_sections(sections)
+
+    def _wrap_top_level_headings(self, soup: BeautifulSoup, root):
+        """Give each heading of ``root`` a container holding it and the siblings it heads"""
+        for heading in root.find_all(REGION_HEADINGS, recursive=False):
+            section = soup.new_tag("section")
+            heading.insert_before(section)
+            sibling = heading
+            while sibling is not None:
+                following = sibling.next_sibling
+                section.append(sibling)
+                sibling = following
+                if getattr(sibling, "name", None) in REGION_HEADINGS or (
+                    hasattr(sibling, "find") and sibling.find(REGION_HEADINGS) is not None
+                ):
+                    break
+
+    def _html_text(self, element) -> str:
+        text = element.get_text(separator="\n", strip=True)
+        lines = (line.strip() for line in text.splitlines())
+        return "\n".join(line for line in lines if line)
+
+    def _region_selector(self, element) -> str:
+        selector = element.name
+        if element.get("id"):
+            selector += f"#{element['id']}"
+        if element.get("class"):
+            selector += "".join(f".{c}" for c in element["class"])
+        return selector
+
+    # ========================== PAGES ==========================
+    def split_pages(self, pages: List[str]) -> List[Document]:
+        """One chunk per page (split further if the page is large), with its page number"""
+        chunks: List[Document] = []
+        for number, text in enumerate(pages, start=1):
+            if text.strip():
+                chunks.extend(self._documents([f"Page {number}"], text.strip(), page=number))
+        return chunks
+
+    # ========================== HELPERS ==========================
+    def _split_plain(self, text: str) -> List[Document]:
+        return [
+            Document(page_content=piece, metadata={"section": ""})
+            for piece in self.splitter.split_text(text)
+        ]
+
+    def _documents(self, section_path: List[str], text: str, **metadata) -> List[Document]:
+        """Chunk(s) for one section, each prefixed with its section path for context"""
+        section = SECTION_SEPARATOR.join(section_path)
+        header = f"{section}\n" if section else ""
+        pieces = [text] if len(header) + len(text) <= self.chunk_size else self.splitter.split_text(text)
+        # Every ancestor path, so a filter on a section also matches its subsections
+        section_path = [SECTION_SEPARATOR.join(section_path[:i]) for i in range(1, len(section_path) + 1)]
+        return [
+            Document(
+                page_content=f"{header}{piece}",
+                metadata={"section": section, "section_path": section_path, **metadata}
+            )
+            for piece in pieces
+        ]
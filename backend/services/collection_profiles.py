@@ -0,0 +1,148 @@
+"""
+Qdrant collection profiles.
+
+A profile bundles the storage and index settings of the knowledge base
+collection: vector quantization (with rescoring on the original vectors),
+on-disk vectors and payloads, HNSW parameters and payload indexes. The same
+profile is used to create a collection and to migrate an existing one.
+
+    default   float32 vectors and payloads in RAM (previous behaviour)
+    balanced  int8 scalar quantization in RAM, originals and payloads on disk
+    compact   x16 product quantization in RAM, originals, graph and payloads on disk
+    binary    1-bit binary quantization in RAM, originals and payloads on disk
+              (recall suffers below ~1024 dimensions; MiniLM has 384)
+"""
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CollectionParamsDiff,
+    CompressionRatio,
+    Disabled,
+    Distance,
+    HnswConfigDiff,
+    PayloadSchemaType,
+    ProductQuantization,
+    ProductQuantizationConfig,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+    VectorParamsDiff,
+)
+from typing import Any, Dict, Optional
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+QDRANT_COLLECTION_PROFILE = os.getenv("QDRANT_COLLECTION_PROFILE", "default")
+QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", "16"))
+QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100"))
+QDRANT_SEARCH_HNSW_EF = int(os.getenv("QDRANT_SEARCH_HNSW_EF", "0"))
+
+COLLECTION_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {
+        "quantization": None,
+        "on_disk_vectors": False,
+        "on_disk_payload": False,
+        "hnsw_on_disk": False,
+        "oversampling": 1.0,
+    },
+    "balanced": {
+        "quantization": "scalar",
+        "on_disk_vectors": True,
+        "on_disk_payload": True,
+        "hnsw_on_disk": False,
+        "oversampling": 2.0,
+    },
+    "compact": {
+        "quantization": "product",
+        "on_disk_vectors": True,
+        "on_disk_payload": True,
+        "hnsw_on_disk": True,
+        "oversampling": 3.0,
+    },
+    "binary": {
+        "quantization": "binary",
+        "on_disk_vectors": True,
+        "on_disk_payload": True,
+        "hnsw_on_disk": False,
+        "oversampling": 3.0,
+    },
+}
+
+# Fields filtered on at query time
+PAYLOAD_INDEXES = {
+    "source": PayloadSchemaType.KEYWORD,
+    "file_type": PayloadSchemaType.KEYWORD,
+    "section_path": PayloadSchemaType.KEYWORD,
+    "page": PayloadSchemaType.INTEGER,
+    "project": PayloadSchemaType.KEYWORD,
+}
+
+
+def get_profile(name: str = QDRANT_COLLECTION_PROFILE) -> Dict[str, Any]:
+    """Profile settings by name, with the HNSW parameters from the environment"""
+    if name not in COLLECTION_PROFILES:
+        raise ValueError(f"Unknown collection profile '{name}'. Available: {', '.join(COLLECTION_PROFILES)}")
+    return {
+        "name": name,
+        **COLLECTION_PROFILES[name],
+        "hnsw_m": QDRANT_HNSW_M,
+        "hnsw_ef_construct": QDRANT_HNSW_EF_CONSTRUCT,
+    }
+
+
+def _quantization_config(profile: Dict[str, Any]):
+    if profile["quantization"] == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if profile["quantization"] == "product":
+        return ProductQuantization(
+            product=ProductQuantizationConfig(compression=CompressionRatio.X16, always_ram=True)
+        )
+    if profile["quantization"] == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def _hnsw_config(profile: Dict[str, Any]) -> HnswConfigDiff:
+    return HnswConfigDiff(
+        m=profile["hnsw_m"],
+        ef_construct=profile["hnsw_ef_construct"],
+        on_disk=profile["hnsw_on_disk"]
+    )
+
+
+def create_collection_kwargs(profile: Dict[str, Any], dimension: int) -> Dict[str, Any]:
+    """Arguments for ``QdrantClient.create_collection``"""
+    return {
+        "vectors_config": VectorParams(size=dimension, distance=Distance.COSINE, on_disk=profile["on_disk_vectors"]),
+        "on_disk_payload": profile["on_disk_payload"],
+        "hnsw_config": _hnsw_config(profile),
+        "quantization_config": _quantization_config(profile),
+    }
+
+
+def update_collection_kwargs(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Arguments for ``QdrantClient.update_collection`` migrating to the profile"""
+    return {
+        "vectors_config": {"": VectorParamsDiff(on_disk=profile["on_disk_vectors"])},
+        "collection_params": CollectionParamsDiff(on_disk_payload=profile["on_disk_payload"]),
+        "hnsw_config": _hnsw_config(profile),
+        # Disabled removes quantization from a collection that had it
+        "quantization_config": _quantization_config(profile) or Disabled.DISABLED,
+    }
+
+
+def search_params(profile: Dict[str, Any]) -> Optional[SearchParams]:
+    """Query-time parameters: rescoring quantized candidates on the original vectors"""
+    quantization = None
+    if profile["quantization"]:
+        quantization = QuantizationSearchParams(rescore=True, oversampling=profile["oversampling"])
+    if quantization is None and not QDRANT_SEARCH_HNSW_EF:
+        return None
+    return SearchParams(hnsw_ef=QDRANT_SEARCH_HNSW_EF or None, quantization=quantization)
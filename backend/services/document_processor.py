@@ -1,9 +1,11 @@
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import json
 import markdown
 from bs4 import BeautifulSoup
+from backend.services.chunking import StructuredChunker
+from backend.utils.helpers import compute_content_hash
 import pymupdf
 import logging
 import os
@@ -13,6 +15,7 @@ load_dotenv()
 
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+STRUCTURED_CHUNKING = os.getenv("STRUCTURED_CHUNKING", "true").lower() == "true"
 
 logger = logging.getLogger(__name__)
 
@@ -27,32 +30,35 @@ class DocumentProcessor:
             is_separator_regex=False,
             separators=["\n\n", "\n", ". ", " ", ""]
         )
+        self.structured_chunker = StructuredChunker(CHUNK_SIZE, CHUNK_OVERLAP)
+        self.use_structured_chunking = STRUCTURED_CHUNKING
     
-    def process_document(self, content: str, filename: str, file_type: str) -> List[Document]:
+    def process_document(
+        self,
+        content: str,
+        filename: str,
+        file_type: str,
+        project: Optional[str] = None
+    ) -> List[Document]:
         
         try:
-            if file_type == "md":
-                text = self._process_markdown(content)
-            elif file_type == "txt":
-                text = content
-            elif file_type == "json":
-                text = self._process_json(content)
-            elif file_type == "pdf":
-                text = self._process_pdf(content)
-            elif file_type == "html":
-                text = self._process_html(content)
-            else:
+            if file_type not in ("md", "txt", "json", "pdf", "html"):
                 raise ValueError(f"Unsupported file type: {file_type}")
             
-            doc = Document(
-                page_content=text,
-                metadata={
-                    "source": filename,
-                    "file_type": file_type
-                }
-            )
+            if self.use_structured_chunking:
+                chunks = self._structured_chunks(content, file_type)
+            else:
+                chunks = self._flat_chunks(content, file_type)
             
-            chunks = self.text_splitter.split_documents([doc])
+            content_hash = compute_content_hash(content)
+            for chunk in chunks:
+                chunk.metadata.update({
+                    "source": filename,
+                    "file_type": file_type,
+                    "content_hash": content_hash
+                })
+                if project:
+                    chunk.metadata["project"] = project
             
             for idx, chunk in enumerate(chunks):
                 chunk.metadata["chunk_index"] = idx
@@ -65,6 +71,31 @@ class DocumentProcessor:
             logger.error(f"Error processing document {filename}: {str(e)}")
             raise
     
+    def _structured_chunks(self, content, file_type: str) -> List[Document]:
+        """Chunks following the document's headings, records, DOM regions or pages"""
+        if file_type in ("md", "txt"):
+            return self.structured_chunker.split_outline(content)
+        if file_type == "json":
+            return self.structured_chunker.split_json(content)
+        if file_type == "html":
+            return self.structured_chunker.split_html(content)
+        return self.structured_chunker.split_pages(self._pdf_pages(content))
+    
+    def _flat_chunks(self, content, file_type: str) -> List[Document]:
+        """Flattened text split at fixed offsets (STRUCTURED_CHUNKING=false)"""
+        if file_type == "md":
+            text = self._process_markdown(content)
+        elif file_type == "txt":
+            text = content
+        elif file_type == "json":
+            text = self._process_json(content)
+        elif file_type == "pdf":
+            text = self._process_pdf(content)
+        else:
+            text = self._process_html(content)
+        
+        return self.text_splitter.split_documents([Document(page_content=text)])
+    
     def _process_markdown(self, content: str) -> str:
         html = markdown.markdown(content)
         soup = BeautifulSoup(html, 'html.parser')
@@ -78,6 +109,9 @@ class DocumentProcessor:
             return content
     
     def _process_pdf(self, content: bytes) -> str:
+        return "\n\n".join(self._pdf_pages(content))
+    
+    def _pdf_pages(self, content: bytes) -> List[str]:
         try:
             doc = pymupdf.open(stream=content, filetype="pdf")
             text_parts = []
@@ -87,7 +121,7 @@ class DocumentProcessor:
                 text_parts.append(page.get_text())
             
             doc.close()
-            return "\n\n".join(text_parts)
+            return text_parts
         except Exception as e:
             logger.error(f"Error processing PDF: {str(e)}")
             raise
@@ -116,7 +150,8 @@ class DocumentProcessor:
             chunks = self.process_document(
                 content=doc['content'],
                 filename=doc['filename'],
-                file_type=doc['file_type']
+                file_type=doc['file_type'],
+                project=doc.get('project')
             )
             all_chunks.extend(chunks)
         
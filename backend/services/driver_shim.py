@@ -0,0 +1,148 @@
+"""
+Shared WebDriver shim for executing generated Selenium scripts.
+
+Generated scripts create their own browser (``webdriver.Chrome(...)``) and
+load the page through ``file://``. When many scripts are executed in a row
+that means one browser launch per script. This module swaps the WebDriver
+constructors for a factory that hands out one long-lived session instead,
+and rewrites ``file://`` page loads to a static server URL.
+
+It only depends on selenium so it can be copied verbatim next to exported
+scripts.
+"""
+import os
+import runpy
+import sys
+from typing import Callable, Optional, Tuple
+from urllib.parse import urlparse
+
+
+PATCHED_DRIVERS = ("Chrome", "Firefox", "Edge", "Safari", "Remote")
+
+
+def create_headless_driver(window_size: str = "1366,900"):
+    """Start a headless Chrome session with browser console logging enabled"""
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument(f"--window-size={window_size}")
+    options.set_capability("goog:loggingPrefs", {"browser": "ALL"})
+
+    return webdriver.Chrome(options=options)
+
+
+def rewrite_url(url: str, base_url: Optional[str]) -> str:
+    """Point ``file://.../page.html`` at the static server serving the same page"""
+    if not base_url or not url.startswith("file://"):
+        return url
+    filename = os.path.basename(urlparse(url).path)
+    return f"{base_url.rstrip('/')}/{filename}"
+
+
+def run_script(path: str):
+    """Run a standalone script as ``__main__``; ``sys.exit(0)`` counts as success"""
+    # unittest.main() parses sys.argv; the runner's own arguments are not the script's
+    previous_argv = sys.argv
+    sys.argv = [path]
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (0, None):
+            raise AssertionError(f"Script exited with code {e.code}") from None
+    finally:
+        sys.argv = previous_argv
+
+
+class SharedDriver:
+    """Proxy handed to scripts in place of a freshly launched browser"""
+
+    def __init__(self, driver, base_url: Optional[str] = None):
+        object.__setattr__(self, "_driver", driver)
+        object.__setattr__(self, "_base_url", base_url)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._driver, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set_base_url(self, base_url: Optional[str]):
+        object.__setattr__(self, "_base_url", base_url)
+
+    def get(self, url: str):
+        return self._driver.get(rewrite_url(url, self._base_url))
+
+    def quit(self):
+        """Scripts always quit their driver; the session outlives them"""
+
+    def close(self):
+        """Closing the last window would end the shared session"""
+
+    def reset(self):
+        """Clear state left behind by the previous script"""
+        driver = self._driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+
+def install_shared_driver(
+    driver,
+    base_url: Optional[str] = None
+) -> Tuple[SharedDriver, Callable[[], None]]:
+    """
+    Route every WebDriver construction to ``driver``
+
+    Args:
+        driver: Live WebDriver session to share
+        base_url: Static server URL used for ``file://`` page loads
+
+    Returns:
+        The shared proxy and a callable restoring the original constructors
+    """
+    from selenium import webdriver
+
+    shared = SharedDriver(driver, base_url)
+    originals = {}
+
+    def factory(*args, **kwargs):
+        return shared
+
+    for name in PATCHED_DRIVERS:
+        if hasattr(webdriver, name):
+            originals[name] = getattr(webdriver, name)
+            setattr(webdriver, name, factory)
+
+    manager_install = None
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        manager_install = ChromeDriverManager.install
+        # The driver binary is never used, skip the download
+        ChromeDriverManager.install = lambda self: "chromedriver"
+    except ImportError:
+        ChromeDriverManager = None
+
+    def restore():
+        for name, original in originals.items():
+            setattr(webdriver, name, original)
+        if ChromeDriverManager is not None and manager_install is not None:
+            ChromeDriverManager.install = manager_install
+
+    return shared, restore
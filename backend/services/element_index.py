@@ -0,0 +1,209 @@
+"""
+Relevance index over the HTML element index.
+
+Built once per uploaded HTML; for each test case it selects only the
+elements (or page object methods) its steps and expected result refer to,
+so Selenium prompts stop carrying every element of the page.
+"""
+from typing import Dict, Any, List, Optional, Callable
+import json
+import math
+import re
+import logging
+import os
+from dotenv import load_dotenv
+import numpy as np
+
+load_dotenv()
+
+ELEMENT_TOP_K = int(os.getenv("ELEMENT_TOP_K", "12"))
+ELEMENT_MIN_SCORE = float(os.getenv("ELEMENT_MIN_SCORE", "0.25"))
+ELEMENT_LEXICAL_WEIGHT = float(os.getenv("ELEMENT_LEXICAL_WEIGHT", "0.5"))
+
+ELEMENT_CATEGORIES = ["buttons", "inputs", "selects", "forms", "radio_buttons", "textareas", "clickable_elements", "text_elements"]
+SEARCH_FIELDS = ["id", "name", "label", "text", "placeholder", "value", "onclick", "type", "tag"]
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "to", "of", "in", "on", "is", "be", "with", "for", "by",
+    "that", "this", "it", "as", "at", "should", "user", "click", "enter", "verify", "page"
+}
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with camelCase split (``discountCode`` -> discount, code)"""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text or "")
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def test_case_text(test_case: Dict[str, Any]) -> str:
+    """Text of a test case that refers to page elements"""
+    parts = [
+        test_case.get("feature") or "",
+        test_case.get("test_scenario") or "",
+        test_case.get("preconditions") or "",
+        " ".join(test_case.get("test_steps") or []),
+        test_case.get("expected_result") or ""
+    ]
+    return " ".join(parts)
+
+
+class ElementIndex:
+    """Lexical + embedding relevance index over a list of element records"""
+
+    def __init__(
+        self,
+        records: List[Dict[str, Any]],
+        search_texts: List[str],
+        embed_documents: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        embed_query: Optional[Callable[[str], List[float]]] = None
+    ):
+        self.records = records
+        self.search_texts = search_texts
+        self.tokens = [set(tokenize(text)) for text in search_texts]
+        self.embed_query = embed_query
+        self.vectors = None
+
+        if embed_documents and records:
+            try:
+                self.vectors = np.asarray(embed_documents(search_texts), dtype=np.float32)
+            except Exception as e:
+                logger.warning(f"Element embeddings unavailable, using lexical matching only: {str(e)}")
+
+    def select(self, query: str, top_k: int = ELEMENT_TOP_K) -> Optional[List[int]]:
+        """
+        Indexes of records relevant to the query
+
+        Returns:
+            Selected record positions, or None when relevance is too weak to
+            trust and the caller should fall back to the full element set
+        """
+        if not self.records:
+            return None
+
+        query_tokens = set(tokenize(query))
+        query_lower = query.lower()
+
+        lexical = np.array([
+            len(query_tokens & tokens) / math.sqrt(len(tokens)) if tokens else 0.0
+            for tokens in self.tokens
+        ], dtype=np.float32)
+        if lexical.max() > 0:
+            lexical /= lexical.max()
+
+        scores = lexical
+        if self.vectors is not None and self.embed_query:
+            try:
+                query_vector = np.asarray(self.embed_query(query), dtype=np.float32)
+                semantic = self.vectors @ query_vector
+                scores = ELEMENT_LEXICAL_WEIGHT * lexical + (1 - ELEMENT_LEXICAL_WEIGHT) * semantic
+            except Exception as e:
+                logger.warning(f"Query embedding failed, using lexical matching only: {str(e)}")
+
+        # Guaranteed coverage: anything the test case names literally
+        mentioned = {
+            i for i, record in enumerate(self.records)
+            if any(
+                len(value) > 2 and value.lower() in query_lower
+                for value in (str(record.get(key) or "").strip(" *:") for key in ("id", "name", "label", "text"))
+            )
+        }
+
+        ranked = [int(i) for i in np.argsort(-scores) if scores[i] >= ELEMENT_MIN_SCORE]
+        if not mentioned and not ranked:
+            return None
+
+        selected = list(dict.fromkeys(sorted(mentioned) + ranked))
+        return sorted(selected[:max(top_k, len(mentioned))])
+
+
+class ElementIndexService:
+    """Per-HTML element indexes and pruned element subsets for prompts"""
+
+    def __init__(
+        self,
+        embed_documents: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        embed_query: Optional[Callable[[str], List[float]]] = None
+    ):
+        self.embed_documents = embed_documents
+        self.embed_query = embed_query
+        self.stats = {
+            "prompts": 0,
+            "fallbacks": 0,
+            "elements_before": 0,
+            "elements_after": 0,
+            "chars_before": 0,
+            "chars_after": 0
+        }
+
+    def build_element_index(self, element_info: Dict[str, Any]) -> ElementIndex:
+        """Index every element of the page (category kept on each record)"""
+        records, texts = [], []
+        for category in ELEMENT_CATEGORIES:
+            for element in element_info.get(category, []):
+                records.append({**element, "_category": category})
+                texts.append(" ".join([category] + [str(element.get(key) or "") for key in SEARCH_FIELDS]))
+        return ElementIndex(records, texts, self.embed_documents, self.embed_query)
+
+    def build_api_index(self, api: List[Dict[str, str]]) -> ElementIndex:
+        """Index page object methods by signature and summary"""
+        texts = [
+            " ".join([entry["signature"], entry["summary"], entry.get("id", ""), entry.get("name", ""), entry.get("text", "")])
+            for entry in api
+        ]
+        return ElementIndex(api, texts, self.embed_documents, self.embed_query)
+
+    def prune_elements(
+        self,
+        index: ElementIndex,
+        element_info: Dict[str, Any],
+        test_case: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Element info restricted to elements relevant to the test case"""
+        full = {category: element_info.get(category, []) for category in ELEMENT_CATEGORIES}
+        selected = index.select(test_case_text(test_case))
+
+        if selected is None:
+            pruned = full
+        else:
+            records = [index.records[i] for i in selected]
+            # Radio buttons are only usable as a complete group
+            groups = {r.get("name") for r in records if r["_category"] == "radio_buttons"}
+            records += [
+                r for r in index.records
+                if r["_category"] == "radio_buttons" and r.get("name") in groups and r not in records
+            ]
+            pruned = {category: [] for category in ELEMENT_CATEGORIES}
+            for record in records:
+                element = {k: v for k, v in record.items() if k != "_category"}
+                pruned[record["_category"]].append(element)
+
+        self._record(full, pruned, selected is None)
+        return pruned
+
+    def prune_api(
+        self,
+        index: ElementIndex,
+        api: List[Dict[str, str]],
+        test_case: Dict[str, Any]
+    ) -> List[Dict[str, str]]:
+        """Page object methods relevant to the test case"""
+        selected = index.select(test_case_text(test_case))
+        pruned = api if selected is None else [api[i] for i in selected]
+        self._record(api, pruned, selected is None)
+        return pruned
+
+    def _record(self, before: Any, after: Any, fallback: bool):
+        count = lambda value: sum(len(v) for v in value.values()) if isinstance(value, dict) else len(value)
+        self.stats["prompts"] += 1
+        self.stats["fallbacks"] += int(fallback)
+        self.stats["elements_before"] += count(before)
+        self.stats["elements_after"] += count(after)
+        self.stats["chars_before"] += len(json.dumps(before, separators=(",", ":")))
+        self.stats["chars_after"] += len(json.dumps(after, separators=(",", ":")))
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        if stats["chars_before"]:
+            stats["size_reduction"] = round(1 - stats["chars_after"] / stats["chars_before"], 4)
+        return stats
@@ -0,0 +1,111 @@
+"""
+Client for the shared embedding worker (``backend.embedding_worker``).
+
+API processes started with ``EMBEDDING_WORKER_SOCKET`` (or
+``EMBEDDING_WORKER_URL``) do not load the sentence-transformer themselves;
+they send texts to the worker and receive float32 vectors, so N API workers
+share one model copy. A worker whose queue is full answers 503; the client
+then backs off (honouring Retry-After) and retries.
+"""
+from typing import List, Optional
+import base64
+import httpx
+import logging
+import numpy as np
+import os
+import random
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_WORKER_TIMEOUT = float(os.getenv("EMBEDDING_WORKER_TIMEOUT", "60"))
+EMBEDDING_WORKER_RETRIES = int(os.getenv("EMBEDDING_WORKER_RETRIES", "8"))
+EMBEDDING_WORKER_RETRY_MAX_DELAY = float(os.getenv("EMBEDDING_WORKER_RETRY_MAX_DELAY", "5"))
+# Document texts per request; larger inputs are sent as several requests
+EMBEDDING_WORKER_REQUEST_SIZE = int(os.getenv("EMBEDDING_WORKER_REQUEST_SIZE", "256"))
+
+logger = logging.getLogger(__name__)
+
+
+def decode_vectors(data: dict) -> np.ndarray:
+    """float32 matrix from a worker response"""
+    vectors = np.frombuffer(base64.b64decode(data["vectors"]), dtype=np.float32)
+    return vectors.reshape(data["count"], data["dimension"])
+
+
+def encode_vectors(vectors: np.ndarray) -> dict:
+    """Worker response body for a float32 matrix (base64, not a JSON float list)"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    return {
+        "count": int(vectors.shape[0]),
+        "dimension": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+        "vectors": base64.b64encode(vectors.tobytes()).decode("ascii")
+    }
+
+
+class RemoteEmbeddings:
+    """Embeddings of one model, computed by the embedding worker"""
+
+    def __init__(
+        self,
+        socket_path: Optional[str],
+        model_name: str,
+        url: Optional[str] = None,
+        timeout: float = EMBEDDING_WORKER_TIMEOUT
+    ):
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.client = httpx.Client(
+            transport=httpx.HTTPTransport(uds=socket_path, retries=3),
+            base_url=url if not socket_path else "http://embedding-worker",
+            timeout=timeout
+        )
+
+    def _embed(self, texts: List[str], query: bool) -> np.ndarray:
+        attempt = 0
+        while True:
+            response = self.client.post(
+                "/embed",
+                json={"model": self.model_name, "texts": texts, "query": query}
+            )
+            if response.status_code != 503 or attempt >= EMBEDDING_WORKER_RETRIES:
+                response.raise_for_status()
+                return decode_vectors(response.json())
+
+            delay = self._retry_delay(response, attempt)
+            logger.warning(f"Embedding worker busy, retry {attempt + 1}/{EMBEDDING_WORKER_RETRIES} in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        """Retry-After when present, otherwise full-jitter exponential backoff"""
+        ceiling = min(EMBEDDING_WORKER_RETRY_MAX_DELAY, 0.05 * 2 ** attempt)
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                # Jittered so rejected clients do not return in lockstep
+                return random.uniform(0.5, 1.0) * min(float(retry_after), EMBEDDING_WORKER_RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+        return random.uniform(0, ceiling)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], query=True)[0].tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        if len(texts) <= EMBEDDING_WORKER_REQUEST_SIZE:
+            return self._embed(texts, query=False)
+        return np.concatenate([
+            self._embed(texts[i:i + EMBEDDING_WORKER_REQUEST_SIZE], query=False)
+            for i in range(0, len(texts), EMBEDDING_WORKER_REQUEST_SIZE)
+        ])
+
+    def dimension(self) -> int:
+        """Output dimension; loads the model in the worker if needed"""
+        response = self.client.get(f"/models/{self.model_name}")
+        response.raise_for_status()
+        return int(response.json()["dimension"])
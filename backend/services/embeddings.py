@@ -1,26 +1,57 @@
 from langchain_huggingface import HuggingFaceEmbeddings
-from typing import List
+from backend.services.embedding_client import RemoteEmbeddings
+from backend.services.knowledge_base import knowledge_base_registry
+from backend.utils.cache import LRUCache
+from backend.utils.helpers import compute_content_hash
+from backend.utils.tracing import tracer
+from typing import List, Optional
 import logging
+import numpy as np
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
-EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "384"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# Shared embedding worker (Unix socket or local URL); unset loads the model in-process
+EMBEDDING_WORKER_SOCKET = os.getenv("EMBEDDING_WORKER_SOCKET") or None
+EMBEDDING_WORKER_URL = os.getenv("EMBEDDING_WORKER_URL") or None
 
 logger = logging.getLogger(__name__)
 
 
 class EmbeddingService:
     
-    def __init__(self):
-        self.model_name = EMBEDDING_MODEL
+    def __init__(self, model_name: Optional[str] = None, local: bool = False):
+        # The model recorded for the active collection wins over EMBEDDING_MODEL,
+        # so queries are always embedded in the space the collection was built in
+        recorded = knowledge_base_registry.active_model()
+        self.model_name = model_name or recorded or EMBEDDING_MODEL
+        if model_name is None and recorded and recorded != EMBEDDING_MODEL:
+            logger.warning(
+                f"EMBEDDING_MODEL is {EMBEDDING_MODEL} but the active collection was built with {recorded}; "
+                f"serving with {recorded} (re-index to switch models)"
+            )
+        self.worker_socket = None if local else EMBEDDING_WORKER_SOCKET
+        self.worker_url = None if local else EMBEDDING_WORKER_URL
         self.embeddings = None
+        self.dimension = None
+        # Query embeddings keyed by knowledge base version, model and text hash
+        self.query_cache = LRUCache(max_size=EMBEDDING_CACHE_SIZE)
+        self._swap_lock = threading.Lock()
         self._initialize_model()
     
     def _initialize_model(self):
         try:
+            if self.worker_socket or self.worker_url:
+                logger.info(f"Using embedding worker at {self.worker_socket or self.worker_url} for {self.model_name}")
+                self.embeddings = RemoteEmbeddings(self.worker_socket, self.model_name, url=self.worker_url)
+                self.dimension = self.embeddings.dimension()
+                return
+            
             logger.info(f"Loading embedding model: {self.model_name}")
             
             self.embeddings = HuggingFaceEmbeddings(
@@ -28,15 +59,38 @@ class EmbeddingService:
                 model_kwargs={'device': 'cpu'},
                 encode_kwargs={'normalize_embeddings': True}
             )
+            self.dimension = self._detect_dimension()
             
-            logger.info("Embedding model loaded successfully")
+            logger.info(f"Embedding model loaded successfully ({self.dimension} dimensions)")
         except Exception as e:
             logger.error(f"Error loading embedding model: {str(e)}")
             raise
     
+    def _detect_dimension(self) -> int:
+        model = getattr(self.embeddings, "_client", None) or getattr(self.embeddings, "client", None)
+        if model is not None and hasattr(model, "get_sentence_embedding_dimension"):
+            return int(model.get_sentence_embedding_dimension())
+        return len(self.embeddings.embed_query("dimension probe"))
+    
+    def swap(self, other: "EmbeddingService"):
+        """Serve with another loaded model from now on"""
+        with self._swap_lock:
+            self.model_name, self.embeddings, self.dimension = other.model_name, other.embeddings, other.dimension
+        logger.info(f"Switched embedding model to {self.model_name}")
+    
     def embed_text(self, text: str) -> List[float]:
         try:
-            return self.embeddings.embed_query(text)
+            # Read model and name together so a concurrent swap cannot mix them
+            with self._swap_lock:
+                model_name, embeddings = self.model_name, self.embeddings
+            key = knowledge_base_registry.cache_key(model_name, compute_content_hash(text))
+            with tracer.span("embed_query", **{"embedding.model": model_name}) as span:
+                embedding = self.query_cache.get(key)
+                span.set_attribute("cache.hit", embedding is not None)
+                if embedding is None:
+                    embedding = embeddings.embed_query(text)
+                    self.query_cache.set(key, embedding)
+            return embedding
         except Exception as e:
             logger.error(f"Error generating embedding: {str(e)}")
             raise
@@ -48,8 +102,29 @@ class EmbeddingService:
             logger.error(f"Error generating embeddings: {str(e)}")
             raise
     
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """Document embeddings as one contiguous float32 matrix (no per-vector lists)"""
+        try:
+            if isinstance(self.embeddings, RemoteEmbeddings):
+                return self.embeddings.embed_array(texts)
+            model = getattr(self.embeddings, "_client", None) or getattr(self.embeddings, "client", None)
+            if model is None:
+                return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+            vectors = model.encode(
+                texts,
+                batch_size=EMBEDDING_BATCH_SIZE,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+            return np.ascontiguousarray(vectors, dtype=np.float32)
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {str(e)}")
+            raise
+    
     def get_embedding_dimension(self) -> int:
-        return EMBEDDING_DIMENSION
+        """Output dimension of the loaded model"""
+        return self.dimension
 
 
 # Global embedding service instance
@@ -0,0 +1,165 @@
+"""
+HTML element extraction for Selenium script generation.
+
+Kept free of service imports so the element index can be built anywhere
+(page objects, prompt benchmarks, script validation) without connecting to
+Qdrant or the LLM.
+"""
+from bs4 import BeautifulSoup
+from typing import Dict, Any
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+# Tags already captured with their own categories
+TEXT_ELEMENT_SKIP_TAGS = {"button", "input", "select", "textarea", "form", "script", "style"}
+
+
+def analyze_html(html_content: str) -> Dict[str, Any]:
+    """
+    Analyze HTML to extract useful element information with detailed selectors
+
+    Args:
+        html_content: HTML source code
+
+    Returns:
+        Dictionary with comprehensive element information
+    """
+    try:
+        soup = BeautifulSoup(html_content, 'html.parser')
+
+        # Visible label text per field id, used to match test steps to fields
+        labels = {
+            label['for']: label.get_text(" ", strip=True)
+            for label in soup.find_all('label', attrs={'for': True})
+        }
+
+        def label_of(elem) -> str:
+            if elem.get('id') in labels:
+                return labels[elem['id']]
+            parent = elem.find_parent('label')
+            return parent.get_text(" ", strip=True) if parent else ''
+
+        elements_info = {
+            "buttons": [],
+            "inputs": [],
+            "selects": [],
+            "forms": [],
+            "radio_buttons": [],
+            "textareas": [],
+            "all_ids": [],
+            "clickable_elements": [],
+            "text_elements": []
+        }
+
+        # Extract ALL buttons with detailed info
+        for btn in soup.find_all('button'):
+            info = {
+                "tag": "button",
+                "id": btn.get('id', ''),
+                "name": btn.get('name', ''),
+                "class": ' '.join(btn.get('class', [])),
+                "onclick": btn.get('onclick', ''),
+                "text": btn.get_text(strip=True),
+                "type": btn.get('type', 'button'),
+                "selector_by_id": f"By.ID, '{btn.get('id')}'" if btn.get('id') else None,
+                "selector_by_text": f"By.XPATH, \"//button[text()='{btn.get_text(strip=True)}']\"" if btn.get_text(strip=True) else None
+            }
+            elements_info["buttons"].append(info)
+            if btn.get('id'):
+                elements_info["all_ids"].append(btn.get('id'))
+
+        # Extract ALL input fields with detailed info
+        for inp in soup.find_all('input'):
+            info = {
+                "tag": "input",
+                "type": inp.get('type', 'text'),
+                "id": inp.get('id', ''),
+                "name": inp.get('name', ''),
+                "placeholder": inp.get('placeholder', ''),
+                "label": label_of(inp),
+                "class": ' '.join(inp.get('class', [])),
+                "value": inp.get('value', ''),
+                "selector_by_id": f"By.ID, '{inp.get('id')}'" if inp.get('id') else None,
+                "selector_by_name": f"By.NAME, '{inp.get('name')}'" if inp.get('name') else None
+            }
+
+            # Separate radio buttons
+            if inp.get('type') == 'radio':
+                elements_info["radio_buttons"].append(info)
+            else:
+                elements_info["inputs"].append(info)
+
+            if inp.get('id'):
+                elements_info["all_ids"].append(inp.get('id'))
+
+        # Extract textareas
+        for textarea in soup.find_all('textarea'):
+            info = {
+                "tag": "textarea",
+                "id": textarea.get('id', ''),
+                "name": textarea.get('name', ''),
+                "class": ' '.join(textarea.get('class', [])),
+                "placeholder": textarea.get('placeholder', ''),
+                "label": label_of(textarea),
+                "selector_by_id": f"By.ID, '{textarea.get('id')}'" if textarea.get('id') else None,
+                "selector_by_name": f"By.NAME, '{textarea.get('name')}'" if textarea.get('name') else None
+            }
+            elements_info["textareas"].append(info)
+            if textarea.get('id'):
+                elements_info["all_ids"].append(textarea.get('id'))
+
+        # Extract selects
+        for select in soup.find_all('select'):
+            info = {
+                "tag": "select",
+                "id": select.get('id', ''),
+                "name": select.get('name', ''),
+                "label": label_of(select),
+                "options": [opt.get('value', opt.get_text(strip=True)) for opt in select.find_all('option')],
+                "selector_by_id": f"By.ID, '{select.get('id')}'" if select.get('id') else None,
+                "selector_by_name": f"By.NAME, '{select.get('name')}'" if select.get('name') else None
+            }
+            elements_info["selects"].append(info)
+            if select.get('id'):
+                elements_info["all_ids"].append(select.get('id'))
+
+        # Extract forms
+        for form in soup.find_all('form'):
+            info = {
+                "tag": "form",
+                "id": form.get('id', ''),
+                "name": form.get('name', ''),
+                "action": form.get('action', ''),
+                "method": form.get('method', ''),
+                "selector_by_id": f"By.ID, '{form.get('id')}'" if form.get('id') else None
+            }
+            elements_info["forms"].append(info)
+
+        # Extract clickable elements (with onclick)
+        for elem in soup.find_all(onclick=True):
+            elements_info["clickable_elements"].append({
+                "tag": elem.name,
+                "id": elem.get('id', ''),
+                "text": elem.get_text(strip=True),
+                "onclick": elem.get('onclick')
+            })
+
+        # Extract id-bearing output elements (totals, messages) used in assertions
+        for elem in soup.find_all(id=True):
+            if elem.name in TEXT_ELEMENT_SKIP_TAGS:
+                continue
+            elements_info["text_elements"].append({
+                "tag": elem.name,
+                "id": elem.get('id'),
+                "class": ' '.join(elem.get('class', [])),
+                "text": elem.get_text(" ", strip=True)[:80],
+                "selector_by_id": f"By.ID, '{elem.get('id')}'"
+            })
+
+        return elements_info
+
+    except Exception as e:
+        logger.error(f"Error analyzing HTML: {str(e)}")
+        return {}
@@ -0,0 +1,271 @@
+"""
+Knowledge base version and document manifest.
+
+Every ingest that changes the collection and every reset bumps a
+monotonically increasing version. Downstream caches (query embeddings,
+retrieval results, LLM responses, element indexes) include the version in
+their keys, so a change to the knowledge base can never serve a result
+computed against an older snapshot.
+
+The registry also records which embedding model built each Qdrant
+collection and which collection is active, so a model change is a switch
+between embedding spaces rather than an edit to a live one.
+
+The manifest file is the source of truth for every API process: readers
+reload it when its modification time changes, and writers hold an exclusive
+file lock while they read, modify and replace it.
+"""
+from backend.utils.helpers import compute_content_hash
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import json
+import logging
+import os
+import threading
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process locking only
+    fcntl = None
+
+load_dotenv()
+
+KB_MANIFEST_PATH = os.getenv("KB_MANIFEST_PATH", "state/knowledge_base.json")
+
+logger = logging.getLogger(__name__)
+
+
+def document_key(source: str, project: Optional[str] = None) -> str:
+    """
+    Manifest key of a source within a project
+
+    The same file name can be uploaded for several projects, each with its
+    own chunks; documents without a project keep their plain source name.
+    """
+    return json.dumps([project, source]) if project else source
+
+
+class KnowledgeBaseRegistry:
+    """Monotonic knowledge base version plus a content-hash manifest per source"""
+
+    def __init__(self, path: Optional[str] = KB_MANIFEST_PATH):
+        self.path = path
+        self._state: Dict[str, Any] = {
+            "version": 0,
+            "updated_at": None,
+            "documents": {},
+            # Collection name -> embedding model and dimension it was built with
+            "collections": {},
+            "active_collection": None
+        }
+        self._mtime: Optional[int] = None
+        self._lock = threading.RLock()
+        self._load()
+        if self._mtime is not None:
+            logger.info(f"Loaded knowledge base manifest v{self.version} ({len(self.documents)} documents)")
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self._state = {
+                "version": int(state.get("version", 0)),
+                "updated_at": state.get("updated_at"),
+                "documents": state.get("documents", {}),
+                "collections": state.get("collections", {}),
+                "active_collection": state.get("active_collection")
+            }
+            self._mtime = mtime
+        except Exception as e:
+            logger.warning(f"Could not read knowledge base manifest, starting fresh: {str(e)}")
+
+    def _refresh(self):
+        """Reload the manifest if another process has replaced it"""
+        if not self.path:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            with self._lock:
+                self._load()
+
+    @contextmanager
+    def _write(self):
+        """Exclusive access across threads and processes, starting from the latest manifest"""
+        with self._lock:
+            lock_file = None
+            if self.path and fcntl is not None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                lock_file = open(f"{self.path}.lock", "a")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                yield
+            finally:
+                if lock_file is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    lock_file.close()
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write-then-rename so a crash never leaves a truncated manifest
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    @property
+    def version(self) -> int:
+        self._refresh()
+        return self._state["version"]
+
+    @property
+    def updated_at(self) -> Optional[str]:
+        self._refresh()
+        return self._state["updated_at"]
+
+    @property
+    def documents(self) -> Dict[str, Dict[str, Any]]:
+        self._refresh()
+        return self._state["documents"]
+
+    @property
+    def collections(self) -> Dict[str, Dict[str, Any]]:
+        self._refresh()
+        return self._state["collections"]
+
+    @property
+    def active_collection(self) -> Optional[str]:
+        self._refresh()
+        return self._state["active_collection"]
+
+    def _bump(self):
+        self._state["version"] += 1
+        self._state["updated_at"] = datetime.now(timezone.utc).isoformat()
+        self._save()
+
+    def diff(self, sources: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """
+        Compare incoming sources against the manifest
+
+        Args:
+            sources: Content hash per ``document_key``
+
+        Returns:
+            (sources that are new or changed, sources already stored with identical content)
+        """
+        with self._lock:
+            changed = [s for s, h in sources.items() if self.documents.get(s, {}).get("content_hash") != h]
+            unchanged = [s for s in sources if s not in changed]
+        return changed, unchanged
+
+    def record_ingest(self, documents: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Register ingested sources and bump the version
+
+        Args:
+            documents: Per ``document_key``: source, project, content_hash, file_type and chunks
+
+        Returns:
+            The new version
+        """
+        with self._write():
+            ingested_at = datetime.now(timezone.utc).isoformat()
+            for key, entry in documents.items():
+                self.documents[key] = {**entry, "ingested_at": ingested_at}
+            self._bump()
+            logger.info(
+                f"Knowledge base v{self.version}: ingested "
+                f"{', '.join(entry['source'] for entry in documents.values())}"
+            )
+            return self.version
+
+    def reset(self) -> int:
+        """Forget every document and bump the version"""
+        with self._write():
+            self._state["documents"] = {}
+            self._bump()
+            logger.info(f"Knowledge base v{self.version}: reset")
+            return self.version
+
+    def record_collection(self, name: str, model: str, dimension: int):
+        """Remember the embedding model and dimension a collection was built with"""
+        with self._write():
+            self.collections[name] = {
+                "model": model,
+                "dimension": dimension,
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }
+            if self.active_collection is None:
+                # The first collection ever created is the active one
+                self._state["active_collection"] = name
+            self._save()
+
+    def forget_collection(self, name: str):
+        with self._write():
+            if self.collections.pop(name, None) is not None:
+                self._save()
+
+    def activate_collection(self, name: str) -> int:
+        """
+        Serve retrieval from another collection and bump the version
+
+        Returns:
+            The new version
+        """
+        with self._write():
+            self._state["active_collection"] = name
+            self._bump()
+            logger.info(f"Knowledge base v{self.version}: serving from collection '{name}'")
+            return self.version
+
+    def active_model(self) -> Optional[str]:
+        """Embedding model of the active collection, if recorded"""
+        with self._lock:
+            return self.collections.get(self.active_collection or "", {}).get("model")
+
+    def fingerprint(self) -> Optional[str]:
+        """Hash over the manifest content hashes; equal fingerprints mean equal content"""
+        with self._lock:
+            if not self.documents:
+                return None
+            return compute_content_hash("\n".join(
+                f"{source}:{entry['content_hash']}" for source, entry in sorted(self.documents.items())
+            ))
+
+    def cache_key(self, *parts: Hashable) -> Tuple[Hashable, ...]:
+        """Cache key scoped to the current knowledge base version"""
+        return (self.version,) + parts
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Version, fingerprint and manifest, as reported by the status endpoint"""
+        fingerprint = self.fingerprint()
+        with self._lock:
+            return {
+                "version": self.version,
+                "fingerprint": fingerprint,
+                "updated_at": self.updated_at,
+                "collection": self.active_collection,
+                "embedding_model": self.collections.get(self.active_collection or "", {}).get("model"),
+                "documents": [
+                    {"source": key, **entry} for key, entry in sorted(self.documents.items())
+                ]
+            }
+
+
+# Global knowledge base registry instance
+knowledge_base_registry = KnowledgeBaseRegistry()
@@ -0,0 +1,298 @@
+"""
+Chat completion providers behind LLMService.
+
+``OpenAICompatibleProvider`` talks to OpenAI or any server exposing the same
+API (llama.cpp, vLLM, Ollama) through one pooled HTTP client, with timeouts,
+jittered retries on 429/5xx and a client-side tokens-per-minute limiter.
+``FakeProvider`` answers offline with deterministic canned output for tests
+and local development.
+"""
+from abc import ABC, abstractmethod
+from openai import OpenAI, APIConnectionError, APIStatusError, APITimeoutError
+from typing import Optional, Dict, Any, List
+import httpx
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
+LLM_API_KEY = os.getenv("LLM_API_KEY") or os.getenv("OPENAI_API_KEY")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "30"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", "0"))
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough prompt size (4 characters per token) used before the real usage is known"""
+    return sum(len(m.get("content") or "") for m in messages) // 4 + 4 * len(messages)
+
+
+class TokenRateLimiter:
+    """Token bucket enforcing a tokens-per-minute budget; callers wait instead of failing"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.tokens = float(tokens_per_minute)
+        self.refill_rate = tokens_per_minute / 60.0
+        self.updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def acquire(self, tokens: int):
+        # A single request larger than the whole budget may still run once the bucket is full
+        tokens = min(float(tokens), self.capacity)
+        with self._cond:
+            while True:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                self._cond.wait((tokens - self.tokens) / self.refill_rate)
+
+    def adjust(self, reserved: int, used: int):
+        """Give back (or charge) the difference between the estimate and real usage"""
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + reserved - used)
+            self._cond.notify_all()
+
+
+class LLMProvider(ABC):
+    """Base class: one chat completion call returning content and usage"""
+
+    name = "base"
+
+    @abstractmethod
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        One chat completion
+
+        Returns:
+            Dictionary with ``content``, the ``model`` that answered and ``usage`` (prompt, completion and total tokens)
+        """
+
+    def health_check(self) -> bool:
+        return True
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Any OpenAI-compatible endpoint with pooling, retries and rate limiting"""
+
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = LLM_API_KEY,
+        base_url: Optional[str] = LLM_BASE_URL,
+        timeout: float = LLM_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        tokens_per_minute: int = LLM_TPM_LIMIT
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=httpx.Timeout(timeout, connect=LLM_CONNECT_TIMEOUT)
+        )
+        self.client = OpenAI(
+            # Local servers accept any key
+            api_key=api_key or ("not-needed" if base_url else None),
+            base_url=base_url,
+            http_client=self.http_client,
+            max_retries=0
+        )
+        self.concurrency = threading.BoundedSemaphore(max_concurrency)
+        self.rate_limiter = TokenRateLimiter(tokens_per_minute) if tokens_per_minute > 0 else None
+
+        logger.info(f"LLM provider initialized: {base_url or 'https://api.openai.com/v1'}")
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        reserved = estimate_tokens(messages) + max_tokens
+        if self.rate_limiter:
+            self.rate_limiter.acquire(reserved)
+
+        kwargs = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if response_format:
+            kwargs["response_format"] = response_format
+
+        used = reserved
+        try:
+            with self.concurrency:
+                response = self._create_with_retries(kwargs)
+            usage = response.usage
+            used = usage.total_tokens if usage else reserved
+            return {
+                "content": response.choices[0].message.content,
+                "model": response.model or model,
+                "usage": {
+                    "prompt_tokens": usage.prompt_tokens if usage else 0,
+                    "completion_tokens": usage.completion_tokens if usage else 0,
+                    "total_tokens": used
+                }
+            }
+        finally:
+            if self.rate_limiter:
+                self.rate_limiter.adjust(reserved, used)
+
+    def _create_with_retries(self, kwargs: Dict[str, Any]):
+        attempt = 0
+        while True:
+            try:
+                return self.client.chat.completions.create(**kwargs)
+            except (APIStatusError, APITimeoutError, APIConnectionError) as e:
+                status = getattr(e, "status_code", None)
+                retryable = status is None or status in RETRYABLE_STATUS
+                if not retryable or attempt >= self.max_retries:
+                    raise
+
+                delay = self._retry_delay(e, attempt)
+                logger.warning(
+                    f"LLM request failed ({status or type(e).__name__}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+                )
+                time.sleep(delay)
+                attempt += 1
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Server-provided Retry-After when present, otherwise full-jitter exponential backoff"""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), LLM_RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+        return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+    def health_check(self) -> bool:
+        return bool(self.api_key or self.base_url)
+
+
+class FakeProvider(LLMProvider):
+    """Offline stand-in returning deterministic, well-formed output"""
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: List[Dict[str, Any]] = []
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        self.calls.append({"messages": messages, "model": model, "max_tokens": max_tokens})
+        if self.latency:
+            time.sleep(self.latency)
+
+        prompt = messages[-1]["content"]
+        if "PAGE OBJECT API" in prompt or "HTML ELEMENTS" in prompt:
+            content = self._script(prompt)
+        elif "JSON" in prompt or response_format:
+            content = self._test_cases(prompt)
+        else:
+            content = "Sorry, I can only assist with test case and Selenium script generation."
+
+        prompt_tokens = estimate_tokens(messages)
+        completion_tokens = len(content) // 4
+        return {
+            "content": content,
+            "model": model,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def _test_cases(self, prompt: str) -> str:
+        count = re.search(r"Generate (\d+) test cases", prompt)
+        sources = re.findall(r"\b[\w-]+\.(?:md|txt|json|pdf|html)\b", prompt)
+        cases = [
+            {
+                "test_id": f"TC-{i:03d}",
+                "feature": "Discount Code",
+                "test_scenario": f"Fake scenario {i}",
+                "test_type": "positive" if i % 2 else "negative",
+                "preconditions": "Cart contains one item",
+                "test_steps": ["Add an item to the cart", "Enter a discount code", "Click Apply"],
+                "expected_result": "The discount is applied to the total",
+                "grounded_in": sources[0] if sources else "product_specs.md",
+                "priority": "Medium"
+            }
+            for i in range(1, int(count.group(1)) + 1 if count else 4)
+        ]
+        return json.dumps(cases)
+
+    def _script(self, prompt: str) -> str:
+        test_id = re.search(r"TC-\d+", prompt)
+        return (
+            "from selenium import webdriver\n"
+            "from selenium.webdriver.common.by import By\n"
+            "import os\n\n"
+            "driver = webdriver.Chrome()\n"
+            "try:\n"
+            "    driver.get(\"file://\" + os.path.abspath(\"checkout.html\"))\n"
+            f"    assert driver.title is not None, \"{test_id.group(0) if test_id else 'TC'} page loaded\"\n"
+            "finally:\n"
+            "    driver.quit()\n"
+        )
+
+
+def create_provider(name: str = LLM_PROVIDER) -> LLMProvider:
+    """Provider selected by ``LLM_PROVIDER`` (openai | fake)"""
+    if name == "fake":
+        return FakeProvider()
+    if name == "openai":
+        return OpenAICompatibleProvider()
+    raise ValueError(f"Unsupported LLM provider: {name}")
@@ -1,7 +1,19 @@
-from openai import OpenAI
-from typing import Optional, Dict, Any, List
-import logging
+from backend.services.llm_providers import create_provider, estimate_tokens, LLMProvider
+from backend.services.knowledge_base import knowledge_base_registry
+from backend.services.model_router import model_router
+from backend.services.usage import usage_tracker
+from backend.services.selenium_prompts import (
+    build_selenium_prompt,
+    build_page_object_prompt,
+    build_repair_prompt,
+)
+from backend.utils.cache import LRUCache
+from backend.utils.helpers import compute_content_hash
+from backend.utils.tracing import tracer
+from typing import Optional, Dict, Any, Callable, List
 import json
+import logging
+import time
 from dotenv import load_dotenv
 import os
 
@@ -9,27 +21,114 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
 
 
 class LLMService:
-    """Improved Service for interacting with OpenAI GPT models"""
+    """Improved Service for interacting with OpenAI-compatible GPT models"""
 
-    def __init__(self):
+    def __init__(self, provider: Optional[LLMProvider] = None):
         self.model_name = OPENAI_MODEL  # gpt-4o-mini
-        self.api_key = OPENAI_API_KEY
-        self.client = None
+        self.provider = provider
+        self.usage = usage_tracker
+        self.router = model_router
+        # Responses keyed by knowledge base version and the full request
+        self.response_cache = LRUCache(max_size=LLM_CACHE_SIZE) if LLM_CACHE_SIZE > 0 else None
         self._initialize_client()
 
     def _initialize_client(self):
         try:
-            self.client = OpenAI(api_key=self.api_key)
-            logger.info(f"OpenAI client initialized with model: {self.model_name}")
+            if self.provider is None:
+                self.provider = create_provider()
+            logger.info(f"LLM provider '{self.provider.name}' initialized with model: {self.model_name}")
         except Exception as e:
-            logger.error(f"Error initializing OpenAI: {e}")
+            logger.error(f"Error initializing LLM provider: {e}")
             raise
 
+    def _chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        task: str = "general",
+        items: int = 0,
+        response_format: Optional[Dict[str, str]] = None,
+        accept: Optional[Callable[[str], bool]] = None,
+        escalate: bool = False
+    ) -> str:
+        """
+        Chat completion on the model and max_tokens routed for the task
+
+        An answer ``accept`` rejects is asked again of the larger model;
+        ``escalate`` goes to the larger model straight away.
+        """
+        route = self.router.route(task, estimate_tokens(messages), items)
+        if escalate:
+            route = self.router.escalate(route) or route
+        content = self._complete(messages, temperature, route, response_format)
+
+        if accept is not None and not accept(content):
+            escalated = self.router.escalate(route)
+            if escalated is not None:
+                logger.info(f"Unusable {task} answer from {route['model']}; asking {escalated['model']}")
+                content = self._complete(messages, temperature, escalated, response_format)
+        return content
+
+    def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        route: Dict[str, Any],
+        response_format: Optional[Dict[str, str]] = None
+    ) -> str:
+        """Single chat completion through the configured provider, accounted, traced and within budget"""
+        max_tokens = route["max_tokens"]
+        with tracer.span(
+            "llm.chat",
+            kind="client",
+            **{"llm.task": route["task"], "llm.tier": route["tier"], "llm.max_tokens": max_tokens}
+        ) as span:
+            key = None
+            if self.response_cache is not None:
+                key = knowledge_base_registry.cache_key(
+                    route["model"],
+                    compute_content_hash(json.dumps([messages, temperature, max_tokens, response_format], sort_keys=True))
+                )
+                cached = self.response_cache.get(key)
+                if cached is not None:
+                    span.set_attributes(**{"llm.model": route["model"], "cache.hit": True})
+                    self.usage.record(route["model"], None, cached=True)
+                    return cached
+
+            # Raises BudgetExceeded, or picks a cheaper model, once a budget is spent
+            model = self.usage.check_budget(route["model"])
+            started = time.perf_counter()
+            response = self.provider.chat(
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                response_format=response_format
+            )
+            seconds = time.perf_counter() - started
+            usage = response.get("usage") or {}
+            prompt_tokens, completion_tokens = usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+            cost = self.usage.cost(model, prompt_tokens, completion_tokens)
+            self.usage.record(model, usage, max_tokens=max_tokens)
+            self.router.observe({**route, "model": model}, seconds, cost, completion_tokens)
+            span.set_attributes(**{
+                "llm.model": model,
+                "cache.hit": False,
+                "llm.prompt_tokens": prompt_tokens,
+                "llm.completion_tokens": completion_tokens,
+                "llm.cost_usd": round(cost, 6)
+            })
+            content = response["content"]
+            # Answers of a fallback model are not cached as the routed model's
+            if key is not None and content and model == route["model"]:
+                self.response_cache.set(key, content)
+            return content
+
     # ========================== BASIC GENERATION ==========================
     def generate(self, prompt: str, temperature: float = 0.3, system_message: Optional[str] = None) -> str:
         """Simple LLM call"""
@@ -39,22 +138,23 @@ class LLMService:
                 messages.append({"role": "system", "content": system_message})
             messages.append({"role": "user", "content": prompt})
 
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=2048,
-            )
-
-            return response.choices[0].message.content
+            return self._chat(messages, temperature=temperature)
 
         except Exception as e:
             logger.error(f"Error generating LLM response: {e}")
             raise
 
     # ========================== RAG GENERATION ==========================
-    def generate_with_rag(self, query: str, context: List[str], system_message: Optional[str] = None) -> str:
-        """Enhanced RAG generation with few-shot examples"""
+    def generate_with_rag(
+        self,
+        query: str,
+        context: List[str],
+        system_message: Optional[str] = None,
+        task: str = "general",
+        items: int = 0,
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """Enhanced RAG generation with few-shot examples, routed as ``task`` asking for ``items``"""
 
         context_text = "\n\n---DOCUMENT---\n\n".join([
             f"[Document {i+1}]\n{ctx}" for i, ctx in enumerate(context)
@@ -107,18 +207,17 @@ Instructions:
 """
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
+            return self._chat(
+                [
                     {"role": "system", "content": system_message},
                     {"role": "user", "content": user_prompt},
                 ],
                 temperature=0.2,
-                max_tokens=2048,
+                task=task,
+                items=items,
+                accept=accept,
             )
 
-            return response.choices[0].message.content
-
         except Exception as e:
             logger.error(f"Error in RAG generation: {e}")
             raise
@@ -137,19 +236,15 @@ Instructions:
         )
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                response_format={"type": "json_object"},
-                messages=[
+            return self._chat(
+                [
                     {"role": "system", "content": enhanced_system},
                     {"role": "user", "content": prompt},
                 ],
                 temperature=temperature,
-                max_tokens=2048,
+                response_format={"type": "json_object"},
             )
 
-            return response.choices[0].message.content
-
         except Exception as e:
             logger.error(f"Error generating structured JSON: {e}")
             raise
@@ -160,89 +255,75 @@ Instructions:
         test_case: Dict[str, Any],
         html_elements: Dict[str, Any],
         context: List[str],
+        page_object_api: Optional[str] = None,
     ) -> str:
         """Generate bulletproof Selenium Python script"""
 
-        if not html_elements:
+        if page_object_api:
+            sys_msg, user_prompt = build_page_object_prompt(test_case, page_object_api, context)
+        elif not html_elements:
             return (
                 "# ERROR: html_elements is empty or missing.\n"
                 "# A Selenium script cannot be generated without selectors.\n"
             )
+        else:
+            sys_msg, user_prompt = build_selenium_prompt(test_case, html_elements, context)
 
-        elements_json = json.dumps(html_elements, indent=2)
-        steps = test_case.get("test_steps", [])
-        steps_text = "\n".join([f"- {s}" for s in steps])
-
-        sys_msg = """
-            You are a senior automation engineer (10+ years experience).
-            Generate a production-grade Python Selenium script.
-            
-            NON-NEGOTIABLE RULES:
-            1. Use ONLY element selectors provided in html_elements. NEVER invent selectors.
-            2. Forbidden selectors: generic XPaths (//button, //*). Do NOT use them.
-            3. Always use WebDriverWait (no time.sleep).
-            4. Use webdriver-manager for Chrome.
-            5. Every script MUST include at least one assertion validating the expected result.
-            6. If a required selector is missing, include:
-            # ERROR: Selector missing in html_elements
-            7. Load checkout page using:
-            driver.get("file://" + os.path.abspath("checkout.html"))
-            8. Output ONLY Python code (no markdown).
-        """
+        try:
+            return self._chat(
+                [
+                    {"role": "system", "content": sys_msg},
+                    {"role": "user", "content": user_prompt},
+                ],
+                temperature=0.1,
+                task="script",
+                items=len(test_case.get("test_steps") or []),
+            )
 
-        user_prompt = f"""
-            Generate Selenium script for the following test case:
-
-            === TEST CASE ===
-            Test ID: {test_case.get("test_id")}
-            Feature: {test_case.get("feature")}
-            Scenario: {test_case.get("test_scenario")}
-            Type: {test_case.get("test_type")}
-            Preconditions: {test_case.get("preconditions")}
-            Steps:
-            {steps_text}
-            Expected Result:
-            {test_case.get("expected_result")}
-
-            === HTML ELEMENTS ===
-            {elements_json}
-
-            === CONTEXT (Documentation) ===
-            {context[0] if context else "No context"}
-
-            Output:
-            - ONLY Python code
-            - No markdown
-            - No comments outside the Python script
-            """
+        except Exception as e:
+            logger.error(f"Error generating Selenium script: {e}")
+            raise
+
+    # ========================== SELENIUM REPAIR ==========================
+    def repair_selenium_script(
+        self,
+        test_case: Dict[str, Any],
+        script: str,
+        error: str,
+        html_elements: Dict[str, Any],
+        page_object_api: Optional[str] = None,
+        escalate: bool = False,
+    ) -> str:
+        """Regenerate a failing Selenium script from its error output, on the larger model if ``escalate``"""
+
+        sys_msg, user_prompt = build_repair_prompt(test_case, script, error, html_elements, page_object_api)
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
+            return self._chat(
+                [
                     {"role": "system", "content": sys_msg},
                     {"role": "user", "content": user_prompt},
                 ],
                 temperature=0.1,
-                max_tokens=3072,
+                task="repair",
+                items=len(test_case.get("test_steps") or []),
+                escalate=escalate,
             )
 
-            return response.choices[0].message.content
-
         except Exception as e:
-            logger.error(f"Error generating Selenium script: {e}")
+            logger.error(f"Error repairing Selenium script: {e}")
             raise
 
     # ========================== HEALTH CHECK ==========================
     def health_check(self) -> bool:
         try:
-            if self.client and self.api_key:
-                logger.info(f"✓ OpenAI client initialized with model: {self.model_name}")
+            if self.provider and self.provider.health_check():
+                logger.info(f"✓ LLM provider '{self.provider.name}' ready with model: {self.model_name}")
                 return True
             return False
 
         except Exception as e:
-            logger.error(f"OpenAI health check failed: {str(e)}")
+            logger.error(f"LLM health check failed: {str(e)}")
             return False
 
 
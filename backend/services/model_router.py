@@ -0,0 +1,169 @@
+"""
+Model and ``max_tokens`` routing for LLM calls.
+
+Each call is routed by task (test case generation, Selenium script,
+script repair) and by its estimated complexity: the prompt's size in
+tokens and the number of items asked for (test cases, or test steps of a
+script). Simple requests go to ``LLM_SMALL_MODEL``. Requests over
+``ROUTING_LARGE_PROMPT_TOKENS``, ``ROUTING_LARGE_CASES`` or
+``ROUTING_LARGE_STEPS`` go to ``LLM_LARGE_MODEL``. ``max_tokens`` grows
+with the items requested instead of being fixed per call site.
+
+When the answer of the small model cannot be used (test cases that do not
+parse, scripts that fail validation, a repair that did not fix the
+script), the call is retried on the ``escalated`` route: the large model.
+
+Latency, cost and ``max_tokens`` use are kept per route
+(``task/tier``) over the last ``ROUTING_STATS_WINDOW`` calls.
+
+With ``MODEL_ROUTING=false`` every call uses ``OPENAI_MODEL`` with the
+previous fixed ``max_tokens`` per task.
+"""
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+import os
+import statistics
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+MODEL_ROUTING = os.getenv("MODEL_ROUTING", "true").lower() == "true"
+LLM_SMALL_MODEL = os.getenv("LLM_SMALL_MODEL") or OPENAI_MODEL
+# Same as the small model by default: routing then only sizes max_tokens
+LLM_LARGE_MODEL = os.getenv("LLM_LARGE_MODEL") or OPENAI_MODEL
+ROUTING_LARGE_PROMPT_TOKENS = int(os.getenv("ROUTING_LARGE_PROMPT_TOKENS", "6000"))
+ROUTING_LARGE_CASES = int(os.getenv("ROUTING_LARGE_CASES", "20"))
+ROUTING_LARGE_STEPS = int(os.getenv("ROUTING_LARGE_STEPS", "15"))
+LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "16384"))
+ROUTING_STATS_WINDOW = int(os.getenv("ROUTING_STATS_WINDOW", "1000"))
+
+# Per task: max_tokens without routing, and with routing a base plus an
+# allowance per requested item (a test case is up to ~250 tokens of JSON, a
+# step ~130 tokens of script); the item threshold routing to the large model
+TASKS = {
+    "general": {"fixed_tokens": 2048, "base_tokens": 2048, "tokens_per_item": 0, "large_items": None},
+    "test_cases": {"fixed_tokens": 2048, "base_tokens": 512, "tokens_per_item": 250, "large_items": ROUTING_LARGE_CASES},
+    "script": {"fixed_tokens": 3072, "base_tokens": 2048, "tokens_per_item": 128, "large_items": ROUTING_LARGE_STEPS},
+    "repair": {"fixed_tokens": 3072, "base_tokens": 2048, "tokens_per_item": 128, "large_items": ROUTING_LARGE_STEPS}
+}
+
+
+class ModelRouter:
+    """Pick the model and max_tokens of an LLM call, and keep per-route latency and cost"""
+
+    def __init__(self):
+        self.enabled = MODEL_ROUTING
+        self.small_model = LLM_SMALL_MODEL if MODEL_ROUTING else OPENAI_MODEL
+        self.large_model = LLM_LARGE_MODEL if MODEL_ROUTING else OPENAI_MODEL
+        self.large_prompt_tokens = ROUTING_LARGE_PROMPT_TOKENS
+        self.max_output_tokens = LLM_MAX_OUTPUT_TOKENS
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def route(self, task: str, prompt_tokens: int = 0, items: int = 0) -> Dict[str, Any]:
+        """
+        Route of one call
+
+        Args:
+            task: general, test_cases, script or repair
+            prompt_tokens: Estimated size of the prompt
+            items: Test cases requested, or steps of the test case scripted
+
+        Returns:
+            Dictionary with ``task``, ``tier`` (small or large), ``model``, ``max_tokens`` and ``reason``
+        """
+        spec = TASKS[task]
+        if not self.enabled:
+            return {"task": task, "tier": "small", "model": self.small_model,
+                    "max_tokens": spec["fixed_tokens"], "reason": "routing disabled"}
+
+        reason = None
+        if prompt_tokens > self.large_prompt_tokens:
+            reason = f"prompt of ~{prompt_tokens} tokens"
+        elif spec["large_items"] is not None and items > spec["large_items"]:
+            reason = f"{items} items requested"
+
+        max_tokens = min(spec["base_tokens"] + spec["tokens_per_item"] * items, self.max_output_tokens)
+        return {
+            "task": task,
+            "tier": "large" if reason else "small",
+            "model": self.large_model if reason else self.small_model,
+            "max_tokens": max_tokens,
+            "reason": reason or "simple request"
+        }
+
+    def escalate(self, route: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Route retrying a call whose answer was unusable, or None when the large model was already used"""
+        if route["tier"] != "small" or self.large_model == route["model"]:
+            return None
+        return {**route, "tier": "escalated", "model": self.large_model, "reason": "small model answer was unusable"}
+
+    def observe(
+        self,
+        route: Dict[str, Any],
+        seconds: float,
+        cost_usd: float,
+        completion_tokens: int
+    ):
+        """Record one call made on ``route``"""
+        name = f"{route['task']}/{route['tier']}"
+        with self._lock:
+            stats = self._routes.get(name)
+            if stats is None:
+                stats = self._routes[name] = {
+                    "calls": 0,
+                    "models": {},
+                    "seconds": deque(maxlen=ROUTING_STATS_WINDOW),
+                    "cost_usd": deque(maxlen=ROUTING_STATS_WINDOW),
+                    "output_use": deque(maxlen=ROUTING_STATS_WINDOW)
+                }
+            stats["calls"] += 1
+            stats["models"][route["model"]] = stats["models"].get(route["model"], 0) + 1
+            stats["seconds"].append(seconds)
+            stats["cost_usd"].append(cost_usd)
+            stats["output_use"].append(completion_tokens / route["max_tokens"] if route["max_tokens"] else 0.0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Latency and cost distributions per route over the recent window"""
+        def distribution(values: Deque[float], scale: float, digits: int) -> Dict[str, float]:
+            ordered = sorted(values)
+            if not ordered:
+                return {}
+
+            def quantile(q: float) -> float:
+                return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+            return {
+                "mean": round(statistics.mean(ordered) * scale, digits),
+                "p50": round(quantile(0.50) * scale, digits),
+                "p95": round(quantile(0.95) * scale, digits),
+                "max": round(ordered[-1] * scale, digits)
+            }
+
+        with self._lock:
+            routes = {
+                name: {**stats, "models": dict(stats["models"]),
+                       **{key: list(stats[key]) for key in ("seconds", "cost_usd", "output_use")}}
+                for name, stats in self._routes.items()
+            }
+        return {
+            "enabled": self.enabled,
+            "small_model": self.small_model,
+            "large_model": self.large_model,
+            "routes": {
+                name: {
+                    "calls": stats["calls"],
+                    "models": stats["models"],
+                    "latency_ms": distribution(stats["seconds"], 1000, 1),
+                    "cost_usd": {**distribution(stats["cost_usd"], 1, 6), "total": round(sum(stats["cost_usd"]), 6)},
+                    "max_tokens_used": distribution(stats["output_use"], 1, 3)
+                }
+                for name, stats in sorted(routes.items())
+            }
+        }
+
+
+# Global model router instance
+model_router = ModelRouter()
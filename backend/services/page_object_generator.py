@@ -0,0 +1,253 @@
+from backend.services.html_analyzer import analyze_html
+from backend.utils.cache import LRUCache
+from backend.utils.helpers import compute_content_hash
+from typing import Dict, Any, List, Optional, Tuple
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+PAGE_OBJECT_MODULE = "page_objects"
+PAGE_OBJECT_CLASS = "CheckoutPage"
+PAGE_FILE = "checkout.html"
+
+MODULE_HEADER = '''"""
+Page object for {page_file}, generated from its element index.
+
+Generated scripts drive the page exclusively through this class.
+"""
+import os
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import Select, WebDriverWait
+
+PAGE_FILE = {page_file!r}
+
+
+class {class_name}:
+'''
+
+MODULE_HELPERS = '''
+    def __init__(self, driver, timeout=10):
+        self.driver = driver
+        self.wait = WebDriverWait(driver, timeout)
+
+    def open(self):
+        self.driver.get("file://" + os.path.abspath(PAGE_FILE))
+        return self
+
+    def find(self, locator):
+        return self.wait.until(EC.presence_of_element_located(locator))
+
+    def click(self, locator):
+        self.wait.until(EC.element_to_be_clickable(locator)).click()
+
+    def type(self, locator, text):
+        element = self.find(locator)
+        element.clear()
+        element.send_keys(text)
+
+    def text_of(self, locator):
+        return self.find(locator).text
+
+    def is_displayed(self, locator):
+        elements = self.driver.find_elements(*locator)
+        return bool(elements) and elements[0].is_displayed()
+
+    def wait_for_text(self, locator, text):
+        return self.wait.until(EC.text_to_be_present_in_element(locator, text))
+'''
+
+
+def _snake(value: str) -> str:
+    """camelCase / free text -> snake_case identifier"""
+    value = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", value)
+    value = re.sub(r"[^0-9a-zA-Z]+", "_", value).strip("_").lower()
+    if value and value[0].isdigit():
+        value = f"n_{value}"
+    return value
+
+
+def _onclick_label(onclick: str) -> str:
+    """``addToCart('Smart Watch', 199.99)`` -> ``add_to_cart_smart_watch``"""
+    func = re.match(r"\s*([\w.]+)", onclick or "")
+    arg = re.search(r"['\"]([^'\"]+)['\"]", onclick or "")
+    return _snake(" ".join(part for part in [func.group(1) if func else "", arg.group(1) if arg else ""] if part))
+
+
+class PageObjectGenerator:
+    """Build a shared Page Object module from the HTML element index"""
+
+    def __init__(self):
+        self.cache = LRUCache(max_size=32)
+
+    def get_page_object(
+        self,
+        html_content: str,
+        element_info: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Page object for the HTML, generated once per distinct page
+
+        Args:
+            html_content: HTML content of the target page
+            element_info: Pre-computed element index (analyzed if omitted)
+
+        Returns:
+            Dictionary with module source, class name and compact API listing
+        """
+        html_hash = compute_content_hash(html_content)
+        page_object = self.cache.get(html_hash)
+        if page_object is None:
+            page_object = self.build(element_info or analyze_html(html_content))
+            page_object["html_hash"] = html_hash
+            self.cache.set(html_hash, page_object)
+            logger.info(f"Generated page object with {len(page_object['api'])} methods")
+        return page_object
+
+    def build(self, element_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate the page object module from an element index"""
+        locators: List[Tuple[str, str, str]] = []
+        methods: List[str] = []
+        api: List[Dict[str, str]] = []
+        used_constants, used_methods = set(), set()
+
+        def unique(name: str, used: set) -> str:
+            name = name or "element"
+            candidate, suffix = name, 2
+            while candidate in used:
+                candidate, suffix = f"{name}_{suffix}", suffix + 1
+            used.add(candidate)
+            return candidate
+
+        def add_locator(name: str, by: str, value: str) -> str:
+            constant = unique(name, used_constants).upper()
+            locators.append((constant, by, value))
+            return constant
+
+        def add_methods(definitions: List[Tuple[str, str, str]], summary: str, element: Dict[str, Any]):
+            """definitions: (name, params, body); one API line covers them all"""
+            signatures = []
+            for name, params, body in definitions:
+                name = unique(name, used_methods)
+                methods.append(f"    def {name}(self{', ' + params if params else ''}):\n        {body}\n")
+                signatures.append(f"{name}({params})")
+            api.append({
+                "signature": " / ".join(signatures),
+                "summary": summary,
+                "id": element.get("id", ""),
+                "name": element.get("name", ""),
+                "text": " ".join(
+                    element.get(key, "") for key in ("text", "label", "placeholder", "onclick") if element.get(key)
+                )
+            })
+
+        for btn in element_info.get("buttons", []):
+            label = _snake(btn.get("id", "")) or _onclick_label(btn.get("onclick", "")) or _snake(btn.get("text", ""))
+            if not label.endswith("button"):
+                label = f"{label}_button"
+            constant = add_locator(label, *self._button_locator(btn))
+            add_methods(
+                [(f"click_{constant.lower()}", "", f"self.click(self.{constant})")],
+                f"button '{btn.get('text', '')}'",
+                btn
+            )
+
+        for field in element_info.get("inputs", []) + element_info.get("textareas", []):
+            label = _snake(field.get("id", "") or field.get("name", ""))
+            if not label:
+                continue
+            by, value = ("By.ID", field["id"]) if field.get("id") else ("By.NAME", field["name"])
+            constant = add_locator(f"{label}_field", by, value)
+            kind = field["tag"] if field["tag"] != "input" else f"input[type={field.get('type', 'text')}]"
+            description = f"{kind}#{field.get('id') or field.get('name')}"
+            if field.get("type") in ("checkbox", "submit", "button"):
+                add_methods([(f"click_{label}", "", f"self.click(self.{constant})")], description, field)
+                continue
+            if field.get("label"):
+                description += f" label '{field['label']}'"
+            if field.get("placeholder"):
+                description += f" placeholder '{field['placeholder']}'"
+            add_methods(
+                [
+                    (f"fill_{label}", "text", f"self.type(self.{constant}, text)"),
+                    (f"get_{label}_value", "", f"return self.find(self.{constant}).get_attribute('value')")
+                ],
+                description,
+                field
+            )
+
+        radio_groups: Dict[str, List[str]] = {}
+        for radio in element_info.get("radio_buttons", []):
+            if radio.get("name"):
+                radio_groups.setdefault(radio["name"], []).append(radio.get("value", ""))
+        for group, values in radio_groups.items():
+            add_methods(
+                [(
+                    f"select_{_snake(group)}",
+                    "value",
+                    f"self.click((By.CSS_SELECTOR, f\"input[name='{group}'][value='{{value}}']\"))"
+                )],
+                f"radio '{group}': {', '.join(values)}",
+                {"name": group}
+            )
+
+        for select in element_info.get("selects", []):
+            label = _snake(select.get("id", "") or select.get("name", ""))
+            if not label:
+                continue
+            by, value = ("By.ID", select["id"]) if select.get("id") else ("By.NAME", select["name"])
+            constant = add_locator(f"{label}_select", by, value)
+            add_methods(
+                [(f"choose_{label}", "value", f"Select(self.find(self.{constant})).select_by_value(value)")],
+                f"select options: {', '.join(select.get('options', []))}",
+                select
+            )
+
+        for elem in element_info.get("text_elements", []):
+            label = _snake(elem["id"])
+            constant = add_locator(label, "By.ID", elem["id"])
+            add_methods(
+                [
+                    (f"get_{label}_text", "", f"return self.text_of(self.{constant})"),
+                    (f"is_{label}_displayed", "", f"return self.is_displayed(self.{constant})")
+                ],
+                f"{elem.get('tag')}#{elem['id']}" + (f" initially '{elem['text']}'" if elem.get("text") else ""),
+                elem
+            )
+
+        source = MODULE_HEADER.format(page_file=PAGE_FILE, class_name=PAGE_OBJECT_CLASS)
+        source += "".join(f"    {name} = ({by}, {value!r})\n" for name, by, value in locators)
+        source += MODULE_HELPERS
+        source += "".join(f"\n{method}" for method in methods)
+
+        return {
+            "module_name": PAGE_OBJECT_MODULE,
+            "class_name": PAGE_OBJECT_CLASS,
+            "source": source,
+            "api": api
+        }
+
+    def _button_locator(self, btn: Dict[str, Any]) -> Tuple[str, str]:
+        if btn.get("id"):
+            return "By.ID", btn["id"]
+        if btn.get("onclick") and '"' not in btn["onclick"]:
+            return "By.XPATH", f'//button[@onclick="{btn["onclick"]}"]'
+        return "By.XPATH", f"//button[normalize-space()='{btn.get('text', '')}']"
+
+    def format_api(self, page_object: Dict[str, Any], api: Optional[List[Dict[str, str]]] = None) -> str:
+        """Compact one-line-per-method listing used in prompts"""
+        lines = [
+            f"from {page_object['module_name']} import {page_object['class_name']}",
+            f"page = {page_object['class_name']}(driver).open()",
+            "generic: find(locator), click(locator), type(locator, text), text_of(locator), "
+            "is_displayed(locator), wait_for_text(locator, text)"
+        ]
+        for method in (page_object["api"] if api is None else api):
+            lines.append(f"{method['signature']}  # {method['summary']}")
+        return "\n".join(lines)
+
+
+# Global page object generator instance
+page_object_generator = PageObjectGenerator()
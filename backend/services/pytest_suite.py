@@ -0,0 +1,348 @@
+"""
+Assembly of generated scripts into a pytest suite.
+
+Generated scripts are standalone: each launches its own browser and repeats
+the same imports. The suite built here turns each script's body into a test
+function, with imports hoisted once per module, one test module per
+feature, and a session-scoped driver fixture that every test shares (one
+browser per pytest-xdist worker). Scripts that differ only in their
+literals (selectors, input values, messages) become one parametrized test.
+Each case is marked with its test_type and priority.
+
+Layout::
+
+    conftest.py         driver fixture and per-test reset
+    pytest.ini          test paths and registered markers
+    requirements.txt
+    tests/
+        test_<feature>.py
+    scripts/            working directory of the tests: checkout.html,
+                        page objects and scripts kept as standalone files
+
+Scripts that cannot be turned into a function body (classes, ``global``,
+``sys.exit()``, syntax errors) are kept as files and run as they are.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+import ast
+import copy
+import logging
+import re
+
+from backend.utils.helpers import script_filename
+
+logger = logging.getLogger(__name__)
+
+CONFTEST_SOURCE = '''"""
+Fixtures of the generated test suite.
+
+    pip install -r requirements.txt
+    pytest -v                    # one headless Chrome for the whole run
+    pytest -n auto               # one per pytest-xdist worker
+    pytest -m "negative and high"
+"""
+import os
+import sys
+
+import pytest
+
+from driver_shim import create_headless_driver, install_shared_driver
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts")
+
+# Page objects and standalone scripts are imported from scripts/
+sys.path.insert(0, SCRIPTS_DIR)
+
+
+@pytest.fixture(scope="session")
+def driver():
+    """Browser shared by every test of the session; webdriver.Chrome() returns it"""
+    browser = create_headless_driver()
+    shared, restore = install_shared_driver(browser)
+    yield shared
+    restore()
+    browser.quit()
+
+
+@pytest.fixture(autouse=True)
+def _clean_browser(driver, monkeypatch):
+    """Tests load checkout.html relative to scripts/ and leave no state behind"""
+    monkeypatch.chdir(SCRIPTS_DIR)
+    yield
+    driver.reset()
+'''
+
+REQUIREMENTS = "selenium\nwebdriver-manager\npytest\npytest-xdist\n"
+
+# Literal types that may vary between otherwise identical scripts
+DATA_TYPES = (str, int, float)
+
+PLACEHOLDER = "__literal_{}"
+
+
+def identifier(value: str, default: str) -> str:
+    """Lower-case Python identifier fragment of ``value``"""
+    name = re.sub(r"\W+", "_", value.lower()).strip("_")
+    return name or default
+
+
+def markers(test_case: Dict[str, Any]) -> List[str]:
+    """Marker names of a test case: its test_type and priority"""
+    return [
+        identifier(str(test_case[field]), field)
+        for field in ("test_type", "priority") if test_case.get(field)
+    ]
+
+
+class _Literals(ast.NodeTransformer):
+    """Replaces data literals with numbered placeholders, collecting their values"""
+
+    def __init__(self):
+        self.values: List[Any] = []
+
+    def visit_JoinedStr(self, node):
+        # The literal parts of an f-string cannot be replaced by names
+        return node
+
+    def visit_Constant(self, node):
+        if type(node.value) not in DATA_TYPES:
+            return node
+        self.values.append(node.value)
+        return ast.copy_location(ast.Name(id=PLACEHOLDER.format(len(self.values) - 1), ctx=ast.Load()), node)
+
+
+class _Fill(ast.NodeTransformer):
+    """Puts literals back in place of placeholders, or parameter names where cases differ"""
+
+    def __init__(self, values: List[Any], params: Dict[int, str]):
+        self.values = values
+        self.params = params
+
+    def visit_Name(self, node):
+        if not node.id.startswith("__literal_"):
+            return node
+        index = int(node.id[len("__literal_"):])
+        if index in self.params:
+            return ast.copy_location(ast.Name(id=self.params[index], ctx=ast.Load()), node)
+        return ast.copy_location(ast.Constant(value=self.values[index]), node)
+
+
+class _Script:
+    """A generated script split into hoistable imports and a function body"""
+
+    def __init__(self, test_case: Dict[str, Any], source: str):
+        self.test_case = test_case
+        self.source = source
+        self.imports: List[str] = []
+        self.body: Optional[List[ast.stmt]] = None
+        self.names: Set[str] = set()
+        self.template = ""
+        self.values: List[Any] = []
+
+        try:
+            tree = ast.parse(source)
+        except SyntaxError as e:
+            logger.warning(f"Keeping {test_case['test_id']} standalone: {e}")
+            return
+        if not self._convertible(tree):
+            return
+
+        body = []
+        for index, node in enumerate(tree.body):
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                self.imports.append(ast.unparse(node))
+            elif index == 0 and isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant):
+                continue  # module docstring
+            elif self._is_main_guard(node):
+                body.extend(node.body)
+            else:
+                body.append(node)
+
+        self.body = body or [ast.Pass()]
+        self.names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+        literals = _Literals()
+        templated = [literals.visit(copy.deepcopy(node)) for node in self.body]
+        self.template = ast.dump(ast.Module(body=templated, type_ignores=[]))
+        self.values = literals.values
+
+    @staticmethod
+    def _is_main_guard(node: ast.stmt) -> bool:
+        return (
+            isinstance(node, ast.If) and not node.orelse
+            and isinstance(node.test, ast.Compare)
+            and isinstance(node.test.left, ast.Name) and node.test.left.id == "__name__"
+        )
+
+    @staticmethod
+    def _convertible(tree: ast.Module) -> bool:
+        """Whether the script still means the same wrapped in a function"""
+        top_level = set(map(id, tree.body))
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.ClassDef, ast.Global, ast.Nonlocal)):
+                return False
+            if isinstance(node, ast.ImportFrom) and id(node) not in top_level and any(
+                alias.name == "*" for alias in node.names
+            ):
+                return False
+            if isinstance(node, ast.Call):
+                func = node.func
+                if isinstance(func, ast.Name) and func.id in ("exit", "quit"):
+                    return False
+                if isinstance(func, ast.Attribute) and func.attr == "exit" and getattr(func.value, "id", None) in ("sys", "os"):
+                    return False
+        return True
+
+    def body_with(self, params: Dict[int, str]) -> List[ast.stmt]:
+        literals = _Literals()
+        templated = [literals.visit(copy.deepcopy(node)) for node in self.body]
+        fill = _Fill(self.values, params)
+        return [ast.fix_missing_locations(fill.visit(node)) for node in templated]
+
+
+class PytestSuiteBuilder:
+    """Builds the files of a pytest suite from test cases and their scripts"""
+
+    def build(
+        self,
+        scripts: List[Tuple[Dict[str, Any], str]],
+        taken: Set[str]
+    ) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Test modules, standalone scripts and configuration of the suite
+
+        Args:
+            scripts: ``(test case, script)`` pairs in suite order
+            taken: File names already used in ``scripts/`` (extended here)
+
+        Returns:
+            Files keyed by path relative to the suite root, and the pytest node id of each test case
+        """
+        files: Dict[str, str] = {}
+        node_ids: Dict[str, str] = {}
+        modules: "OrderedDict[str, List[_Script]]" = OrderedDict()
+
+        for test_case, source in scripts:
+            module = f"test_{identifier(test_case.get('feature') or '', 'general')}.py"
+            modules.setdefault(module, []).append(_Script(test_case, source))
+
+        for module, module_scripts in modules.items():
+            files[f"tests/{module}"] = self._module(module, module_scripts, files, node_ids, taken)
+
+        all_markers = sorted({m for test_case, _ in scripts for m in markers(test_case)})
+        files["pytest.ini"] = "[pytest]\ntestpaths = tests\nmarkers =\n" + "".join(
+            f"    {marker}: test_type or priority of the test case\n" for marker in all_markers
+        )
+        files["conftest.py"] = CONFTEST_SOURCE
+        files["requirements.txt"] = REQUIREMENTS
+        return files, node_ids
+
+    def _module(
+        self,
+        module: str,
+        scripts: List[_Script],
+        files: Dict[str, str],
+        node_ids: Dict[str, str],
+        taken: Set[str]
+    ) -> str:
+        feature = scripts[0].test_case.get("feature") or "General"
+        imports = ["import pytest"]
+        functions: List[str] = []
+        names: Set[str] = set()
+
+        # Scripts with the same structure, in order of their first case
+        groups: "OrderedDict[Any, List[_Script]]" = OrderedDict()
+        for script in scripts:
+            if script.body is None:
+                groups[id(script)] = [script]
+            else:
+                groups.setdefault(script.template, []).append(script)
+                imports.extend(i for i in script.imports if i not in imports)
+
+        for group in groups.values():
+            name = self._function_name(group[0].test_case["test_id"], names)
+            first = group[0]
+            if first.body is None:
+                filename = script_filename(first.test_case["test_id"], taken)
+                files[f"scripts/{filename}"] = first.source
+                functions.append(self._standalone(name, first.test_case, filename))
+                node_ids[first.test_case["test_id"]] = f"tests/{module}::{name}"
+                continue
+
+            varying = [
+                index for index in range(len(first.values))
+                if len({repr(script.values[index]) for script in group}) > 1
+            ]
+            if len(group) == 1 or not varying:
+                # Identical scripts are still separate tests
+                for script in group:
+                    if script is not first:
+                        name = self._function_name(script.test_case["test_id"], names)
+                    functions.append(self._function(name, script, {}))
+                    node_ids[script.test_case["test_id"]] = f"tests/{module}::{name}"
+                continue
+
+            params = self._param_names(varying, first.names)
+            functions.append(self._parametrized(name, group, params))
+            for script in group:
+                node_ids[script.test_case["test_id"]] = f"tests/{module}::{name}[{script.test_case['test_id']}]"
+
+        if any("run_script(" in function for function in functions):
+            imports.append("from driver_shim import run_script")
+
+        header = f'"""{feature} test cases, generated from standalone Selenium scripts."""\n'
+        return header + "\n".join(imports) + "\n\n\n" + "\n\n\n".join(functions) + "\n"
+
+    def _function_name(self, test_id: str, taken: Set[str]) -> str:
+        stem = f"test_{identifier(test_id, 'case')}"
+        name, suffix = stem, 2
+        while name in taken:
+            name, suffix = f"{stem}_{suffix}", suffix + 1
+        taken.add(name)
+        return name
+
+    def _param_names(self, varying: List[int], used: Set[str]) -> Dict[int, str]:
+        params, number = {}, 1
+        for index in varying:
+            while f"value_{number}" in used:
+                number += 1
+            params[index] = f"value_{number}"
+            number += 1
+        return params
+
+    def _definition(self, name: str, args: List[str], docstring: str, body: List[ast.stmt]) -> str:
+        function = ast.parse(f"def {name}({', '.join(args)}):\n    pass").body[0]
+        function.body = [ast.Expr(value=ast.Constant(value=docstring))] + body
+        return ast.unparse(ast.fix_missing_locations(function))
+
+    def _marks(self, test_case: Dict[str, Any]) -> List[str]:
+        return [f"pytest.mark.{marker}" for marker in markers(test_case)]
+
+    def _function(self, name: str, script: _Script, params: Dict[int, str]) -> str:
+        test_case = script.test_case
+        decorators = "".join(f"@{mark}\n" for mark in self._marks(test_case))
+        docstring = f"{test_case['test_id']}: {test_case.get('test_scenario', '')}"
+        return decorators + self._definition(name, [], docstring, script.body_with(params))
+
+    def _standalone(self, name: str, test_case: Dict[str, Any], filename: str) -> str:
+        decorators = "".join(f"@{mark}\n" for mark in self._marks(test_case))
+        docstring = f"{test_case['test_id']}: {test_case.get('test_scenario', '')} (standalone script)"
+        body = ast.parse(f"run_script({filename!r})").body
+        return decorators + self._definition(name, [], docstring, body)
+
+    def _parametrized(self, name: str, group: List[_Script], params: Dict[int, str]) -> str:
+        cases = []
+        for script in group:
+            values = ", ".join(repr(script.values[index]) for index in params)
+            marks = ", ".join(self._marks(script.test_case))
+            cases.append(f"    pytest.param({values}, id={script.test_case['test_id']!r}, marks=[{marks}]),\n")
+
+        argnames = ", ".join(repr(param) for param in params.values())
+        argnames = f"({argnames})" if len(params) > 1 else argnames
+        decorator = f"@pytest.mark.parametrize({argnames}, [\n{''.join(cases)}])\n"
+        ids = ", ".join(script.test_case["test_id"] for script in group)
+        docstring = f"{ids}: same steps with different data"
+        return decorator + self._definition(name, list(params.values()), docstring, group[0].body_with(params))
+
+
+# Global pytest suite builder instance
+pytest_suite_builder = PytestSuiteBuilder()
@@ -0,0 +1,243 @@
+"""
+Background re-indexing of the knowledge base under another embedding model.
+
+The new model gets its own collection. Stored chunk texts are scrolled out
+of the active collection in batches, embedded with the new model and
+upserted under the same point ids, while retrieval keeps being served from
+the active collection. Progress is checkpointed after every batch, so an
+interrupted job resumes where it stopped; when the last batch is written the
+vector store switches to the new collection and model in one step.
+
+Writes to the knowledge base are refused while a job runs, in every API
+process: the checkpoint carries a heartbeat, and a job whose heartbeat is
+recent counts as running. A checkpoint is only resumed if the knowledge base
+version has not moved since it was taken.
+"""
+from backend.services.embeddings import EmbeddingService
+from backend.services.vector_store import QDRANT_COLLECTION_NAME, vector_store_service
+from backend.utils.state_store import state_store
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REINDEX_BATCH_SIZE = int(os.getenv("REINDEX_BATCH_SIZE", "256"))
+REINDEX_STATE_PATH = os.getenv("REINDEX_STATE_PATH", "state/reindex.json")
+# A running job without a heartbeat for this long was interrupted
+REINDEX_STALE_SECONDS = int(os.getenv("REINDEX_STALE_SECONDS", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+def collection_for_model(model_name: str) -> str:
+    """Collection name of the embedding space built by a model"""
+    slug = re.sub(r"[^a-z0-9]+", "-", model_name.lower()).strip("-")
+    return f"{QDRANT_COLLECTION_NAME}__{slug}"
+
+
+class ReindexService:
+    """Builds a collection for a new embedding model and switches to it"""
+
+    def __init__(self, store=vector_store_service, path: Optional[str] = REINDEX_STATE_PATH):
+        self.store = store
+        self.path = path
+        self.state: Dict[str, Any] = {"status": "idle"}
+        self._thread: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._load()
+        if self.state.get("status") == "interrupted":
+            logger.info(
+                f"Re-index to {self.state['model']} was interrupted at "
+                f"{self.state['points_done']}/{self.state['points_total']} points; start it again to resume"
+            )
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+            stale = time.time() - self.state.get("heartbeat", 0) > REINDEX_STALE_SECONDS
+            if self.state.get("status") == "running" and stale:
+                # The process running the job stopped; the checkpoint is still valid
+                self.state["status"] = "interrupted"
+        except Exception as e:
+            logger.warning(f"Could not read re-index checkpoint: {str(e)}")
+
+    def _save(self):
+        if not self.path:
+            return
+        self.state["heartbeat"] = time.time()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _runs_here(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def is_running(self) -> bool:
+        """Whether a job is running in this or any other API process"""
+        if self._runs_here():
+            return True
+        self._load()
+        return self.state.get("status") == "running"
+
+    def start(self, model_name: str, drop_old: bool = False) -> Dict[str, Any]:
+        """
+        Start (or resume) re-indexing the knowledge base with another model
+
+        Args:
+            model_name: Sentence-transformers model to switch to
+            drop_old: Delete the previous collection after the switch
+
+        Returns:
+            The job status
+        """
+        with self._lock:
+            if self.is_running():
+                raise RuntimeError(f"A re-index to {self.state['model']} is already running")
+            if model_name == self.store.embedder.model_name:
+                raise ValueError(f"The knowledge base is already embedded with {model_name}")
+
+            source = self.store.collection_name
+            target = collection_for_model(model_name)
+            if target == source:
+                raise ValueError(f"Collection '{target}' is the active collection")
+
+            resumable = (
+                self.state.get("status") in ("interrupted", "cancelled", "failed")
+                and self.state.get("model") == model_name
+                and self.state.get("source_collection") == source
+                # Points ingested since the checkpoint could sit behind the scroll offset
+                and self.state.get("kb_version") == self.store.version
+            )
+            if resumable:
+                logger.info(f"Resuming re-index to {model_name} at {self.state['points_done']} points")
+            else:
+                if self.store.client.collection_exists(target):
+                    # Left over from an abandoned job with another checkpoint
+                    self.store.client.delete_collection(target)
+                self.state = {
+                    "model": model_name,
+                    "source_collection": source,
+                    "target_collection": target,
+                    "drop_old": drop_old,
+                    "kb_version": self.store.version,
+                    "offset": None,
+                    "points_done": 0,
+                    "points_total": self.store.client.count(source, exact=True).count
+                    if self.store.client.collection_exists(source) else 0,
+                    "elapsed_seconds": 0.0,
+                    "started_at": datetime.now(timezone.utc).isoformat(),
+                    "finished_at": None,
+                    "error": None
+                }
+            self.state["status"] = "running"
+            self.state["drop_old"] = drop_old
+            self._save()
+
+            self._cancel.clear()
+            state_store.delete("reindex", "cancel")
+            self._thread = threading.Thread(target=self._run, name="reindex", daemon=True)
+            self._thread.start()
+            return self.status()
+
+    def cancel(self) -> Dict[str, Any]:
+        """Stop after the current batch; the checkpoint is kept for resuming"""
+        if self._runs_here():
+            self._cancel.set()
+            self._thread.join()
+        elif self.is_running():
+            # Running in another API process, which polls this flag between batches
+            state_store.set("reindex", "cancel", True)
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        """Job state with progress, throughput and estimated time left"""
+        if not self._runs_here():
+            self._load()
+        state = {k: v for k, v in self.state.items() if k != "offset"}
+        done, total = state.get("points_done", 0), state.get("points_total", 0)
+        elapsed = state.get("elapsed_seconds", 0.0)
+        rate = done / elapsed if elapsed else 0.0
+        state["points_per_second"] = round(rate, 1)
+        state["progress"] = round(done / total, 4) if total else (1.0 if state.get("status") == "completed" else 0.0)
+        state["eta_seconds"] = round((total - done) / rate, 1) if rate and state.get("status") == "running" else None
+        state["active_collection"] = self.store.collection_name
+        state["active_model"] = self.store.embedder.model_name
+        return state
+
+    def _run(self):
+        state = self.state
+        try:
+            logger.info(f"Re-indexing '{state['source_collection']}' into '{state['target_collection']}' with {state['model']}")
+            embedder = EmbeddingService(state["model"])
+            self.store.create_collection(state["target_collection"], embedder)
+
+            # An empty knowledge base has nothing to copy; only the model changes
+            while self.store.client.collection_exists(state["source_collection"]):
+                if self._cancel.is_set() or state_store.get("reindex", "cancel", False):
+                    state["status"] = "cancelled"
+                    self._save()
+                    logger.info(f"Re-index cancelled at {state['points_done']}/{state['points_total']} points")
+                    return
+
+                started = time.perf_counter()
+                points, next_offset = self.store.client.scroll(
+                    collection_name=state["source_collection"],
+                    limit=REINDEX_BATCH_SIZE,
+                    offset=state["offset"],
+                    with_payload=True,
+                    with_vectors=False
+                )
+                if points:
+                    vectors = embedder.embed_documents_array([p.payload.get("text", "") for p in points])
+                    # Same ids as the source points, so a repeated batch overwrites itself
+                    self.store.upload_vectors(
+                        vectors,
+                        [p.payload for p in points],
+                        ids=[p.id for p in points],
+                        collection_name=state["target_collection"]
+                    )
+
+                state["offset"] = next_offset
+                state["points_done"] += len(points)
+                state["elapsed_seconds"] += time.perf_counter() - started
+                self._save()
+
+                if next_offset is None:
+                    break
+
+            self.store.switch_collection(state["target_collection"], embedder)
+            if state["drop_old"]:
+                self.store.client.delete_collection(state["source_collection"])
+                self.store.registry.forget_collection(state["source_collection"])
+
+            state["status"] = "completed"
+            state["finished_at"] = datetime.now(timezone.utc).isoformat()
+            self._save()
+            logger.info(
+                f"Re-index complete: {state['points_done']} points in {state['elapsed_seconds']:.1f}s "
+                f"({self.status()['points_per_second']} points/s)"
+            )
+        except Exception as e:
+            state["status"] = "failed"
+            state["error"] = str(e)
+            self._save()
+            logger.error(f"Re-index failed: {str(e)}")
+
+
+# Global re-index service instance
+reindex_service = ReindexService()
@@ -0,0 +1,264 @@
+"""
+Export of a test suite's scripts as a streamed ZIP archive.
+
+Archive layout (``layout="scripts"``)::
+
+    qa-suite-<suite_id>/
+        manifest.json       test cases, their script file (or error) and suite info
+        conftest.py         runs every script as a pytest item in one browser session
+        driver_shim.py      shared WebDriver shim used by conftest.py
+        scripts/
+            checkout.html   the target page scripts load via file://
+            page_objects.py page object module, when enabled
+            TC-001.py ...   one standalone script per test case
+
+With ``layout="pytest"`` the scripts are assembled into a pytest suite
+instead (see pytest_suite): test modules under ``tests/``, a conftest with
+a session-scoped driver fixture, and ``scripts/`` as the tests' working
+directory.
+
+Entries are produced lazily: stored scripts are read one at a time and,
+with ``generate_missing``, missing scripts are generated while the archive
+is already being sent. The manifest comes last so it can record failures.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import contextvars
+import inspect
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+from backend.models.schemas import TestCase
+from backend.services import driver_shim
+from backend.services.pytest_suite import pytest_suite_builder
+from backend.services.selenium_generator import selenium_generator
+from backend.services.test_case_store import test_case_store
+from backend.services.usage import BudgetExceeded
+from backend.utils.helpers import script_filename
+
+load_dotenv()
+
+# Scripts generated concurrently while an export with generate_missing streams
+EXPORT_GENERATION_PARALLELISM = int(os.getenv("EXPORT_GENERATION_PARALLELISM", "4"))
+
+logger = logging.getLogger(__name__)
+
+CONFTEST_SOURCE = '''"""
+Runs the exported scripts as pytest items sharing one headless Chrome session.
+
+    pip install selenium pytest
+    pytest -v
+
+Each script stays standalone (``cd scripts && python TC-001.py``). Under
+pytest, driver_shim hands every script the same browser, reset between
+scripts, instead of launching one per script.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+from driver_shim import create_headless_driver, install_shared_driver, run_script
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(ROOT, "scripts")
+
+with open(os.path.join(ROOT, "manifest.json"), encoding="utf-8") as f:
+    SCRIPTS = {os.path.basename(tc["script"]): tc for tc in json.load(f)["test_cases"] if tc.get("script")}
+
+_shared = {}
+
+
+def _markers(test_case):
+    return [m.lower().replace("-", "_") for m in (test_case.get("test_type"), test_case.get("priority")) if m]
+
+
+def pytest_configure(config):
+    for marker in sorted({m for test_case in SCRIPTS.values() for m in _markers(test_case)}):
+        config.addinivalue_line("markers", f"{marker}: test_type or priority of the test case")
+
+
+def pytest_collect_file(parent, file_path):
+    if str(file_path.parent) == SCRIPTS_DIR and file_path.name in SCRIPTS:
+        return ScriptFile.from_parent(parent, path=file_path)
+
+
+def pytest_sessionfinish(session):
+    if "driver" in _shared:
+        _shared["restore"]()
+        _shared["driver"].quit()
+
+
+class ScriptFile(pytest.File):
+    def collect(self):
+        test_case = SCRIPTS[self.path.name]
+        item = ScriptItem.from_parent(self, name=test_case["test_id"])
+        for marker in _markers(test_case):
+            item.add_marker(marker)
+        yield item
+
+
+class ScriptItem(pytest.Item):
+    def runtest(self):
+        if "driver" not in _shared:
+            _shared["driver"] = create_headless_driver()
+            _shared["proxy"], _shared["restore"] = install_shared_driver(_shared["driver"])
+        else:
+            _shared["proxy"].reset()
+
+        # Scripts open checkout.html relative to the working directory and import page_objects
+        cwd = os.getcwd()
+        os.chdir(SCRIPTS_DIR)
+        sys.path.insert(0, SCRIPTS_DIR)
+        try:
+            run_script(str(self.path))
+        finally:
+            sys.path.remove(SCRIPTS_DIR)
+            os.chdir(cwd)
+
+    def reportinfo(self):
+        return self.path, None, self.name
+'''
+
+
+class ScriptExporter:
+    """Builds the entries of a suite's script archive"""
+
+    def __init__(self):
+        self.store = test_case_store
+        self.generator = selenium_generator
+        self.pytest_suite = pytest_suite_builder
+        self.parallelism = EXPORT_GENERATION_PARALLELISM
+
+    def archive_name(self, suite_id: str) -> str:
+        return f"qa-suite-{suite_id}"
+
+    def entries(
+        self,
+        suite: Dict[str, Any],
+        html_content: Optional[str],
+        generate_missing: bool = False,
+        filters: Optional[Dict[str, Any]] = None,
+        layout: str = "scripts"
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Archive entries as ``(path, content)``, produced one at a time
+
+        Args:
+            suite: Saved suite (see TestCaseStore.get_suite)
+            html_content: Target page, shipped with the scripts
+            generate_missing: Generate (and store) scripts for cases that have none
+            filters: Retrieval filters used when generating
+            layout: "scripts" (standalone scripts run by a conftest) or
+                "pytest" (a test suite assembled from them, see pytest_suite)
+
+        Returns:
+            Iterator of entries; the manifest is the last one
+        """
+        root = self.archive_name(suite["suite_id"])
+        if layout == "scripts":
+            yield f"{root}/conftest.py", CONFTEST_SOURCE
+        yield f"{root}/driver_shim.py", inspect.getsource(driver_shim)
+
+        taken = set()
+        if html_content:
+            yield f"{root}/scripts/checkout.html", html_content
+            for filename, source in self.generator.support_files(html_content).items():
+                taken.add(filename)
+                yield f"{root}/scripts/{filename}", source
+
+        manifest: List[Dict[str, Any]] = []
+        generated: List[Tuple[Dict[str, Any], str]] = []
+        for test_case, script, error in self._scripts(suite, html_content, generate_missing, filters):
+            entry = {**test_case, "script": None}
+            if script and layout == "pytest":
+                # Test modules group cases, so they are written once every script is known
+                generated.append((test_case, script))
+            elif script:
+                filename = script_filename(test_case["test_id"], taken)
+                entry["script"] = f"scripts/{filename}"
+                yield f"{root}/scripts/{filename}", script
+            elif error:
+                entry["error"] = error
+            manifest.append(entry)
+
+        if layout == "pytest":
+            files, node_ids = self.pytest_suite.build(generated, taken)
+            for path, source in files.items():
+                yield f"{root}/{path}", source
+            for entry in manifest:
+                if entry["test_id"] in node_ids:
+                    entry["test"] = node_ids[entry["test_id"]]
+                    entry["script"] = entry["test"].split("::")[0]
+
+        yield f"{root}/manifest.json", json.dumps({
+            "suite_id": suite["suite_id"],
+            "query": suite["query"],
+            "created_at": suite["created_at"],
+            "kb_version": suite.get("kb_version"),
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+            "layout": layout,
+            "scripts": sum(1 for entry in manifest if entry["script"]),
+            "test_cases": manifest
+        }, indent=2)
+
+    def _scripts(
+        self,
+        suite: Dict[str, Any],
+        html_content: Optional[str],
+        generate_missing: bool,
+        filters: Optional[Dict[str, Any]]
+    ) -> Iterator[Tuple[Dict[str, Any], Optional[str], Optional[str]]]:
+        """(test case, script, error) in suite order; stored scripts are never regenerated"""
+        suite_id = suite["suite_id"]
+
+        def script_for(test_case: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str], Optional[str]]:
+            script = self.store.get_script(suite_id, test_case["test_id"])
+            if script or not generate_missing:
+                return test_case, script, None
+            try:
+                result = self.generator.generate_script(
+                    test_case=TestCase(**test_case),
+                    html_content=html_content,
+                    filters=filters
+                )
+            except BudgetExceeded as e:
+                return test_case, None, str(e)
+            if not result["success"]:
+                return test_case, None, result.get("error", "Failed to generate script")
+            self.store.save_script(suite_id, test_case["test_id"], result["script"])
+            return test_case, result["script"], None
+
+        if not generate_missing:
+            for test_case in suite["test_cases"]:
+                yield script_for(test_case)
+            return
+
+        # In order, so the first scripts stream while later ones are generated. Only a
+        # window of cases is in flight: generation follows the download, and stops
+        # with it when the client goes away
+        test_cases = iter(suite["test_cases"])
+        pool = ThreadPoolExecutor(max_workers=self.parallelism)
+        try:
+            # Generation in the pool is accounted to the request exporting the suite
+            def submit(test_case):
+                return pool.submit(contextvars.copy_context().run, script_for, test_case)
+
+            pending = deque(submit(tc) for tc in islice(test_cases, self.parallelism * 2))
+            while pending:
+                result = pending.popleft().result()
+                for test_case in islice(test_cases, 1):
+                    pending.append(submit(test_case))
+                yield result
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Global script exporter instance
+script_exporter = ScriptExporter()
@@ -0,0 +1,169 @@
+from backend.services.script_runner import script_runner
+from backend.services.selenium_generator import selenium_generator
+from backend.utils.cache import LRUCache
+from backend.utils.helpers import compute_content_hash
+from typing import Dict, Any, List, Optional
+import json
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REPAIR_MAX_ATTEMPTS = int(os.getenv("REPAIR_MAX_ATTEMPTS", "3"))
+REPAIR_CACHE_SIZE = int(os.getenv("REPAIR_CACHE_SIZE", "512"))
+REPAIR_ERROR_CHARS = 3000
+
+logger = logging.getLogger(__name__)
+
+
+class ScriptRepairService:
+    """Self-healing loop: run scripts, regenerate only the failing ones"""
+
+    def __init__(self):
+        self.runner = script_runner
+        self.generator = selenium_generator
+        self.max_attempts = REPAIR_MAX_ATTEMPTS
+        # (test case hash, html_hash) -> script that passed against that HTML
+        self.cache = LRUCache(max_size=REPAIR_CACHE_SIZE)
+
+    def repair_scripts(
+        self,
+        items: List[Dict[str, Any]],
+        html_content: str,
+        max_attempts: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Run scripts and repair the failing ones with bounded LLM attempts
+
+        Args:
+            items: Dictionaries with ``test_case`` (TestCase) and ``script``
+            html_content: HTML content of the target page
+            max_attempts: Regeneration attempts per failing script
+
+        Returns:
+            Dictionary with per-test-case results and the number of LLM calls
+        """
+        max_attempts = self.max_attempts if max_attempts is None else max_attempts
+        html_hash = compute_content_hash(html_content)
+
+        states = [
+            {
+                "test_case": item["test_case"],
+                # Test ids restart at TC-001 in every suite; only the content identifies a test case
+                "cache_key": (compute_content_hash(json.dumps(item["test_case"].dict(), sort_keys=True)), html_hash),
+                "script": item["script"],
+                "attempts": 0,
+                "from_cache": False,
+                "result": None,
+                "error": None
+            }
+            for item in items
+        ]
+
+        # Step 1: reuse stored results for unchanged scripts, run the rest
+        pending = []
+        for state in states:
+            stored = self.runner.get_result(state["test_case"].test_id, compute_content_hash(state["script"]))
+            if stored and stored.get("html_hash") == html_hash:
+                state["result"] = stored
+            else:
+                pending.append(state)
+        self._run(pending, html_content)
+
+        # Step 2: swap in previously successful repairs before paying for new ones
+        pending = []
+        for state in self._failing(states):
+            cached = self.cache.get(state["cache_key"])
+            if cached and cached != state["script"]:
+                state["script"] = cached
+                state["from_cache"] = True
+                pending.append(state)
+        self._run(pending, html_content)
+
+        # Step 3: regenerate whatever still fails, one round per attempt
+        llm_calls = 0
+        for attempt in range(1, max_attempts + 1):
+            pending = [state for state in self._failing(states) if state["error"] is None]
+            if not pending:
+                break
+
+            logger.info(f"Repair attempt {attempt}/{max_attempts} for {len(pending)} failing scripts")
+
+            regenerated = []
+            for state in pending:
+                try:
+                    state["script"] = self.generator.repair_script(
+                        test_case=state["test_case"],
+                        script=state["script"],
+                        error=self._describe_failure(state["result"]),
+                        html_content=html_content,
+                        # A repair that did not fix the script is retried on the larger model
+                        escalate=attempt > 1
+                    )
+                    state["attempts"] += 1
+                    regenerated.append(state)
+                except Exception as e:
+                    logger.error(f"Error repairing {state['test_case'].test_id}: {str(e)}")
+                    state["error"] = str(e)
+                finally:
+                    llm_calls += 1
+
+            self._run(regenerated, html_content)
+
+        # Step 4: remember repairs that made a script pass
+        results = []
+        for state in states:
+            result = state["result"]
+            repaired = result["status"] == "passed" and (state["attempts"] > 0 or state["from_cache"])
+            if repaired:
+                self.cache.set(state["cache_key"], state["script"])
+
+            results.append({
+                "test_case_id": state["test_case"].test_id,
+                "status": result["status"],
+                "script": state["script"],
+                "attempts": state["attempts"],
+                "repaired": repaired,
+                "from_cache": state["from_cache"],
+                "error": state["error"] or (result.get("error") if result["status"] != "passed" else None)
+            })
+
+        logger.info(f"Repair loop finished with {llm_calls} LLM calls for {len(states)} scripts")
+
+        return {
+            "results": results,
+            "llm_calls": llm_calls
+        }
+
+    def _run(self, states: List[Dict[str, Any]], html_content: str):
+        if not states:
+            return
+        run_results = self.runner.run_scripts(
+            scripts=[
+                {"test_case_id": state["test_case"].test_id, "script": state["script"]}
+                for state in states
+            ],
+            html_content=html_content,
+            support_files=self.generator.support_files(html_content)
+        )
+        for state, result in zip(states, run_results):
+            state["result"] = result
+
+    def _failing(self, states: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [state for state in states if state["result"]["status"] != "passed"]
+
+    def _describe_failure(self, result: Dict[str, Any]) -> str:
+        """Error summary fed back to the LLM, trimmed to the most useful tail"""
+        parts = [f"Status: {result['status']}", f"Error: {result.get('error')}"]
+        if result.get("traceback"):
+            parts.append(f"Traceback:\n{result['traceback'][-REPAIR_ERROR_CHARS:]}")
+        if result.get("stdout"):
+            parts.append(f"Script output:\n{result['stdout'][-1000:]}")
+        if result.get("browser_log"):
+            parts.append("Browser console:\n" + "\n".join(result["browser_log"][-20:]))
+        return "\n\n".join(parts)
+
+
+# Global script repair service instance
+script_repair_service = ScriptRepairService()
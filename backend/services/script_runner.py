@@ -0,0 +1,369 @@
+"""
+Execution runner for generated Selenium scripts.
+
+Scripts run inside a pool of worker processes, each owning one reusable
+headless browser session. The uploaded HTML is served from a local static
+server so scripts exercise the page over HTTP exactly as uploaded.
+"""
+import contextlib
+import functools
+import io
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from backend.utils.helpers import compute_content_hash
+from backend.utils.state_store import state_store
+
+load_dotenv()
+
+RUNNER_MAX_WORKERS = int(os.getenv("RUNNER_MAX_WORKERS", str(os.cpu_count() or 1)))
+RUNNER_SCRIPT_TIMEOUT = int(os.getenv("RUNNER_SCRIPT_TIMEOUT", "60"))
+RUNNER_ARTIFACTS_DIR = os.getenv("RUNNER_ARTIFACTS_DIR", "runs")
+RUNNER_HTML_FILENAME = "checkout.html"
+
+logger = logging.getLogger(__name__)
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler that keeps request lines out of the app log"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _execute_script(shared, job: Dict[str, Any], site_dir: str) -> Dict[str, Any]:
+    """Run one script against the shared session and classify the outcome"""
+    script_path = job["script_path"]
+    stdout, stderr = io.StringIO(), io.StringIO()
+    status, error, trace = "passed", None, None
+
+    shared.set_base_url(job["base_url"])
+    previous_cwd, previous_argv = os.getcwd(), sys.argv
+    # Support modules (page objects) may change between jobs
+    for module_name in job["support_modules"]:
+        sys.modules.pop(module_name, None)
+    if site_dir not in sys.path:
+        sys.path.insert(0, site_dir)
+    started = time.perf_counter()
+
+    try:
+        code = compile(job["script"], script_path, "exec")
+        os.chdir(site_dir)
+        sys.argv = [script_path]
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            exec(code, {"__name__": "__main__", "__file__": script_path})
+    except SystemExit as e:
+        # unittest.main() and explicit sys.exit() report through the exit code
+        if e.code not in (0, None):
+            status, error = "failed", f"Script exited with code {e.code}"
+    except AssertionError as e:
+        status, error, trace = "failed", str(e) or "Assertion failed", traceback.format_exc()
+    except Exception as e:
+        status, error, trace = "error", f"{type(e).__name__}: {e}", traceback.format_exc()
+    finally:
+        os.chdir(previous_cwd)
+        sys.argv = previous_argv
+
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    screenshot_path = os.path.join(job["artifacts_dir"], "screenshot.png")
+    browser_log = []
+    try:
+        shared.get_screenshot_as_file(screenshot_path)
+    except Exception:
+        screenshot_path = None
+    try:
+        browser_log = [entry.get("message", "") for entry in shared.get_log("browser")]
+    except Exception:
+        pass
+
+    return {
+        "test_case_id": job["test_case_id"],
+        "status": status,
+        "duration_ms": round(duration_ms, 2),
+        "error": error,
+        "traceback": trace,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "browser_log": browser_log,
+        "screenshot_path": screenshot_path,
+    }
+
+
+def _worker_main(conn, site_dir: str):
+    """Worker process loop: one browser session reused for every job"""
+    from backend.services.driver_shim import create_headless_driver, install_shared_driver
+
+    driver, shared, restore = None, None, None
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        try:
+            if driver is None:
+                driver = create_headless_driver()
+                shared, restore = install_shared_driver(driver)
+            else:
+                shared.reset()
+        except Exception as e:
+            # The session is unusable; report and start fresh on the next job.
+            # Unpatch first, or the next job's constructor hands back the dead session
+            if restore is not None:
+                restore()
+            if driver is not None:
+                with contextlib.suppress(Exception):
+                    driver.quit()
+            driver, shared, restore = None, None, None
+            conn.send({
+                "test_case_id": job["test_case_id"],
+                "status": "error",
+                "duration_ms": 0.0,
+                "error": f"Browser session unavailable: {e}",
+                "traceback": traceback.format_exc(),
+            })
+            continue
+
+        conn.send(_execute_script(shared, job, site_dir))
+
+    if restore is not None:
+        restore()
+    if driver is not None:
+        with contextlib.suppress(Exception):
+            driver.quit()
+
+
+class _BrowserWorker:
+    """Parent-side handle of one worker process"""
+
+    def __init__(self, ctx, index: int, site_dir: str):
+        self.ctx = ctx
+        self.index = index
+        self.site_dir = site_dir
+        self.process = None
+        self.conn = None
+        self.start()
+
+    def start(self):
+        self.conn, child_conn = self.ctx.Pipe()
+        self.process = self.ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.site_dir),
+            name=f"selenium-worker-{self.index}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def stop(self):
+        with contextlib.suppress(Exception):
+            self.conn.send(None)
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+    def restart(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+        self.start()
+
+    def run(self, job: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Execute a job, killing and replacing the worker if it overruns"""
+        self.conn.send(job)
+        try:
+            if self.conn.poll(timeout):
+                return self.conn.recv()
+            status, error = "timeout", f"Script exceeded {timeout}s timeout"
+        except EOFError:
+            status, error = "error", "Worker process crashed"
+
+        logger.warning(f"Restarting worker {self.index}: {error} ({job['test_case_id']})")
+        self.restart()
+        return {
+            "test_case_id": job["test_case_id"],
+            "status": status,
+            "duration_ms": timeout * 1000 if status == "timeout" else 0.0,
+            "error": error,
+        }
+
+
+class ScriptRunner:
+    """Execute generated Selenium scripts in parallel headless browsers"""
+
+    def __init__(self):
+        self.max_workers = max(1, RUNNER_MAX_WORKERS)
+        self.default_timeout = RUNNER_SCRIPT_TIMEOUT
+        self.artifacts_dir = os.path.abspath(RUNNER_ARTIFACTS_DIR)
+        self.site_dir = os.path.join(self.artifacts_dir, "site")
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers: List[_BrowserWorker] = []
+        self._server = None
+        self._lock = threading.Lock()
+
+    def _ensure_server(self) -> str:
+        """Start the static server for the uploaded HTML (once)"""
+        if self._server is None:
+            handler = functools.partial(_QuietHandler, directory=self.site_dir)
+            self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+            threading.Thread(
+                target=self._server.serve_forever,
+                name="selenium-static-server",
+                daemon=True
+            ).start()
+            logger.info(f"Serving HTML for script runs on port {self._server.server_address[1]}")
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _ensure_workers(self, count: int):
+        while len(self._workers) < count:
+            self._workers.append(_BrowserWorker(self._ctx, len(self._workers), self.site_dir))
+
+    def run_scripts(
+        self,
+        scripts: List[Dict[str, str]],
+        html_content: str,
+        timeout: Optional[float] = None,
+        support_files: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute scripts against the uploaded HTML
+
+        Args:
+            scripts: Items with ``test_case_id`` and ``script``
+            html_content: HTML of the page under test
+            timeout: Per-script timeout in seconds
+            support_files: Extra modules scripts import (e.g. page objects), by filename
+
+        Returns:
+            One result dictionary per script, in input order
+        """
+        if not scripts:
+            return []
+
+        timeout = timeout or self.default_timeout
+        html_hash = compute_content_hash(html_content)
+        support_files = support_files or {}
+
+        with self._lock:
+            os.makedirs(self.site_dir, exist_ok=True)
+            with open(os.path.join(self.site_dir, RUNNER_HTML_FILENAME), "w", encoding="utf-8") as f:
+                f.write(html_content)
+            for filename, source in support_files.items():
+                with open(os.path.join(self.site_dir, filename), "w", encoding="utf-8") as f:
+                    f.write(source)
+            support_modules = [os.path.splitext(filename)[0] for filename in support_files]
+
+            base_url = self._ensure_server()
+            self._ensure_workers(min(len(scripts), self.max_workers))
+
+            jobs = queue.Queue()
+            for position, item in enumerate(scripts):
+                job = self._build_job(item, base_url, html_hash)
+                job["support_modules"] = support_modules
+                jobs.put((position, job))
+
+            results: List[Optional[Dict[str, Any]]] = [None] * len(scripts)
+
+            def drain(worker: _BrowserWorker):
+                while True:
+                    try:
+                        position, job = jobs.get_nowait()
+                    except queue.Empty:
+                        return
+                    result = worker.run(job, timeout)
+                    result["worker"] = worker.index
+                    results[position] = self._store_result(result, job)
+
+            lanes = [
+                threading.Thread(target=drain, args=(worker,), daemon=True)
+                for worker in self._workers[:min(len(scripts), self.max_workers)]
+            ]
+            for lane in lanes:
+                lane.start()
+            for lane in lanes:
+                lane.join()
+
+        passed = sum(1 for r in results if r["status"] == "passed")
+        logger.info(f"Executed {len(results)} scripts: {passed} passed, {len(results) - passed} not passed")
+        return results
+
+    def _build_job(self, item: Dict[str, str], base_url: str, html_hash: str) -> Dict[str, Any]:
+        test_case_id = item["test_case_id"]
+        script_hash = compute_content_hash(item["script"])
+        # Test ids restart at TC-001 in every suite; the script tells the runs apart
+        artifacts_dir = os.path.join(self.artifacts_dir, f"{_safe_name(test_case_id)}-{script_hash[:16]}")
+        shutil.rmtree(artifacts_dir, ignore_errors=True)
+        os.makedirs(artifacts_dir, exist_ok=True)
+
+        script_path = os.path.join(artifacts_dir, "script.py")
+        with open(script_path, "w", encoding="utf-8") as f:
+            f.write(item["script"])
+
+        return {
+            "test_case_id": test_case_id,
+            "script": item["script"],
+            "script_path": script_path,
+            "artifacts_dir": artifacts_dir,
+            "base_url": base_url,
+            "script_hash": script_hash,
+            "html_hash": html_hash,
+        }
+
+    def _store_result(self, result: Dict[str, Any], job: Dict[str, Any]) -> Dict[str, Any]:
+        result["finished_at"] = datetime.now(timezone.utc).isoformat()
+        result["script_hash"] = job["script_hash"]
+        result["html_hash"] = job["html_hash"]
+        # Shared with the other API processes, which may serve the result lookup
+        state_store.set("run_results", _result_key(job["test_case_id"], job["script_hash"]), result)
+        state_store.set("latest_run_results", job["test_case_id"], job["script_hash"])
+
+        with open(os.path.join(job["artifacts_dir"], "result.json"), "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+        return result
+
+    def get_result(self, test_case_id: str, script_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Stored result of a test case's script, or of its latest run without ``script_hash``"""
+        script_hash = script_hash or state_store.get("latest_run_results", test_case_id)
+        if not script_hash:
+            return None
+        return state_store.get("run_results", _result_key(test_case_id, script_hash))
+
+    def shutdown(self):
+        """Stop worker processes and the static server"""
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+
+def _result_key(test_case_id: str, script_hash: str) -> str:
+    return f"{test_case_id}|{script_hash}"
+
+
+def _safe_name(value: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in value)
+
+
+# Global script runner instance
+script_runner = ScriptRunner()
@@ -0,0 +1,306 @@
+"""
+Static validation of generated Selenium scripts.
+
+Scripts are checked before they are returned, without running them:
+the source must parse, every literal ``By.ID`` / ``By.NAME`` / ``By.XPATH``
+locator must exist on the uploaded page, calls on the page object must be
+methods it has, and the prompt rules hold (no ``time.sleep``, at least one
+assertion). Checking takes milliseconds, so a failing script can be
+regenerated right away with the problems as feedback, instead of being run
+or handed to the user first. ``clean_script`` normalizes raw LLM output
+before it is validated.
+
+Elements the page renders from its own scripts (``innerHTML`` templates)
+count as present: HTML fragments in inline script string literals are
+parsed along with the static markup.
+"""
+from backend.utils.cache import LRUCache
+from backend.utils.helpers import compute_content_hash
+from typing import Any, Dict, List, Optional, Set, Tuple
+import ast
+import logging
+import re
+import time
+
+from lxml import etree, html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+# XPaths matching any element of a kind (rule 2 of the generation prompt)
+GENERIC_XPATH = re.compile(r"^\(?\s*//?\s*(\*|[a-zA-Z]+)\s*\)?(\[\d+\])?$")
+
+# String literals in inline scripts, by quote character
+SCRIPT_STRINGS = [re.compile(rf"{q}((?:\\.|[^{q}\\])*){q}", re.DOTALL) for q in ("'", '"', "`")]
+
+ASSERT_CALL = re.compile(r"^assert[A-Z_]")
+
+# Imports added to scripts that use a name without importing it
+SCRIPT_IMPORTS = {
+    "webdriver": "from selenium import webdriver",
+    "By": "from selenium.webdriver.common.by import By",
+    "WebDriverWait": "from selenium.webdriver.support.ui import WebDriverWait",
+    "EC": "from selenium.webdriver.support import expected_conditions as EC",
+    "Select": "from selenium.webdriver.support.ui import Select",
+    "Keys": "from selenium.webdriver.common.keys import Keys",
+    "Service": "from selenium.webdriver.chrome.service import Service",
+    "ChromeDriverManager": "from webdriver_manager.chrome import ChromeDriverManager",
+    "os": "import os"
+}
+
+
+def clean_script(script: str) -> str:
+    """Strip markdown fences and add the imports of names the script uses but does not import"""
+    script = re.sub(r'^```[\w+-]*\s*$', '', script, flags=re.MULTILINE).strip()
+
+    code = re.sub(r'^\s*(from\s+\S+\s+)?import\s.*$', '', script, flags=re.MULTILINE)
+    missing = [
+        statement for name, statement in SCRIPT_IMPORTS.items()
+        if re.search(rf'\b{name}\b', code)
+        and not re.search(rf'^\s*(from\s+\S+\s+)?import\s+.*\b{name}\b', script, flags=re.MULTILINE)
+    ]
+    if missing:
+        script = "\n".join(missing) + "\n\n" + script
+    return script
+
+
+class _PageContext:
+    """What locators are checked against, built once per page"""
+
+    def __init__(self, html_content: str, element_info: Dict[str, Any]):
+        self.ids: Set[str] = set(element_info.get("all_ids", []))
+        self.names: Set[str] = set()
+        for key in ("buttons", "inputs", "radio_buttons", "textareas", "selects", "forms",
+                    "clickable_elements", "text_elements"):
+            for element in element_info.get(key, []):
+                if element.get("id"):
+                    self.ids.add(element["id"])
+                if element.get("name"):
+                    self.names.add(element["name"])
+
+        self.dom = lxml_html.document_fromstring(html_content or "<html></html>")
+        rendered = self.dom.makeelement("div", {"data-rendered-by-script": ""})
+        for script in self.dom.iter("script"):
+            for pattern in SCRIPT_STRINGS:
+                for literal in pattern.findall(script.text or ""):
+                    if "<" not in literal or not re.search(r"<[a-zA-Z]", literal):
+                        continue
+                    try:
+                        fragments = lxml_html.fragments_fromstring(literal)
+                    except (etree.ParserError, ValueError):
+                        continue
+                    rendered.extend(f for f in fragments if not isinstance(f, str))
+        body = self.dom.find("body")
+        (body if body is not None else self.dom).append(rendered)
+        for element in rendered.iter():
+            if element.get("id"):
+                self.ids.add(element.get("id"))
+            if element.get("name"):
+                self.names.add(element.get("name"))
+
+
+class ScriptValidator:
+    """Check generated scripts against the page and the generation rules"""
+
+    def __init__(self):
+        self._pages = LRUCache(max_size=32)
+        self.stats = {
+            "scripts": 0,
+            "rejected": 0,
+            "milliseconds": 0.0,
+            "syntax_error": 0,
+            "unknown_locator": 0,
+            "generic_xpath": 0,
+            "unknown_page_object_member": 0,
+            "removed_api": 0,
+            "sleep": 0,
+            "no_assertion": 0
+        }
+
+    def validate(
+        self,
+        script: str,
+        html_content: str,
+        element_info: Dict[str, Any],
+        page_object_source: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Validate a cleaned script
+
+        Args:
+            script: Script source
+            html_content: Page the script targets
+            element_info: Element index of the page
+            page_object_source: Page object module the script may import
+
+        Returns:
+            Dictionary with ``valid``, the ``errors`` found (one line each) and ``milliseconds`` spent
+        """
+        started = time.perf_counter()
+        problems: List[Dict[str, str]] = []
+
+        try:
+            tree = ast.parse(script)
+        except SyntaxError as e:
+            problems.append({"rule": "syntax_error", "message": f"SyntaxError on line {e.lineno}: {e.msg}"})
+        else:
+            page = self._page(html_content, element_info)
+            problems.extend(self._check_locators(tree, page))
+            if page_object_source:
+                problems.extend(self._check_page_object(tree, page_object_source))
+            problems.extend(self._check_rules(tree))
+
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stats["scripts"] += 1
+        self.stats["rejected"] += int(bool(problems))
+        self.stats["milliseconds"] += elapsed
+        for rule in {problem["rule"] for problem in problems}:
+            self.stats[rule] += 1
+
+        return {
+            "valid": not problems,
+            "errors": [problem["message"] for problem in problems],
+            "milliseconds": round(elapsed, 3)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        if stats["scripts"]:
+            stats["rejection_rate"] = round(stats["rejected"] / stats["scripts"], 4)
+            stats["avg_milliseconds"] = round(stats["milliseconds"] / stats["scripts"], 3)
+        stats["milliseconds"] = round(stats["milliseconds"], 3)
+        return stats
+
+    def _page(self, html_content: str, element_info: Dict[str, Any]) -> _PageContext:
+        key = compute_content_hash(html_content or "")
+        page = self._pages.get(key)
+        if page is None:
+            page = _PageContext(html_content, element_info)
+            self._pages.set(key, page)
+        return page
+
+    def _check_locators(self, tree: ast.AST, page: _PageContext) -> List[Dict[str, str]]:
+        problems = []
+        for by, value in self._locators(tree):
+            if by == "ID" and value not in page.ids:
+                problems.append({"rule": "unknown_locator", "message": f"By.ID '{value}' is not an element id on the page"})
+            elif by == "NAME" and value not in page.names:
+                problems.append({"rule": "unknown_locator", "message": f"By.NAME '{value}' is not an element name on the page"})
+            elif by == "XPATH":
+                if GENERIC_XPATH.match(value.strip()):
+                    problems.append({"rule": "generic_xpath", "message": f"Generic XPath '{value}' is not allowed"})
+                    continue
+                try:
+                    matches = page.dom.xpath(value)
+                except etree.XPathError as e:
+                    problems.append({"rule": "unknown_locator", "message": f"Invalid XPath '{value}': {e}"})
+                    continue
+                if isinstance(matches, list) and not matches:
+                    problems.append({"rule": "unknown_locator", "message": f"XPath '{value}' matches no element on the page"})
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Attribute) and node.attr.startswith(("find_element_by_", "find_elements_by_")):
+                problems.append({
+                    "rule": "removed_api",
+                    "message": f"{node.attr}() was removed in Selenium 4; use find_element(By..., ...)"
+                })
+        return problems
+
+    def _locators(self, tree: ast.AST):
+        """(strategy, value) of every locator with a literal value"""
+        def strategy(node) -> Optional[str]:
+            if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "By":
+                return node.attr
+            return None
+
+        def literal(node) -> Optional[str]:
+            return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+        for node in ast.walk(tree):
+            sequence = node.elts if isinstance(node, ast.Tuple) else node.args if isinstance(node, ast.Call) else []
+            for first, second in zip(sequence, sequence[1:]):
+                by, value = strategy(first), literal(second)
+                if by and value is not None:
+                    yield by, value
+            if isinstance(node, ast.Call):
+                keywords = {keyword.arg: keyword.value for keyword in node.keywords}
+                if "by" in keywords and "value" in keywords:
+                    by, value = strategy(keywords["by"]), literal(keywords["value"])
+                    if by and value is not None:
+                        yield by, value
+
+    def _check_page_object(self, tree: ast.AST, page_object_source: str) -> List[Dict[str, str]]:
+        """Attributes used on page object instances must exist on the class"""
+        class_name, members = self._page_object_members(page_object_source)
+        if class_name is None:
+            return []
+
+        def constructs_page(node) -> bool:
+            # CheckoutPage(driver) or CheckoutPage(driver).open()
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "open":
+                node = node.func.value
+            return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == class_name
+
+        instances = {
+            target.id
+            for node in ast.walk(tree) if isinstance(node, ast.Assign) and constructs_page(node.value)
+            for target in node.targets if isinstance(target, ast.Name)
+        }
+        problems, seen = [], set()
+        for node in ast.walk(tree):
+            if (
+                isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+                and node.value.id in instances and node.attr not in members and node.attr not in seen
+            ):
+                seen.add(node.attr)
+                problems.append({
+                    "rule": "unknown_page_object_member",
+                    "message": f"{class_name} has no member '{node.attr}'"
+                })
+        return problems
+
+    def _page_object_members(self, page_object_source: str) -> Tuple[Optional[str], Set[str]]:
+        """Class name and attribute names of a page object module, parsed once per module"""
+        key = ("page_object", compute_content_hash(page_object_source))
+        cached = self._pages.get(key)
+        if cached is None:
+            module = ast.parse(page_object_source)
+            page_class = next((node for node in module.body if isinstance(node, ast.ClassDef)), None)
+            if page_class is None:
+                cached = (None, set())
+            else:
+                cached = (page_class.name, {
+                    target.id
+                    for node in page_class.body if isinstance(node, ast.Assign)
+                    for target in node.targets if isinstance(target, ast.Name)
+                } | {node.name for node in page_class.body if isinstance(node, ast.FunctionDef)} | {"driver", "wait"})
+            self._pages.set(key, cached)
+        return cached
+
+    def _check_rules(self, tree: ast.AST) -> List[Dict[str, str]]:
+        problems = []
+        sleep_names = {
+            alias.asname or alias.name
+            for node in ast.walk(tree) if isinstance(node, ast.ImportFrom) and node.module == "time"
+            for alias in node.names if alias.name == "sleep"
+        }
+        has_assertion = False
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Assert):
+                has_assertion = True
+            elif isinstance(node, ast.Call):
+                func = node.func
+                if isinstance(func, ast.Attribute) and ASSERT_CALL.match(func.attr):
+                    has_assertion = True  # unittest self.assertEqual(...)
+                elif (
+                    isinstance(func, ast.Attribute) and func.attr == "sleep"
+                    and isinstance(func.value, ast.Name) and func.value.id == "time"
+                ) or (isinstance(func, ast.Name) and func.id in sleep_names):
+                    if "sleep" not in {problem["rule"] for problem in problems}:
+                        problems.append({"rule": "sleep", "message": "time.sleep() is not allowed; wait with WebDriverWait"})
+        if not has_assertion:
+            problems.append({"rule": "no_assertion", "message": "No assertion validates the expected result"})
+        return problems
+
+
+# Global script validator instance
+script_validator = ScriptValidator()
@@ -1,12 +1,28 @@
-import json
 from backend.services.vector_store import vector_store_service
 from backend.services.llm_service import llm_service
+from backend.services.embeddings import embedding_service
+from backend.services.html_analyzer import analyze_html
+from backend.services.element_index import ElementIndexService
+from backend.services.page_object_generator import page_object_generator
+from backend.services.script_validator import clean_script, script_validator
+from backend.services.usage import BudgetExceeded
+from backend.services.knowledge_base import knowledge_base_registry
 from backend.models.schemas import TestCase
-from bs4 import BeautifulSoup
-from typing import Dict, Any, List
-import re
+from backend.utils.cache import LRUCache
+from backend.utils.helpers import compute_content_hash
+from backend.utils.tracing import tracer
+from typing import Dict, Any, Optional, Tuple
 import logging
+import os
+from dotenv import load_dotenv
 
+load_dotenv()
+
+SELENIUM_PAGE_OBJECTS = os.getenv("SELENIUM_PAGE_OBJECTS", "true").lower() == "true"
+ELEMENT_PRUNING = os.getenv("ELEMENT_PRUNING", "true").lower() == "true"
+SCRIPT_VALIDATION = os.getenv("SCRIPT_VALIDATION", "true").lower() == "true"
+# Regenerations of a script that fails static validation
+SCRIPT_VALIDATION_RETRIES = int(os.getenv("SCRIPT_VALIDATION_RETRIES", "1"))
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +33,23 @@ class SeleniumScriptGenerator:
     def __init__(self):
         self.vector_store = vector_store_service
         self.llm = llm_service
+        self.page_objects = page_object_generator
+        self.use_page_objects = SELENIUM_PAGE_OBJECTS
+        self.use_pruning = ELEMENT_PRUNING
+        self.validator = script_validator if SCRIPT_VALIDATION else None
+        self.validation_retries = SCRIPT_VALIDATION_RETRIES
+        self.element_indexes = ElementIndexService(
+            embed_documents=embedding_service.embed_documents,
+            embed_query=embedding_service.embed_text
+        )
+        self._element_cache = LRUCache(max_size=32)
+        self._index_cache = LRUCache(max_size=32)
     
     def generate_script(
         self,
         test_case: TestCase,
-        html_content: str
+        html_content: str,
+        filters: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Generate Selenium script for a given test case
@@ -29,44 +57,62 @@ class SeleniumScriptGenerator:
         Args:
             test_case: TestCase object to convert to script
             html_content: HTML content of the target page
+            filters: Retrieval filters for the documentation context
             
         Returns:
             Dictionary with generated script and metadata
         """
         try:
-            logger.info(f"Generating Selenium script for {test_case.test_id}")
+            with tracer.span("generate_script", **{"test_case.id": test_case.test_id}) as span:
+                logger.info(f"Generating Selenium script for {test_case.test_id}")
             
-            # Step 1: Analyze HTML to extract element selectors
-            element_info = self._analyze_html(html_content)
+                # Step 1: Analyze HTML to extract element selectors
+                element_info = self._analyze_html(html_content)
+                page_object = self._page_object(html_content)
             
-            # Step 2: Retrieve relevant documentation
-            relevant_docs = self.vector_store.similarity_search(
-                query=f"{test_case.feature} {test_case.test_scenario}",
-                k=5,
-                score_threshold=0.5
-            )
+                # Step 2: Retrieve relevant documentation
+                relevant_docs = self.vector_store.similarity_search(
+                    query=f"{test_case.feature} {test_case.test_scenario}",
+                    k=5,
+                    score_threshold=0.5,
+                    filters=filters
+                )
             
-            context = [doc["text"] for doc in relevant_docs] if relevant_docs else []
+                context = [doc["text"] for doc in relevant_docs] if relevant_docs else []
             
-            # Step 3: Use enhanced LLM method with better prompts
-            script = self.llm.generate_selenium_script(
-                test_case=test_case.dict(),
-                html_elements=element_info,
-                context=context
-            )
+                # Step 3: Use enhanced LLM method with better prompts,
+                # sending only the elements relevant to this test case
+                with tracer.span("select_elements", **{"elements.pruned": self.use_pruning}):
+                    if page_object:
+                        html_elements, page_object_api = element_info, self._page_object_api(html_content, test_case)
+                    else:
+                        html_elements, page_object_api = self._relevant_elements(html_content, test_case), None
+                span.set_attributes(**{"retrieval.chunks": len(context), "script.page_object": bool(page_object)})
             
-            # Step 4: Validate and clean script
-            cleaned_script = self._clean_script(script)
+                script = self.llm.generate_selenium_script(
+                    test_case=test_case.dict(),
+                    html_elements=html_elements,
+                    context=context,
+                    page_object_api=page_object_api
+                )
             
-            logger.info(f"Successfully generated script for {test_case.test_id}")
+                # Step 4: Clean and validate script, regenerating it if validation fails
+                cleaned_script, validation = self._validated(self._clean_script(script), test_case, html_content)
             
-            return {
-                "success": True,
-                "script": cleaned_script,
-                "test_case_id": test_case.test_id,
-                "language": "python"
-            }
+                span.set_attribute("script.valid", validation["valid"] if validation else None)
+                logger.info(f"Successfully generated script for {test_case.test_id}")
+            
+                return {
+                    "success": True,
+                    "script": cleaned_script,
+                    "test_case_id": test_case.test_id,
+                    "language": "python",
+                    "page_object": page_object["source"] if page_object else None,
+                    "validation": validation
+                }
             
+        except BudgetExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error generating Selenium script: {str(e)}")
             return {
@@ -76,111 +122,161 @@ class SeleniumScriptGenerator:
                 "test_case_id": test_case.test_id
             }
     
-    def _analyze_html(self, html_content: str) -> Dict[str, Any]:
+    def repair_script(
+        self,
+        test_case: TestCase,
+        script: str,
+        error: str,
+        html_content: str,
+        escalate: bool = False
+    ) -> str:
         """
-        Analyze HTML to extract useful element information with detailed selectors
+        Regenerate a failing script using its error output
         
         Args:
-            html_content: HTML source code
+            test_case: TestCase the script implements
+            script: Script that failed
+            error: Error message, traceback and captured output of the failed run
+            html_content: HTML content of the target page
+            escalate: Use the larger model (an earlier repair did not fix the script)
             
         Returns:
-            Dictionary with comprehensive element information
+            Cleaned replacement script
         """
-        try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            elements_info = {
-                "buttons": [],
-                "inputs": [],
-                "selects": [],
-                "forms": [],
-                "radio_buttons": [],
-                "textareas": [],
-                "all_ids": [],
-                "clickable_elements": []
-            }
-            
-            # Extract ALL buttons with detailed info
-            for btn in soup.find_all('button'):
-                info = {
-                    "tag": "button",
-                    "id": btn.get('id', ''),
-                    "name": btn.get('name', ''),
-                    "class": ' '.join(btn.get('class', [])),
-                    "onclick": btn.get('onclick', ''),
-                    "text": btn.get_text(strip=True),
-                    "type": btn.get('type', 'button'),
-                    "selector_by_id": f"By.ID, '{btn.get('id')}'" if btn.get('id') else None,
-                    "selector_by_text": f"By.XPATH, \"//button[text()='{btn.get_text(strip=True)}']\"" if btn.get_text(strip=True) else None
-                }
-                elements_info["buttons"].append(info)
-                if btn.get('id'):
-                    elements_info["all_ids"].append(btn.get('id'))
-            
-            # Extract ALL input fields with detailed info
-            for inp in soup.find_all('input'):
-                info = {
-                    "tag": "input",
-                    "type": inp.get('type', 'text'),
-                    "id": inp.get('id', ''),
-                    "name": inp.get('name', ''),
-                    "placeholder": inp.get('placeholder', ''),
-                    "class": ' '.join(inp.get('class', [])),
-                    "value": inp.get('value', ''),
-                    "selector_by_id": f"By.ID, '{inp.get('id')}'" if inp.get('id') else None,
-                    "selector_by_name": f"By.NAME, '{inp.get('name')}'" if inp.get('name') else None
-                }
-                
-                # Separate radio buttons
-                if inp.get('type') == 'radio':
-                    elements_info["radio_buttons"].append(info)
-                else:
-                    elements_info["inputs"].append(info)
-                
-                if inp.get('id'):
-                    elements_info["all_ids"].append(inp.get('id'))
-            
-            # Extract textareas
-            for textarea in soup.find_all('textarea'):
-                info = {
-                    "tag": "textarea",
-                    "id": textarea.get('id', ''),
-                    "name": textarea.get('name', ''),
-                    "class": ' '.join(textarea.get('class', [])),
-                    "placeholder": textarea.get('placeholder', ''),
-                    "selector_by_id": f"By.ID, '{textarea.get('id')}'" if textarea.get('id') else None,
-                    "selector_by_name": f"By.NAME, '{textarea.get('name')}'" if textarea.get('name') else None
-                }
-                elements_info["textareas"].append(info)
-                if textarea.get('id'):
-                    elements_info["all_ids"].append(textarea.get('id'))
-            
-            # Extract forms
-            for form in soup.find_all('form'):
-                info = {
-                    "tag": "form",
-                    "id": form.get('id', ''),
-                    "name": form.get('name', ''),
-                    "action": form.get('action', ''),
-                    "method": form.get('method', ''),
-                    "selector_by_id": f"By.ID, '{form.get('id')}'" if form.get('id') else None
-                }
-                elements_info["forms"].append(info)
-            
-            # Extract clickable elements (with onclick)
-            for elem in soup.find_all(onclick=True):
-                elements_info["clickable_elements"].append({
-                    "tag": elem.name,
-                    "id": elem.get('id', ''),
-                    "text": elem.get_text(strip=True),
-                    "onclick": elem.get('onclick')
-                })
-            
-            return elements_info
-            
-        except Exception as e:
-            logger.error(f"Error analyzing HTML: {str(e)}")
+        logger.info(f"Repairing Selenium script for {test_case.test_id}")
+        
+        page_object = self._page_object(html_content)
+        
+        repaired = self.llm.repair_selenium_script(
+            test_case=test_case.dict(),
+            script=script,
+            error=error,
+            html_elements=self._relevant_elements(html_content, test_case),
+            page_object_api=self._page_object_api(html_content, test_case) if page_object else None,
+            escalate=escalate
+        )
+        
+        return self._validated(self._clean_script(repaired), test_case, html_content)[0]
+    
+    def validate_script(self, script: str, html_content: str) -> Dict[str, Any]:
+        """Static validation of a script against the page (see ScriptValidator.validate)"""
+        page_object = self._page_object(html_content)
+        with tracer.span("validate_script") as span:
+            validation = self.validator.validate(
+                script,
+                html_content,
+                self._analyze_html(html_content),
+                page_object["source"] if page_object else None
+            )
+            span.set_attributes(**{"script.valid": validation["valid"], "script.errors": len(validation["errors"])})
+        return validation
+    
+    def _validated(
+        self,
+        script: str,
+        test_case: TestCase,
+        html_content: str
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Validate a cleaned script and regenerate it, on the larger model, with the problems found until it passes
+        
+        Returns:
+            The last script and its validation, with the number of regenerations
+        """
+        if not self.validator:
+            return script, None
+        
+        validation = self.validate_script(script, html_content)
+        regenerations = 0
+        while not validation["valid"] and regenerations < self.validation_retries:
+            regenerations += 1
+            logger.info(
+                f"Regenerating script for {test_case.test_id}: {len(validation['errors'])} validation errors"
+            )
+            page_object = self._page_object(html_content)
+            try:
+                regenerated = self.llm.repair_selenium_script(
+                    test_case=test_case.dict(),
+                    script=script,
+                    error="Static validation failed:\n" + "\n".join(f"- {error}" for error in validation["errors"]),
+                    html_elements=self._relevant_elements(html_content, test_case),
+                    page_object_api=self._page_object_api(html_content, test_case) if page_object else None,
+                    escalate=True
+                )
+            except Exception as e:
+                # The script we have is still returned, with its validation errors
+                logger.error(f"Error regenerating script for {test_case.test_id}: {str(e)}")
+                break
+            script = self._clean_script(regenerated)
+            validation = self.validate_script(script, html_content)
+        
+        if not validation["valid"]:
+            logger.warning(f"Script for {test_case.test_id} still fails validation: {validation['errors']}")
+        return script, {**validation, "regenerations": regenerations}
+    
+    def prepare_html(self, html_content: str):
+        """Build the element index, page object and relevance indexes for an uploaded page"""
+        self._analyze_html(html_content)
+        self._page_object(html_content)
+        if self.use_pruning:
+            self._relevance_indexes(html_content)
+    
+    def support_files(self, html_content: str) -> Dict[str, str]:
+        """Modules generated scripts import, keyed by filename"""
+        page_object = self._page_object(html_content)
+        if not page_object:
             return {}
+        return {f"{page_object['module_name']}.py": page_object["source"]}
+    
+    def _page_object(self, html_content: str) -> Optional[Dict[str, Any]]:
+        if not self.use_page_objects:
+            return None
+        return self.page_objects.get_page_object(html_content, self._analyze_html(html_content))
+    
+    def _relevance_indexes(self, html_content: str) -> Dict[str, Any]:
+        """Element and page object indexes, embedded once per page and knowledge base version"""
+        key = knowledge_base_registry.cache_key(compute_content_hash(html_content))
+        indexes = self._index_cache.get(key)
+        if indexes is None:
+            page_object = self._page_object(html_content)
+            indexes = {
+                "elements": self.element_indexes.build_element_index(self._analyze_html(html_content)),
+                "api": self.element_indexes.build_api_index(page_object["api"]) if page_object else None
+            }
+            self._index_cache.set(key, indexes)
+        return indexes
+    
+    def _relevant_elements(self, html_content: str, test_case: TestCase) -> Dict[str, Any]:
+        element_info = self._analyze_html(html_content)
+        if not self.use_pruning:
+            return {k: v for k, v in element_info.items() if k != "all_ids"}
+        return self.element_indexes.prune_elements(
+            self._relevance_indexes(html_content)["elements"],
+            element_info,
+            test_case.dict()
+        )
+    
+    def _page_object_api(self, html_content: str, test_case: TestCase) -> str:
+        page_object = self._page_object(html_content)
+        api = None
+        if self.use_pruning:
+            api = self.element_indexes.prune_api(
+                self._relevance_indexes(html_content)["api"],
+                page_object["api"],
+                test_case.dict()
+            )
+        return self.page_objects.format_api(page_object, api)
+    
+    def _analyze_html(self, html_content: str) -> Dict[str, Any]:
+        """Element index of the HTML, computed once per page and knowledge base version"""
+        key = knowledge_base_registry.cache_key(compute_content_hash(html_content))
+        with tracer.span("analyze_html") as span:
+            element_info = self._element_cache.get(key)
+            span.set_attribute("cache.hit", element_info is not None)
+            if element_info is None:
+                element_info = analyze_html(html_content)
+                self._element_cache.set(key, element_info)
+        return element_info
     
     def _clean_script(self, script: str) -> str:
         """
@@ -192,36 +288,8 @@ class SeleniumScriptGenerator:
         Returns:
             Cleaned script
         """
-        # Remove markdown code blocks if present
-        script = re.sub(r'^```python\s*', '', script, flags=re.MULTILINE)
-        script = re.sub(r'^```\s*$', '', script, flags=re.MULTILINE)
-        script = script.strip()
-        
-        # Ensure proper imports are present
-        required_imports = [
-            "from selenium import webdriver",
-            "from selenium.webdriver.common.by import By",
-            "from selenium.webdriver.support.ui import WebDriverWait",
-            "from selenium.webdriver.support import expected_conditions as EC"
-        ]
-        
-        # Check if imports are present
-        has_imports = any(imp in script for imp in required_imports)
-        
-        if not has_imports:
-            # Add imports at the beginning
-            imports_block = """from selenium import webdriver
-                    from selenium.webdriver.common.by import By
-                    from selenium.webdriver.support.ui import WebDriverWait
-                    from selenium.webdriver.support import expected_conditions as EC
-                    from selenium.webdriver.chrome.service import Service
-                    from webdriver_manager.chrome import ChromeDriverManager
-                    import os
-                    import time
-                """
-            script = imports_block + script
-        
-        return script
+        with tracer.span("clean_script"):
+            return clean_script(script)
 
 
 # Global selenium generator instance
@@ -0,0 +1,145 @@
+"""
+Prompt builders for Selenium script generation and repair.
+
+Prompts are plain functions of their inputs so their size can be measured
+(see ``benchmarks/selenium_prompt_tokens.py``) without an LLM client.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import json
+
+
+def build_selenium_prompt(
+    test_case: Dict[str, Any],
+    html_elements: Dict[str, Any],
+    context: List[str],
+) -> Tuple[str, str]:
+    """System and user prompt embedding the full HTML element index"""
+
+    elements_json = json.dumps(html_elements, indent=2)
+    steps = test_case.get("test_steps", [])
+    steps_text = "\n".join([f"- {s}" for s in steps])
+
+    sys_msg = """
+        You are a senior automation engineer (10+ years experience).
+        Generate a production-grade Python Selenium script.
+
+        NON-NEGOTIABLE RULES:
+        1. Use ONLY element selectors provided in html_elements. NEVER invent selectors.
+        2. Forbidden selectors: generic XPaths (//button, //*). Do NOT use them.
+        3. Always use WebDriverWait (no time.sleep).
+        4. Use webdriver-manager for Chrome.
+        5. Every script MUST include at least one assertion validating the expected result.
+        6. If a required selector is missing, include:
+        # ERROR: Selector missing in html_elements
+        7. Load checkout page using:
+        driver.get("file://" + os.path.abspath("checkout.html"))
+        8. Output ONLY Python code (no markdown).
+    """
+
+    user_prompt = f"""
+        Generate Selenium script for the following test case:
+
+        === TEST CASE ===
+        Test ID: {test_case.get("test_id")}
+        Feature: {test_case.get("feature")}
+        Scenario: {test_case.get("test_scenario")}
+        Type: {test_case.get("test_type")}
+        Preconditions: {test_case.get("preconditions")}
+        Steps:
+        {steps_text}
+        Expected Result:
+        {test_case.get("expected_result")}
+
+        === HTML ELEMENTS ===
+        {elements_json}
+
+        === CONTEXT (Documentation) ===
+        {context[0] if context else "No context"}
+
+        Output:
+        - ONLY Python code
+        - No markdown
+        - No comments outside the Python script
+        """
+
+    return sys_msg, user_prompt
+
+
+def build_page_object_prompt(
+    test_case: Dict[str, Any],
+    page_object_api: str,
+    context: List[str],
+) -> Tuple[str, str]:
+    """Compact system and user prompt targeting the shared page object API"""
+
+    steps_text = "\n".join(f"- {s}" for s in test_case.get("test_steps", []))
+
+    sys_msg = (
+        "You are a senior automation engineer. Write a Python Selenium script for one test case.\n"
+        "RULES:\n"
+        "1. Interact with the page ONLY through the page object API given. Never write raw locators.\n"
+        "2. Driver: webdriver.Chrome(service=Service(ChromeDriverManager().install())) from webdriver-manager.\n"
+        "3. Open the page with the page object's open(); quit the driver in a finally block.\n"
+        "4. No time.sleep; page object methods already wait.\n"
+        "5. At least one assert validating the expected result.\n"
+        "6. If a needed method is missing, add: # ERROR: Method missing in page object\n"
+        "7. Output ONLY Python code (no markdown)."
+    )
+
+    user_prompt = (
+        f"TEST {test_case.get('test_id')} ({test_case.get('test_type')}): {test_case.get('test_scenario')}\n"
+        f"Preconditions: {test_case.get('preconditions')}\n"
+        f"Steps:\n{steps_text}\n"
+        f"Expected: {test_case.get('expected_result')}\n\n"
+        f"PAGE OBJECT API:\n{page_object_api}\n\n"
+        f"DOC CONTEXT:\n{context[0] if context else 'No context'}"
+    )
+
+    return sys_msg, user_prompt
+
+
+def build_repair_prompt(
+    test_case: Dict[str, Any],
+    script: str,
+    error: str,
+    html_elements: Dict[str, Any],
+    page_object_api: Optional[str] = None,
+) -> Tuple[str, str]:
+    """System and user prompt for regenerating a failing script"""
+
+    elements_json = json.dumps(html_elements, separators=(",", ":"))
+
+    sys_msg = """
+        You are a senior automation engineer fixing a failing Python Selenium script.
+
+        NON-NEGOTIABLE RULES:
+        1. Fix the cause of the reported failure; keep everything that already works.
+        2. Use ONLY element selectors provided in html_elements. NEVER invent selectors.
+        3. Always use WebDriverWait (no time.sleep).
+        4. Keep at least one assertion validating the expected result.
+        5. Output ONLY the complete corrected Python code (no markdown).
+    """
+
+    user_prompt = f"""
+        The following script failed for this test case.
+
+        === TEST CASE ===
+        Test ID: {test_case.get("test_id")}
+        Scenario: {test_case.get("test_scenario")}
+        Expected Result:
+        {test_case.get("expected_result")}
+
+        === FAILING SCRIPT ===
+        {script}
+
+        === ERROR ===
+        {error}
+
+        === HTML ELEMENTS ===
+        {elements_json}
+        """
+
+    if page_object_api:
+        user_prompt += f"\n=== PAGE OBJECT API (keep using it) ===\n{page_object_api}\n"
+
+    return sys_msg, user_prompt
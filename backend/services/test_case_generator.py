@@ -1,7 +1,9 @@
 from backend.services.vector_store import vector_store_service
 from backend.services.llm_service import llm_service
+from backend.services.usage import BudgetExceeded
+from backend.utils.tracing import tracer
 from backend.models.schemas import TestCase
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import json
 import re
 import logging
@@ -19,7 +21,8 @@ class TestCaseGenerator:
     def generate_test_cases(
         self,
         query: str,
-        max_results: int = 10
+        max_results: int = 10,
+        filters: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Generate test cases based on user query using RAG
@@ -27,92 +30,102 @@ class TestCaseGenerator:
         Args:
             query: User's test case generation request
             max_results: Maximum number of test cases to generate
+            filters: Retrieval filters (sources, file_types, section, pages, project)
 
         Returns:
             Dictionary with test cases and metadata
         """
         try:
-            logger.info(f"Generating test cases for query: {query}")
-
-            # Step 1: Retrieve relevant documents from vector store
-            relevant_docs = self.vector_store.similarity_search(
-                query=query,
-                k=8,  # Get top 8 relevant chunks
-                score_threshold=0.5
-            )
+            with tracer.span("generate_test_cases", **{"test_cases.requested": max_results}) as span:
+                logger.info(f"Generating test cases for query: {query}")
+
+                # Step 1: Retrieve relevant documents from vector store
+                relevant_docs = self.vector_store.similarity_search(
+                    query=query,
+                    k=8,  # Get top 8 relevant chunks
+                    score_threshold=0.5,
+                    filters=filters
+                )
+
+                if not relevant_docs:
+                    logger.warning("No relevant documents found in knowledge base")
+                    return {
+                        "success": False,
+                        "error": "No relevant documentation found. Please build knowledge base first.",
+                        "test_cases": [],
+                        "sources_used": []
+                    }
+
+                # Step 2: Extract context and sources
+                context = [doc["text"] for doc in relevant_docs]
+                sources = list(set([doc["source"] for doc in relevant_docs]))
+
+                logger.info(
+                    f"Retrieved {len(relevant_docs)} relevant documents from {len(sources)} sources")
+                span.set_attribute("retrieval.chunks", len(relevant_docs))
+
+                # Step 3: Generate test cases using LLM with RAG
+                system_message = self._get_system_prompt()
+
+                test_case_prompt = f"""Based on the provided documentation, generate comprehensive test cases for the following request:
+
+                       "{query}"
+                   
+                        Requirements:
+                        - Generate {max_results} test cases (or fewer if not applicable)
+                        - Include both positive and negative test scenarios
+                        - Each test case must reference the source document
+                        - Include specific test steps
+                        - Provide clear expected results
+                        - Only include features/functionality explicitly mentioned in the documentation
+                        - DO NOT hallucinate or invent features not in the documentation
+
+                        Return ONLY a valid JSON array of test cases with this exact structure:
+                        [
+                          {{
+                            "test_id": "TC-001",
+                            "feature": "Feature name",
+                            "test_scenario": "Detailed scenario description",
+                            "test_type": "positive/negative/edge-case",
+                            "preconditions": "Any prerequisites",
+                            "test_steps": ["Step 1", "Step 2", "Step 3"],
+                            "expected_result": "What should happen",
+                            "grounded_in": "source_document.md",
+                            "priority": "High/Medium/Low"
+                          }}
+                        ]
+
+                        IMPORTANT: Return ONLY the JSON array, no markdown formatting, no explanations."""
+
+                # Generate with RAG; an answer that does not parse is asked again of the larger model
+                response = self.llm.generate_with_rag(
+                    query=test_case_prompt,
+                    context=context,
+                    system_message=system_message,
+                    task="test_cases",
+                    items=max_results,
+                    accept=lambda answer: bool(self._parse_test_cases(answer)),
+                )
+
+                # Step 4: Parse response into structured test cases
+                test_cases = self._parse_test_cases(response)
+
+                # Step 5: Validate test cases are grounded in documentation
+                validated_test_cases = self._validate_grounding(
+                    test_cases, sources)
+
+                span.set_attribute("test_cases.generated", len(validated_test_cases))
+                logger.info(f"Generated {len(validated_test_cases)} test cases")
 
-            if not relevant_docs:
-                logger.warning("No relevant documents found in knowledge base")
                 return {
-                    "success": False,
-                    "error": "No relevant documentation found. Please build knowledge base first.",
-                    "test_cases": [],
-                    "sources_used": []
+                    "success": True,
+                    "test_cases": validated_test_cases,
+                    "total_generated": len(validated_test_cases),
+                    "sources_used": sources
                 }
 
-            # Step 2: Extract context and sources
-            context = [doc["text"] for doc in relevant_docs]
-            sources = list(set([doc["source"] for doc in relevant_docs]))
-
-            logger.info(
-                f"Retrieved {len(relevant_docs)} relevant documents from {len(sources)} sources")
-
-            # Step 3: Generate test cases using LLM with RAG
-            system_message = self._get_system_prompt()
-
-            test_case_prompt = f"""Based on the provided documentation, generate comprehensive test cases for the following request:
-
-                   "{query}"
-                   
-                    Requirements:
-                    - Generate {max_results} test cases (or fewer if not applicable)
-                    - Include both positive and negative test scenarios
-                    - Each test case must reference the source document
-                    - Include specific test steps
-                    - Provide clear expected results
-                    - Only include features/functionality explicitly mentioned in the documentation
-                    - DO NOT hallucinate or invent features not in the documentation
-
-                    Return ONLY a valid JSON array of test cases with this exact structure:
-                    [
-                      {{
-                        "test_id": "TC-001",
-                        "feature": "Feature name",
-                        "test_scenario": "Detailed scenario description",
-                        "test_type": "positive/negative/edge-case",
-                        "preconditions": "Any prerequisites",
-                        "test_steps": ["Step 1", "Step 2", "Step 3"],
-                        "expected_result": "What should happen",
-                        "grounded_in": "source_document.md",
-                        "priority": "High/Medium/Low"
-                      }}
-                    ]
-
-                    IMPORTANT: Return ONLY the JSON array, no markdown formatting, no explanations."""
-
-            # Generate with RAG
-            response = self.llm.generate_with_rag(
-                query=test_case_prompt,
-                context=context,
-                system_message=system_message,
-            )
-
-            # Step 4: Parse response into structured test cases
-            test_cases = self._parse_test_cases(response)
-
-            # Step 5: Validate test cases are grounded in documentation
-            validated_test_cases = self._validate_grounding(
-                test_cases, sources)
-
-            logger.info(f"Generated {len(validated_test_cases)} test cases")
-
-            return {
-                "success": True,
-                "test_cases": validated_test_cases,
-                "total_generated": len(validated_test_cases),
-                "sources_used": sources
-            }
-
+        except BudgetExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error generating test cases: {str(e)}")
             return {
@@ -0,0 +1,198 @@
+"""
+Suites of generated test cases.
+
+Every generation is saved as a suite in the shared state store, so clients
+(and every API process) can page, filter and search it server-side instead
+of holding and re-rendering the whole list. Suites are immutable once
+saved; parsed suites are kept in an LRU cache, which is only served after
+checking the suite still exists (another process may have reset or pruned
+it). Scripts generated for a suite's test cases are stored next to it, one
+key per test case.
+
+Only the newest ``TEST_SUITE_MAX_SUITES`` suites, created within the last
+``TEST_SUITE_TTL_DAYS``, are kept; older ones are pruned, with their
+scripts, whenever a suite is created.
+"""
+from backend.utils.cache import LRUCache
+from backend.utils.state_store import state_store
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import logging
+import os
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TEST_SUITE_CACHE_SIZE = int(os.getenv("TEST_SUITE_CACHE_SIZE", "16"))
+TEST_SUITE_MAX_SUITES = int(os.getenv("TEST_SUITE_MAX_SUITES", "500"))
+TEST_SUITE_TTL_DAYS = float(os.getenv("TEST_SUITE_TTL_DAYS", "30"))  # 0 = no expiry
+TEST_CASES_MAX_PAGE_SIZE = 200
+
+# Fields matched by text search
+SEARCH_FIELDS = ("test_id", "feature", "test_scenario", "preconditions", "expected_result", "grounded_in")
+
+logger = logging.getLogger(__name__)
+
+
+class TestCaseStore:
+    """Saved test case suites with paginated, filtered listing"""
+
+    NAMESPACE = "test_suites"
+    SCRIPTS_NAMESPACE = "suite_scripts"
+    # suite_id -> created_at, to prune without loading the suites
+    INDEX_NAMESPACE = "test_suite_index"
+
+    def __init__(self):
+        self.store = state_store
+        self.max_suites = TEST_SUITE_MAX_SUITES
+        self.ttl = timedelta(days=TEST_SUITE_TTL_DAYS) if TEST_SUITE_TTL_DAYS > 0 else None
+        self._suites = LRUCache(max_size=TEST_SUITE_CACHE_SIZE)
+
+    def create_suite(
+        self,
+        test_cases: List[Dict[str, Any]],
+        query: str = "",
+        sources_used: Optional[List[str]] = None,
+        kb_version: Optional[int] = None
+    ) -> str:
+        """Save test cases as a new suite and return its id"""
+        suite_id = uuid.uuid4().hex[:12]
+        created_at = datetime.now(timezone.utc).isoformat()
+        self.store.set(self.NAMESPACE, suite_id, {
+            "suite_id": suite_id,
+            "query": query,
+            "created_at": created_at,
+            "kb_version": kb_version,
+            "sources_used": sources_used or [],
+            "test_cases": test_cases
+        })
+        self.store.set(self.INDEX_NAMESPACE, suite_id, created_at)
+        logger.info(f"Saved test suite {suite_id} with {len(test_cases)} test cases")
+        self.prune()
+        return suite_id
+
+    def get_suite(self, suite_id: str) -> Optional[Dict[str, Any]]:
+        suite = self._suites.get(suite_id)
+        if suite is not None and not self.store.contains(self.NAMESPACE, suite_id):
+            self._suites.delete(suite_id)
+            return None
+        if suite is None:
+            suite = self.store.get(self.NAMESPACE, suite_id)
+            if suite is None:
+                return None
+            if not self.store.contains(self.INDEX_NAMESPACE, suite_id):
+                # Saved before suites were indexed; index it so it can be pruned
+                self.store.set(self.INDEX_NAMESPACE, suite_id, suite.get("created_at") or "")
+            # Lower-cased search text per case, built once per suite
+            suite["_search"] = [
+                " ".join([str(tc.get(field) or "") for field in SEARCH_FIELDS] + tc.get("test_steps", [])).lower()
+                for tc in suite["test_cases"]
+            ]
+            self._suites.set(suite_id, suite)
+        return suite
+
+    def list_test_cases(
+        self,
+        suite_id: str,
+        page: int = 1,
+        page_size: int = 25,
+        feature: Optional[str] = None,
+        test_type: Optional[str] = None,
+        priority: Optional[str] = None,
+        search: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        One page of a suite's test cases as compact rows
+
+        Args:
+            suite_id: Suite to list
+            page: 1-based page number
+            page_size: Rows per page (at most TEST_CASES_MAX_PAGE_SIZE)
+            feature, test_type, priority: Exact matches, case-insensitive
+            search: Words that must all appear in the case's text
+
+        Returns:
+            Rows, totals and the values available to filter on, or None for an unknown suite
+        """
+        suite = self.get_suite(suite_id)
+        if suite is None:
+            return None
+
+        page_size = max(1, min(page_size, TEST_CASES_MAX_PAGE_SIZE))
+        exact = {"feature": feature, "test_type": test_type, "priority": priority}
+        exact = {field: value.lower() for field, value in exact.items() if value}
+        words = search.lower().split() if search else []
+
+        matches = [
+            tc for tc, text in zip(suite["test_cases"], suite["_search"])
+            if all(str(tc.get(field) or "").lower() == value for field, value in exact.items())
+            and all(word in text for word in words)
+        ]
+        pages = max(1, -(-len(matches) // page_size))
+        page = max(1, min(page, pages))
+        start = (page - 1) * page_size
+
+        return {
+            "suite_id": suite_id,
+            "query": suite["query"],
+            "total": len(suite["test_cases"]),
+            "matched": len(matches),
+            "page": page,
+            "page_size": page_size,
+            "pages": pages,
+            "items": [self._summary(tc) for tc in matches[start:start + page_size]],
+            "facets": {
+                field: sorted({str(tc.get(field) or "") for tc in suite["test_cases"]} - {""})
+                for field in ("feature", "test_type", "priority")
+            }
+        }
+
+    def get_test_case(self, suite_id: str, test_id: str) -> Optional[Dict[str, Any]]:
+        suite = self.get_suite(suite_id)
+        if suite is None:
+            return None
+        return next((tc for tc in suite["test_cases"] if tc["test_id"] == test_id), None)
+
+    def save_script(self, suite_id: str, test_id: str, script: str):
+        """Latest generated (or repaired) script of a test case in the suite"""
+        self.store.set(self.SCRIPTS_NAMESPACE, f"{suite_id}/{test_id}", script)
+
+    def get_script(self, suite_id: str, test_id: str) -> Optional[str]:
+        return self.store.get(self.SCRIPTS_NAMESPACE, f"{suite_id}/{test_id}")
+
+    def prune(self) -> int:
+        """Delete the suites beyond the newest ``max_suites`` or older than the TTL; returns how many"""
+        suites = sorted(self.store.items(self.INDEX_NAMESPACE), key=lambda item: item[1], reverse=True)
+        expired = [suite_id for suite_id, _ in suites[self.max_suites:]]
+        if self.ttl is not None:
+            oldest = (datetime.now(timezone.utc) - self.ttl).isoformat()
+            expired += [suite_id for suite_id, created_at in suites[:self.max_suites] if created_at < oldest]
+        for suite_id in expired:
+            self.store.delete(self.NAMESPACE, suite_id)
+            self.store.delete(self.SCRIPTS_NAMESPACE, prefix=f"{suite_id}/")
+            self.store.delete(self.INDEX_NAMESPACE, suite_id)
+            self._suites.delete(suite_id)
+        if expired:
+            logger.info(f"Pruned {len(expired)} test suites")
+        return len(expired)
+
+    def clear(self):
+        self.store.delete(self.NAMESPACE)
+        self.store.delete(self.SCRIPTS_NAMESPACE)
+        self.store.delete(self.INDEX_NAMESPACE)
+        self._suites.clear()
+
+    def _summary(self, test_case: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "test_id": test_case["test_id"],
+            "feature": test_case["feature"],
+            "test_type": test_case["test_type"],
+            "priority": test_case.get("priority"),
+            "test_scenario": test_case["test_scenario"],
+            "steps": len(test_case.get("test_steps", []))
+        }
+
+
+# Global test case store instance
+test_case_store = TestCaseStore()
@@ -0,0 +1,261 @@
+"""
+Token and cost accounting for LLM calls, with daily budgets.
+
+Every chat completion made through LLMService is recorded with its token
+usage and estimated cost, aggregated per day, endpoint, project and model
+in the shared state store, so every API worker and the CLI add to the same
+totals. Calls are attributed through a context-local scope: the API sets
+the endpoint per request (and the project when the request filters on
+one), the CLI sets its own. Work handed to thread pools keeps the scope
+when submitted through ``contextvars.copy_context().run``.
+
+Budgets (USD per UTC day, overall and per project) are checked before
+every call that would reach the provider. Over budget, calls are rejected
+with BudgetExceeded, or with ``LLM_BUDGET_ACTION=degrade`` sent to the
+cheaper ``LLM_BUDGET_FALLBACK_MODEL``. Responses cached by LLMService are
+still served, and cost nothing.
+"""
+from backend.utils.state_store import state_store
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import logging
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# USD per million (input, output) tokens; models not listed (local servers) cost nothing
+DEFAULT_LLM_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-3.5-turbo": (0.50, 1.50)
+}
+LLM_PRICES = {**DEFAULT_LLM_PRICES, **json.loads(os.getenv("LLM_PRICES") or "{}")}
+
+LLM_DAILY_BUDGET_USD = float(os.getenv("LLM_DAILY_BUDGET_USD", "0"))
+LLM_PROJECT_DAILY_BUDGET_USD = float(os.getenv("LLM_PROJECT_DAILY_BUDGET_USD", "0"))
+LLM_BUDGET_ACTION = os.getenv("LLM_BUDGET_ACTION", "reject")  # reject | degrade
+LLM_BUDGET_FALLBACK_MODEL = os.getenv("LLM_BUDGET_FALLBACK_MODEL", "")
+
+DEFAULT_PROJECT = "default"
+UNSCOPED = "unscoped"
+
+logger = logging.getLogger(__name__)
+
+_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("llm_usage_scope", default=None)
+
+
+class BudgetExceeded(Exception):
+    """An LLM call was refused because a daily budget is spent"""
+
+
+class UsageTracker:
+    """Records LLM usage per day, endpoint, project and model, and enforces budgets"""
+
+    NAMESPACE = "llm_usage"
+    FIELDS = ("calls", "cached_calls", "prompt_tokens", "completion_tokens", "total_tokens", "max_tokens", "cost_usd")
+
+    def __init__(self):
+        self.store = state_store
+        self.prices = LLM_PRICES
+        self.daily_budget = LLM_DAILY_BUDGET_USD
+        self.project_budget = LLM_PROJECT_DAILY_BUDGET_USD
+        self.action = LLM_BUDGET_ACTION
+        self.fallback_model = LLM_BUDGET_FALLBACK_MODEL
+        self._lock = threading.Lock()
+
+    # ========================== ATTRIBUTION ==========================
+    @contextmanager
+    def scope(self, endpoint: str, project: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Attribute the LLM calls made inside the block
+
+        Yields:
+            The scope's running totals (calls, cached_calls, tokens, cost_usd)
+        """
+        current = {"endpoint": endpoint, "project": project, "calls": 0, "cached_calls": 0, "tokens": 0, "cost_usd": 0.0}
+        token = _scope.set(current)
+        try:
+            yield current
+        finally:
+            _scope.reset(token)
+
+    def set_project(self, project: Optional[str]):
+        """Attribute the rest of the current scope to ``project``"""
+        current = _scope.get()
+        if current is not None and project:
+            current["project"] = project
+
+    # ========================== RECORDING ==========================
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Estimated USD cost; dated model names use their base model's price"""
+        price = self.prices.get(model)
+        if price is None:
+            base = max((name for name in self.prices if model.startswith(name)), key=len, default=None)
+            price = self.prices.get(base, (0.0, 0.0))
+        return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+    def record(
+        self,
+        model: str,
+        usage: Optional[Dict[str, int]],
+        max_tokens: int = 0,
+        cached: bool = False
+    ):
+        """Add one call (or one response served from cache) to today's totals"""
+        usage = usage or {}
+        prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+        cost = 0.0 if cached else self.cost(model, prompt_tokens, completion_tokens)
+
+        current = _scope.get() or {}
+        key = self._key(
+            self._day(),
+            current.get("endpoint") or UNSCOPED,
+            current.get("project") or DEFAULT_PROJECT,
+            model
+        )
+        amounts = {
+            "calls": 0 if cached else 1,
+            "cached_calls": 1 if cached else 0,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": int(usage.get("total_tokens") or prompt_tokens + completion_tokens),
+            "max_tokens": 0 if cached else max_tokens,
+            "cost_usd": cost
+        }
+        try:
+            self.store.increment(self.NAMESPACE, key, amounts)
+        except Exception as e:
+            # Accounting must never fail the call it accounts for
+            logger.error(f"Error recording LLM usage: {str(e)}")
+
+        if current:
+            with self._lock:
+                current["calls"] += amounts["calls"]
+                current["cached_calls"] += amounts["cached_calls"]
+                current["tokens"] += amounts["total_tokens"]
+                current["cost_usd"] += cost
+
+    # ========================== BUDGETS ==========================
+    def check_budget(self, model: str) -> str:
+        """
+        Model to call under the current budgets
+
+        Returns:
+            ``model``, or the fallback model when a budget is spent and the action is degrade
+
+        Raises:
+            BudgetExceeded: A budget is spent and calls are rejected
+        """
+        if not self.daily_budget and not self.project_budget:
+            return model
+
+        project = (_scope.get() or {}).get("project") or DEFAULT_PROJECT
+        spent = self.spent_today()
+        reason = None
+        if self.daily_budget and spent["total"] >= self.daily_budget:
+            reason = f"Daily LLM budget of ${self.daily_budget:g} is spent (${spent['total']:.4f})"
+        elif self.project_budget and spent["projects"].get(project, 0.0) >= self.project_budget:
+            reason = (
+                f"Daily LLM budget of ${self.project_budget:g} for project '{project}' "
+                f"is spent (${spent['projects'][project]:.4f})"
+            )
+        if reason is None:
+            return model
+
+        if self.action == "degrade" and self.fallback_model and self.fallback_model != model:
+            logger.warning(f"{reason}; using {self.fallback_model} instead of {model}")
+            return self.fallback_model
+        raise BudgetExceeded(reason)
+
+    def spent_today(self) -> Dict[str, Any]:
+        """USD spent today, overall and per project"""
+        projects: Dict[str, float] = {}
+        # Keys of one day share the JSON prefix '["<day>", '
+        for key, value in self.store.items(self.NAMESPACE, prefix=self._key(self._day())[:-1] + ", "):
+            project = self._dimensions(key)[2]
+            projects[project] = projects.get(project, 0.0) + value.get("cost_usd", 0.0)
+        return {"total": sum(projects.values()), "projects": projects}
+
+    # ========================== REPORTING ==========================
+    def report(self, days: int = 7, project: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Usage of the last ``days`` days (today included)
+
+        Returns:
+            Rows per day, endpoint, project and model; totals grouped by each of
+            them; today's spend against the budgets
+        """
+        first_day = (datetime.now(timezone.utc) - timedelta(days=max(days, 1) - 1)).strftime("%Y-%m-%d")
+        rows = []
+        for key, value in self.store.items(self.NAMESPACE):
+            day, endpoint, row_project, model = self._dimensions(key)
+            if day < first_day or (project and row_project != project):
+                continue
+            rows.append({
+                "day": day,
+                "endpoint": endpoint,
+                "project": row_project,
+                "model": model,
+                **{field: value.get(field, 0) for field in self.FIELDS}
+            })
+
+        def summed(selected: List[Dict[str, Any]]) -> Dict[str, float]:
+            total = {field: sum(row[field] for row in selected) for field in self.FIELDS}
+            total["cost_usd"] = round(total["cost_usd"], 6)
+            return total
+
+        def grouped(dimension: str) -> Dict[str, Dict[str, float]]:
+            names = sorted({row[dimension] for row in rows})
+            return {name: summed([row for row in rows if row[dimension] == name]) for name in names}
+
+        spent = self.spent_today()
+        return {
+            "days": days,
+            "project": project,
+            "totals": summed(rows),
+            "by_day": grouped("day"),
+            "by_endpoint": grouped("endpoint"),
+            "by_project": grouped("project"),
+            "by_model": grouped("model"),
+            "rows": rows,
+            "budget": {
+                "daily_usd": self.daily_budget or None,
+                "project_daily_usd": self.project_budget or None,
+                "spent_today_usd": round(spent["total"], 6),
+                "spent_today_by_project_usd": {name: round(cost, 6) for name, cost in spent["projects"].items()},
+                "action": self.action,
+                "fallback_model": self.fallback_model or None
+            }
+        }
+
+    def clear(self):
+        self.store.delete(self.NAMESPACE)
+
+    @staticmethod
+    def _key(*dimensions: str) -> str:
+        # A JSON list, so project names and models may contain any character
+        return json.dumps(list(dimensions))
+
+    @staticmethod
+    def _dimensions(key: str) -> List[str]:
+        """(day, endpoint, project, model) of a key"""
+        if key.startswith("["):
+            return json.loads(key)
+        # Written before keys were JSON: day|endpoint|project|model
+        return key.split("|", 3)
+
+    def _day(self) -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+# Global usage tracker instance
+usage_tracker = UsageTracker()
@@ -1,18 +1,42 @@
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import (
+    Filter, FieldCondition, IsEmptyCondition, MatchAny, MatchValue, PayloadField, Range
+)
 from langchain_core.documents import Document
-from backend.services.embeddings import embedding_service
-from typing import List, Dict, Any
+from backend.services.embeddings import EmbeddingService, embedding_service
+from backend.services.collection_profiles import (
+    PAYLOAD_INDEXES,
+    create_collection_kwargs,
+    get_profile,
+    search_params,
+    update_collection_kwargs,
+)
+from backend.services.knowledge_base import document_key, knowledge_base_registry
+from backend.utils.cache import LRUCache
+from backend.utils.helpers import compute_content_hash
+from backend.utils.tracing import tracer
+from typing import List, Dict, Any, Optional, Tuple
+import json
 import logging
+import threading
+import time
 import uuid
+import numpy as np
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# ":memory:" runs an in-process Qdrant; QDRANT_PATH persists a local one to disk
 QDRANT_URL = os.getenv("QDRANT_URL")
+QDRANT_PATH = os.getenv("QDRANT_PATH") or None
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 QDRANT_COLLECTION_NAME = os.getenv("QDRANT_COLLECTION_NAME", "qa_agent_knowledge_base")
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "512"))
+QDRANT_UPLOAD_BATCH_SIZE = int(os.getenv("QDRANT_UPLOAD_BATCH_SIZE", "256"))
+QDRANT_UPLOAD_PARALLEL = int(os.getenv("QDRANT_UPLOAD_PARALLEL", "1"))
+# false returns as soon as Qdrant accepts a batch, before it is indexed
+QDRANT_UPLOAD_WAIT = os.getenv("QDRANT_UPLOAD_WAIT", "true").lower() == "true"
 
 
 logger = logging.getLogger(__name__)
@@ -21,17 +45,63 @@ class VectorStoreService:
     
     def __init__(self):
         self.client = None
-        self.collection_name = QDRANT_COLLECTION_NAME
+        self.registry = knowledge_base_registry
+        # (collection, embedder) serving retrieval; replaced as one tuple on a model switch
+        self._active: Tuple[str, EmbeddingService] = (
+            self.registry.active_collection or QDRANT_COLLECTION_NAME,
+            embedding_service
+        )
+        self._switch_lock = threading.Lock()
+        self.profile = get_profile()
+        self._indexed_collections = set()
+        # (query hash, k, score_threshold, filter hash, version) -> search results
+        self.retrieval_cache = LRUCache(max_size=RETRIEVAL_CACHE_SIZE)
+        self.retrieval_stats = {"searches": 0, "search_ms": 0.0, "saved_ms": 0.0}
         self._initialize_client()
     
+    @property
+    def collection_name(self) -> str:
+        return self._current()[0]
+    
+    @property
+    def embedder(self) -> EmbeddingService:
+        return self._current()[1]
+    
+    def _current(self) -> Tuple[str, EmbeddingService]:
+        """Active (collection, embedder), following a switch made by another process"""
+        active = self._active
+        recorded = self.registry.active_collection
+        if recorded and recorded != active[0]:
+            with self._switch_lock:
+                if self._active[0] != recorded:
+                    model = self.registry.collections.get(recorded, {}).get("model", self._active[1].model_name)
+                    embedder = self._active[1] if model == self._active[1].model_name else EmbeddingService(model)
+                    self._active = (recorded, embedder)
+                    embedding_service.swap(embedder)
+                    self.retrieval_cache.clear()
+                    logger.info(f"Following switch to collection '{recorded}' ({model})")
+                active = self._active
+        return active
+    
+    @property
+    def version(self) -> int:
+        """Knowledge base version; part of every downstream cache key"""
+        return self.registry.version
+    
     def _initialize_client(self):
         try:
-            logger.info(f"Connecting to Qdrant Cloud: {QDRANT_URL}")
-            
-            self.client = QdrantClient(
-                url=QDRANT_URL,
-                api_key=QDRANT_API_KEY,
-            )
+            if QDRANT_URL == ":memory:":
+                logger.info("Starting in-memory Qdrant")
+                self.client = QdrantClient(location=":memory:")
+            elif QDRANT_PATH:
+                logger.info(f"Opening local Qdrant at {QDRANT_PATH}")
+                self.client = QdrantClient(path=QDRANT_PATH)
+            else:
+                logger.info(f"Connecting to Qdrant Cloud: {QDRANT_URL}")
+                self.client = QdrantClient(
+                    url=QDRANT_URL,
+                    api_key=QDRANT_API_KEY,
+                )
             
             # Test connection
             collections = self.client.get_collections()
@@ -41,114 +111,357 @@ class VectorStoreService:
             logger.error(f"Error connecting to Qdrant: {str(e)}")
             raise
     
-    def create_collection(self):
+    def create_collection(
+        self,
+        collection_name: Optional[str] = None,
+        embedder: Optional[EmbeddingService] = None
+    ):
+        """
+        Create a collection sized for the embedder's model, unless it exists
+        
+        Defaults to the active collection and embedder. An existing
+        collection whose vector size does not match the model is an error
+        instead of a silently broken index.
+        """
+        active_collection, active_embedder = self._current()
+        collection_name = collection_name or active_collection
+        embedder = embedder or active_embedder
+        dimension = embedder.get_embedding_dimension()
         try:
             collections = self.client.get_collections().collections
             collection_names = [col.name for col in collections]
             
-            if self.collection_name in collection_names:
-                logger.info(f"Collection '{self.collection_name}' already exists")
+            if collection_name in collection_names:
+                size = self.client.get_collection(collection_name).config.params.vectors.size
+                if size != dimension:
+                    raise ValueError(
+                        f"Collection '{collection_name}' holds {size}-d vectors but {embedder.model_name} "
+                        f"produces {dimension}-d; re-index the knowledge base to change models"
+                    )
+                if collection_name not in self.registry.collections:
+                    # Collection created before models were recorded
+                    self.registry.record_collection(collection_name, embedder.model_name, dimension)
+                self._create_payload_indexes(collection_name)
                 return
             
             self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=embedding_service.get_embedding_dimension(),
-                    distance=Distance.COSINE
-                )
+                collection_name=collection_name,
+                **create_collection_kwargs(self.profile, dimension)
             )
+            self._indexed_collections.discard(collection_name)
+            self._create_payload_indexes(collection_name)
+            self.registry.record_collection(collection_name, embedder.model_name, dimension)
             
-            logger.info(f"Created collection '{self.collection_name}'")
+            logger.info(
+                f"Created collection '{collection_name}' ({embedder.model_name}, {dimension}-d) "
+                f"with profile '{self.profile['name']}'"
+            )
+            
+            if collection_name == active_collection and self.registry.documents:
+                # The manifest described a collection that no longer exists
+                self.registry.reset()
             
         except Exception as e:
             logger.error(f"Error creating collection: {str(e)}")
             raise
     
+    def _create_payload_indexes(self, collection_name: str):
+        """Index filterable payload fields (idempotent, once per collection and process)"""
+        if collection_name in self._indexed_collections:
+            return
+        for field, schema in PAYLOAD_INDEXES.items():
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field,
+                field_schema=schema
+            )
+        self._indexed_collections.add(collection_name)
+    
+    def switch_collection(self, collection_name: str, embedder: EmbeddingService):
+        """
+        Atomically serve retrieval from another collection and model
+        
+        Searches already running finish against the previous pair; the
+        version bump invalidates every cache built from the old space.
+        """
+        with self._switch_lock:
+            self._active = (collection_name, embedder)
+            self.registry.activate_collection(collection_name)
+        embedding_service.swap(embedder)
+        self.retrieval_cache.clear()
+        logger.info(f"Serving from collection '{collection_name}' ({embedder.model_name})")
+    
+    def migrate_collection(self, profile_name: str) -> Dict[str, Any]:
+        """
+        Apply a collection profile to the existing collection in place
+        
+        Qdrant rebuilds quantized vectors, moves storage and re-indexes in
+        the background; searches keep working meanwhile.
+        """
+        try:
+            profile = get_profile(profile_name)
+            if self.get_collection_info()["exists"]:
+                self.client.update_collection(
+                    collection_name=self.collection_name,
+                    **update_collection_kwargs(profile)
+                )
+                self._indexed_collections.discard(self.collection_name)
+                self._create_payload_indexes(self.collection_name)
+            self.profile = profile
+            self.retrieval_cache.clear()
+            logger.info(f"Collection '{self.collection_name}' migrated to profile '{profile_name}'")
+            return self.get_collection_info()
+        except Exception as e:
+            logger.error(f"Error migrating collection: {str(e)}")
+            raise
+    
     def add_documents(self, documents: List[Document]) -> int:
         try:
             if not documents:
                 return 0
             
-            self.create_collection()
+            collection_name, embedder = self._current()
+            self.create_collection(collection_name, embedder)
+            
+            # Sources re-uploaded with identical content are already stored
+            manifest = self._manifest_entries(documents)
+            changed, unchanged = self.registry.diff(
+                {key: entry["content_hash"] for key, entry in manifest.items()}
+            )
+            if unchanged:
+                logger.info(f"Skipping unchanged documents: {', '.join(manifest[key]['source'] for key in unchanged)}")
+            documents = [doc for doc in documents if self._document_key(doc) in changed]
+            if not documents:
+                return 0
             
             texts = [doc.page_content for doc in documents]
-            metadatas = [doc.metadata for doc in documents]
             
             logger.info(f"Generating embeddings for {len(texts)} documents...")
-            embeddings = embedding_service.embed_documents(texts)
-            
-            points = []
-            for i, (text, embedding, metadata) in enumerate(zip(texts, embeddings, metadatas)):
-                point = PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
-                    payload={
-                        "text": text,
-                        "source": metadata.get("source", "unknown"),
-                        "file_type": metadata.get("file_type", "unknown"),
-                        "chunk_index": metadata.get("chunk_index", 0),
-                        "total_chunks": metadata.get("total_chunks", 1)
-                    }
-                )
-                points.append(point)
+            vectors = embedder.embed_documents_array(texts)
             
-            logger.info(f"Uploading {len(points)} points to Qdrant...")
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=points
-            )
+            payloads = []
+            for text, doc in zip(texts, documents):
+                metadata = doc.metadata
+                payload = {
+                    "text": text,
+                    "source": metadata.get("source", "unknown"),
+                    "file_type": metadata.get("file_type", "unknown"),
+                    "chunk_index": metadata.get("chunk_index", 0),
+                    "total_chunks": metadata.get("total_chunks", 1),
+                    "content_hash": manifest[self._document_key(doc)]["content_hash"],
+                    "section": metadata.get("section", ""),
+                    "section_path": metadata.get("section_path", [])
+                }
+                for field in ("page", "project"):
+                    if field in metadata:
+                        payload[field] = metadata[field]
+                payloads.append(payload)
+            
+            try:
+                self.upload_vectors(vectors, payloads, collection_name=collection_name)
+            except Exception:
+                # Drop a partial upload; the previous chunks and manifest entry are untouched
+                self._delete_chunks(collection_name, manifest, changed, current=True)
+                raise
+            
+            # Changed sources replace their previous chunks, once the new ones are stored
+            replaced = [key for key in changed if key in self.registry.documents]
+            if replaced:
+                self._delete_chunks(collection_name, manifest, replaced, current=False)
+            
+            self.registry.record_ingest({key: manifest[key] for key in changed})
+            self.retrieval_cache.clear()
             
-            logger.info(f"Successfully added {len(points)} documents to vector store")
-            return len(points)
+            logger.info(f"Successfully added {len(payloads)} documents to vector store")
+            return len(payloads)
             
         except Exception as e:
             logger.error(f"Error adding documents: {str(e)}")
             raise
     
+    def upload_vectors(
+        self,
+        vectors: np.ndarray,
+        payloads: List[Dict[str, Any]],
+        ids: Optional[List[Any]] = None,
+        collection_name: Optional[str] = None
+    ):
+        """
+        Upload a float32 vector matrix in batches, without building PointStructs
+
+        Batches of QDRANT_UPLOAD_BATCH_SIZE points are sent by
+        QDRANT_UPLOAD_PARALLEL workers; QDRANT_UPLOAD_WAIT controls whether
+        each batch waits until Qdrant has applied it. New points get random
+        ids; passing existing ids overwrites those points.
+        """
+        logger.info(f"Uploading {len(payloads)} points to Qdrant...")
+        self.client.upload_collection(
+            collection_name=collection_name or self.collection_name,
+            vectors=vectors,
+            payload=payloads,
+            ids=ids or [str(uuid.uuid4()) for _ in payloads],
+            batch_size=QDRANT_UPLOAD_BATCH_SIZE,
+            parallel=QDRANT_UPLOAD_PARALLEL,
+            wait=QDRANT_UPLOAD_WAIT
+        )
+    
+    def _delete_chunks(
+        self,
+        collection_name: str,
+        manifest: Dict[str, Dict[str, Any]],
+        keys: List[str],
+        current: bool
+    ):
+        """Delete the chunks of the ``keys`` sources with (``current``) or without their manifest content hash"""
+        conditions = []
+        for key in keys:
+            entry = manifest[key]
+            same_content = FieldCondition(key="content_hash", match=MatchValue(value=entry["content_hash"]))
+            # Another project's file of the same name is a different document
+            same_project = (
+                FieldCondition(key="project", match=MatchValue(value=entry["project"])) if entry["project"]
+                else IsEmptyCondition(is_empty=PayloadField(key="project"))
+            )
+            conditions.append(Filter(
+                must=[FieldCondition(key="source", match=MatchValue(value=entry["source"])), same_project]
+                + ([same_content] if current else []),
+                must_not=[] if current else [same_content]
+            ))
+        self.client.delete(collection_name=collection_name, points_selector=Filter(should=conditions))
+    
+    def _manifest_entries(self, documents: List[Document]) -> Dict[str, Dict[str, Any]]:
+        """Source, project, content hash, file type and chunk count per ``document_key``"""
+        manifest = {}
+        for doc in documents:
+            entry = manifest.setdefault(self._document_key(doc), {
+                "source": doc.metadata.get("source", "unknown"),
+                "project": doc.metadata.get("project"),
+                "content_hash": doc.metadata.get("content_hash"),
+                "file_type": doc.metadata.get("file_type", "unknown"),
+                "chunks": 0,
+                "_texts": []
+            })
+            entry["chunks"] += 1
+            entry["_texts"].append(doc.page_content)
+        for entry in manifest.values():
+            texts = entry.pop("_texts")
+            if entry["content_hash"] is None:
+                entry["content_hash"] = compute_content_hash("".join(texts))
+        return manifest
+    
+    def _document_key(self, doc: Document) -> str:
+        return document_key(doc.metadata.get("source", "unknown"), doc.metadata.get("project"))
+    
+    def build_filter(self, filters: Optional[Dict[str, Any]]) -> Optional[Filter]:
+        """
+        Qdrant filter from retrieval filters
+        
+        Args:
+            filters: Any of ``sources``, ``file_types`` (lists), ``section``
+                (matches the section and its subsections), ``page_from``,
+                ``page_to`` and ``project``
+        """
+        if not filters:
+            return None
+        
+        conditions = []
+        if filters.get("sources"):
+            conditions.append(FieldCondition(key="source", match=MatchAny(any=list(filters["sources"]))))
+        if filters.get("file_types"):
+            conditions.append(FieldCondition(key="file_type", match=MatchAny(any=list(filters["file_types"]))))
+        if filters.get("section"):
+            conditions.append(FieldCondition(key="section_path", match=MatchValue(value=filters["section"])))
+        if filters.get("page_from") is not None or filters.get("page_to") is not None:
+            conditions.append(FieldCondition(key="page", range=Range(gte=filters.get("page_from"), lte=filters.get("page_to"))))
+        if filters.get("project"):
+            conditions.append(FieldCondition(key="project", match=MatchValue(value=filters["project"])))
+        
+        return Filter(must=conditions) if conditions else None
+    
     def similarity_search(
         self, 
         query: str, 
         k: int = 5,
-        score_threshold: float = 0.5
+        score_threshold: float = 0.5,
+        filters: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         
-        try:
-            query_embedding = embedding_service.embed_text(query)
+        with tracer.span("similarity_search", **{"retrieval.k": k, "retrieval.filtered": bool(filters)}) as span:
+            try:
+                query_filter = self.build_filter(filters)
+                filter_key = compute_content_hash(json.dumps(filters, sort_keys=True)) if query_filter else None
+                key = (compute_content_hash(query), k, score_threshold, filter_key, self.version)
+                cached = self.retrieval_cache.get(key)
+                if cached is not None:
+                    # Credit each hit with the average cost of a real search
+                    self.retrieval_stats["saved_ms"] += self.retrieval_stats["search_ms"] / max(1, self.retrieval_stats["searches"])
+                    logger.info(f"Retrieval cache hit: {len(cached)} documents")
+                    span.set_attributes(**{"cache.hit": True, "retrieval.chunks": len(cached)})
+                    return [dict(result) for result in cached]
             
-            search_results = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_embedding,
-                limit=k,
-                score_threshold=score_threshold
-            )
+                started = time.perf_counter()
+                collection_name, embedder = self._current()
+                query_embedding = embedder.embed_text(query)
             
-            results = []
-            for result in search_results:
-                results.append({
-                    "text": result.payload.get("text", ""),
-                    "source": result.payload.get("source", "unknown"),
-                    "file_type": result.payload.get("file_type", "unknown"),
-                    "chunk_index": result.payload.get("chunk_index", 0),
-                    "score": result.score,
-                    "metadata": result.payload
-                })
+                with tracer.span("qdrant.search", kind="client", **{"db.collection": collection_name}):
+                    search_results = self.client.search(
+                        collection_name=collection_name,
+                        query_vector=query_embedding,
+                        limit=k,
+                        score_threshold=score_threshold,
+                        query_filter=query_filter,
+                        search_params=search_params(self.profile)
+                    )
             
-            logger.info(f"Found {len(results)} similar documents for query")
-            return results
+                results = []
+                for result in search_results:
+                    results.append({
+                        "text": result.payload.get("text", ""),
+                        "source": result.payload.get("source", "unknown"),
+                        "file_type": result.payload.get("file_type", "unknown"),
+                        "chunk_index": result.payload.get("chunk_index", 0),
+                        "section": result.payload.get("section", ""),
+                        "score": result.score,
+                        "metadata": result.payload
+                    })
             
-        except Exception as e:
-            logger.error(f"Error searching documents: {str(e)}")
-            raise
+                self.retrieval_stats["searches"] += 1
+                self.retrieval_stats["search_ms"] += (time.perf_counter() - started) * 1000
+                self.retrieval_cache.set(key, [dict(result) for result in results])
+                span.set_attributes(**{"cache.hit": False, "retrieval.chunks": len(results)})
+            
+                logger.info(f"Found {len(results)} similar documents for query")
+                return results
+            
+            except Exception as e:
+                logger.error(f"Error searching documents: {str(e)}")
+                raise
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Retrieval cache hit rate and search latency saved by hits"""
+        stats = self.retrieval_cache.stats()
+        searches = self.retrieval_stats["searches"]
+        stats["avg_search_ms"] = round(self.retrieval_stats["search_ms"] / searches, 2) if searches else 0.0
+        stats["latency_saved_ms"] = round(self.retrieval_stats["saved_ms"], 2)
+        return stats
     
     def get_collection_info(self) -> Dict[str, Any]:
         """Get information about the collection"""
         try:
             collection_info = self.client.get_collection(self.collection_name)
+            params = collection_info.config.params
             return {
                 "exists": True,
                 "vectors_count": collection_info.vectors_count,
                 "points_count": collection_info.points_count,
-                "status": collection_info.status
+                "status": collection_info.status,
+                "profile": self.profile["name"],
+                "embedding_model": self.embedder.model_name,
+                "dimension": params.vectors.size,
+                "quantization": type(collection_info.config.quantization_config).__name__
+                if collection_info.config.quantization_config else None,
+                "on_disk_vectors": bool(getattr(params.vectors, "on_disk", False)),
+                "on_disk_payload": bool(params.on_disk_payload)
             }
         except Exception as e:
             logger.warning(f"Collection info error: {str(e)}")
@@ -162,6 +475,9 @@ class VectorStoreService:
         """Delete the collection (useful for testing/reset)"""
         try:
             self.client.delete_collection(self.collection_name)
+            self.registry.forget_collection(self.collection_name)
+            self.registry.reset()
+            self.retrieval_cache.clear()
             logger.info(f"Deleted collection '{self.collection_name}'")
         except Exception as e:
             logger.error(f"Error deleting collection: {str(e)}")
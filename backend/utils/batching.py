@@ -0,0 +1,135 @@
+from collections import deque
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Deque, Dict, List, Sequence, Tuple
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("interactive", "bulk")
+
+
+class QueueFull(Exception):
+    """The batcher holds max_queue items; the caller should back off and retry"""
+
+
+class DynamicBatcher:
+    """
+    Group items submitted by concurrent requests into batches
+
+    A batch is dispatched as soon as ``max_batch_size`` items are waiting, or
+    ``max_wait_ms`` after the first one arrived. Batches run one at a time
+    in the threadpool; items arriving meanwhile form the next batch, so batch
+    size grows with load instead of with the caller's request shape.
+    Interactive items (queries) are batched on their own, ahead of bulk items
+    (ingest), and bulk work runs in batches of at most ``max_bulk_batch_size``,
+    so a query waits for at most one small bulk batch however large the
+    upload. Beyond ``max_queue`` waiting items, ``submit`` raises ``QueueFull``.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_queue: int = 4096,
+        max_bulk_batch_size: int = 16
+    ):
+        self.process = process
+        self.max_batch_size = max_batch_size
+        self.max_bulk_batch_size = max_bulk_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self._queues: Dict[str, Deque[Tuple[Any, asyncio.Future, float]]] = {p: deque() for p in PRIORITIES}
+        self._arrived: asyncio.Event = None
+        self._filled: asyncio.Event = None
+        self._worker: asyncio.Task = None
+        self.stats = {
+            "batches": 0, "items": 0, "interactive_batches": 0, "bulk_batches": 0,
+            "rejected": 0, "queue_wait_ms": 0.0, "process_ms": 0.0
+        }
+
+    def pending(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def submit(self, items: List[Any], priority: str = "interactive") -> List[Any]:
+        """Results for ``items`` in order, once the batches holding them have run"""
+        if not items:
+            return []
+        # An oversized request is still admitted into an empty queue, or it could never run
+        if self.pending() and self.pending() + len(items) > self.max_queue:
+            self.stats["rejected"] += 1
+            raise QueueFull(f"{self.pending()} items queued (limit {self.max_queue})")
+
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+        now = time.perf_counter()
+        futures = [loop.create_future() for _ in items]
+        self._queues[priority].extend((item, future, now) for item, future in zip(items, futures))
+        self._arrived.set()
+        if self.pending() >= self.max_batch_size:
+            self._filled.set()
+        return list(await asyncio.gather(*futures))
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._arrived, self._filled = asyncio.Event(), asyncio.Event()
+            self._worker = asyncio.ensure_future(self._run())
+
+    def _take_batch(self) -> Tuple[str, List[Tuple[Any, asyncio.Future, float]]]:
+        # Never pad a query batch with ingest texts: it would run as long as the bulk batch
+        priority = next(p for p in PRIORITIES if self._queues[p] or p == PRIORITIES[-1])
+        queue = self._queues[priority]
+        limit = self.max_batch_size if priority == "interactive" else self.max_bulk_batch_size
+        batch = [queue.popleft() for _ in range(min(limit, len(queue)))]
+        if not self.pending():
+            self._arrived.clear()
+        if self.pending() < self.max_batch_size:
+            self._filled.clear()
+        return priority, batch
+
+    async def _run(self):
+        while True:
+            await self._arrived.wait()
+            if len(self._queues["interactive"]) < self.max_batch_size and not self._queues["bulk"]:
+                try:
+                    await asyncio.wait_for(self._filled.wait(), timeout=self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            priority, batch = self._take_batch()
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                continue
+            self.stats[f"{priority}_batches"] += 1
+
+            started = time.perf_counter()
+            self.stats["queue_wait_ms"] += sum(started - queued for _, _, queued in batch) * 1000
+            try:
+                results = await run_in_threadpool(self.process, [item for item, _, _ in batch])
+                for (_, future, _), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                logger.error(f"Batch of {len(batch)} items failed: {str(e)}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            self.stats["batches"] += 1
+            self.stats["items"] += len(batch)
+            self.stats["process_ms"] += (time.perf_counter() - started) * 1000
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus average batch size, queue wait and current depth"""
+        batches, items = self.stats["batches"], self.stats["items"]
+        return {
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in self.stats.items()},
+            "avg_batch_size": round(items / batches, 2) if batches else 0.0,
+            "avg_queue_wait_ms": round(self.stats["queue_wait_ms"] / items, 2) if items else 0.0,
+            "pending": self.pending(),
+            "max_batch_size": self.max_batch_size,
+            "max_bulk_batch_size": self.max_bulk_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_queue": self.max_queue
+        }
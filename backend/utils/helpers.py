@@ -0,0 +1,20 @@
+import hashlib
+import re
+from typing import Set, Union
+
+
+def compute_content_hash(content: Union[str, bytes]) -> str:
+    """Stable SHA-256 hex digest used to key caches by content"""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def script_filename(test_id: str, taken: Set[str]) -> str:
+    """Filesystem-safe ``.py`` name for a test case, unique within ``taken`` (which it extends)"""
+    stem = re.sub(r"[^A-Za-z0-9_-]+", "_", test_id).strip("_") or "test_case"
+    name, suffix = f"{stem}.py", 2
+    while name in taken:
+        name, suffix = f"{stem}_{suffix}.py", suffix + 1
+    taken.add(name)
+    return name
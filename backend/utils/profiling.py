@@ -0,0 +1,365 @@
+"""
+Opt-in CPU and memory profiling of the backend process.
+
+Enabled with ``PROFILING=true``; every capture is written in the folded
+stack format (one ``frame;frame;...;leaf count`` line per distinct stack)
+that flamegraph.pl, inferno and speedscope read directly.
+
+- On demand: a sampling profiler reads every thread's Python stack
+  (``sys._current_frames``) every ``interval_ms`` for N seconds. Samples
+  are taken from a background thread, so profiled code runs unmodified
+  and the cost is one stack walk per thread per interval.
+- Slow requests: with ``PROFILING_SLOW_REQUEST_MS`` set, a sampler runs
+  continuously at ``PROFILING_INTERVAL_MS`` and keeps the last
+  ``PROFILING_WINDOW_SECONDS`` of samples. A request slower than the
+  threshold gets the samples taken while it ran. They cover the whole
+  process, so concurrent requests show up too.
+- Memory: with ``PROFILING_MEMORY=true``, ``memory()`` wraps ingestion in
+  tracemalloc snapshots and records the allocations that grew, folded by
+  allocation traceback and weighted in bytes. tracemalloc runs only inside
+  the block.
+
+Idle threads (waiting on a lock, a queue or the event loop selector) are
+left out, so stacks show where time is spent, not where threads wait.
+
+Captures are kept as files in ``PROFILING_DIR`` (the newest
+``PROFILING_KEEP``), so any API worker can list and serve them.
+"""
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import json
+import logging
+import os
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROFILING = os.getenv("PROFILING", "false").lower() == "true"
+# Sent as X-Admin-Token to the profiling endpoints; empty = the endpoints refuse every request
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_DIR = os.getenv("PROFILING_DIR", "logs/profiles")
+PROFILING_KEEP = int(os.getenv("PROFILING_KEEP", "50"))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "20"))
+PROFILING_MAX_SECONDS = int(os.getenv("PROFILING_MAX_SECONDS", "60"))
+# 0 = no continuous sampler, no slow-request captures
+PROFILING_SLOW_REQUEST_MS = float(os.getenv("PROFILING_SLOW_REQUEST_MS", "0"))
+PROFILING_WINDOW_SECONDS = float(os.getenv("PROFILING_WINDOW_SECONDS", "120"))
+PROFILING_MEMORY = os.getenv("PROFILING_MEMORY", "false").lower() == "true"
+PROFILING_MEMORY_FRAMES = int(os.getenv("PROFILING_MEMORY_FRAMES", "25"))
+
+MAX_STACK_DEPTH = 128
+# Samples kept per tick of the window, across all threads
+MAX_SAMPLES_PER_TICK = 16
+
+# Leaf frames of threads that are waiting, not working
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("socket.py", "accept"),
+    ("socketserver.py", "serve_forever")
+}
+IGNORED_THREADS = {"stack-sampler", "trace-exporter"}
+PATH_PREFIXES = ("site-packages" + os.sep, os.getcwd() + os.sep, sysconfig.get_paths()["stdlib"] + os.sep)
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler:
+    """Samples the Python stack of every thread from a background thread"""
+
+    def __init__(self, interval_ms: float, window_seconds: Optional[float] = None, exclude: Optional[int] = None):
+        self.interval = interval_ms / 1000
+        self.exclude = exclude
+        self.counts: Counter = Counter()
+        # With a window, timestamped samples are kept instead of counts
+        self.samples: Optional[Deque[Tuple[float, str]]] = None
+        if window_seconds:
+            self.samples = deque(maxlen=int(window_seconds / self.interval) * MAX_SAMPLES_PER_TICK)
+        self.ticks = 0
+        self.sampling_seconds = 0.0  # CPU time of the sampler thread
+        self._labels: Dict[Any, str] = {}
+        # One copy of each distinct stack, however many samples hold it
+        self._stacks: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def window(self, started: float, ended: float) -> Counter:
+        """Folded stack counts sampled between two ``time.time()`` instants"""
+        return Counter(stack for at, stack in list(self.samples or ()) if started <= at <= ended)
+
+    def _run(self):
+        skipped = {threading.get_ident(), self.exclude}
+        while not self._stop.wait(self.interval):
+            began = time.thread_time()
+            now = time.time()
+            ignored = skipped | {t.ident for t in threading.enumerate() if t.name in IGNORED_THREADS}
+            for ident, frame in sys._current_frames().items():
+                if ident in ignored:
+                    continue
+                stack = self._fold(frame)
+                if stack is None:
+                    continue
+                if self.samples is not None:
+                    self.samples.append((now, self._stacks.setdefault(stack, stack)))
+                else:
+                    self.counts[stack] += 1
+            self.ticks += 1
+            self.sampling_seconds += time.thread_time() - began
+
+    def _fold(self, frame) -> Optional[str]:
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+            return None
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = f"{code.co_name} ({_location(code.co_filename, code.co_firstlineno)})"
+            labels.append(label)
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+
+def _location(filename: str, line: int) -> str:
+    """``path:line``, with the path relative to site-packages, the project or the standard library"""
+    for marker in PATH_PREFIXES:
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    # ";" separates frames in folded stacks
+    return f"{filename}:{line}".replace(";", ":")
+
+
+def fold(counts: Counter) -> str:
+    """Folded stack lines, heaviest first"""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+class Profiler:
+    """On-demand and slow-request CPU profiles, and memory diffs, stored as folded stacks"""
+
+    def __init__(self):
+        self.enabled = PROFILING
+        self.token = PROFILING_TOKEN
+        self.directory = PROFILING_DIR
+        self.keep = PROFILING_KEEP
+        self.interval_ms = PROFILING_INTERVAL_MS
+        self.max_seconds = PROFILING_MAX_SECONDS
+        self.slow_request_ms = PROFILING_SLOW_REQUEST_MS if PROFILING else 0
+        self.memory_enabled = PROFILING and PROFILING_MEMORY
+        self.stats = {"profiles": 0, "slow_requests": 0, "memory_diffs": 0}
+        self._sampler: Optional[StackSampler] = None
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+        self._memory_users = 0
+        self._started_tracemalloc = False
+        if self.enabled and not self.token:
+            logger.warning("PROFILING is enabled without PROFILING_TOKEN; the admin endpoints refuse every request")
+
+    # ========================== CPU ==========================
+    def ensure_sampling(self):
+        """Start the continuous sampler slow requests are profiled from"""
+        if self.slow_request_ms and self._sampler is None:
+            with self._lock:
+                if self._sampler is None:
+                    self._sampler = StackSampler(self.interval_ms, window_seconds=PROFILING_WINDOW_SECONDS)
+                    self._sampler.start()
+
+    def profile(self, seconds: float, interval_ms: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Sample every thread for ``seconds`` and store the profile
+
+        Raises:
+            RuntimeError: Another on-demand profile is running
+        """
+        if not self._profile_lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already being taken")
+        try:
+            seconds = min(seconds, self.max_seconds)
+            # This thread only sleeps meanwhile
+            sampler = StackSampler(interval_ms or self.interval_ms, exclude=threading.get_ident())
+            started = time.time()
+            sampler.start()
+            time.sleep(seconds)
+            sampler.stop()
+            self.stats["profiles"] += 1
+            return self._save("cpu", sampler.counts, {
+                "seconds": seconds,
+                "interval_ms": sampler.interval * 1000,
+                "samples": sum(sampler.counts.values()),
+                "sampling_overhead": round(sampler.sampling_seconds / max(time.time() - started, 1e-9), 4)
+            })
+        finally:
+            self._profile_lock.release()
+
+    def capture_slow_request(
+        self,
+        method: str,
+        route: str,
+        started: float,
+        ended: float,
+        trace_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Store the samples taken while a slow request ran"""
+        if self._sampler is None:
+            return None
+        counts = self._sampler.window(started, ended)
+        if not counts:
+            return None
+        self.stats["slow_requests"] += 1
+        return self._save("slow_request", counts, {
+            "method": method,
+            "route": route,
+            "duration_ms": round((ended - started) * 1000, 1),
+            "trace_id": trace_id,
+            "interval_ms": self.interval_ms,
+            "samples": sum(counts.values())
+        })
+
+    # ========================== MEMORY ==========================
+    @contextmanager
+    def memory(self, label: str, **details: Any) -> Iterator[None]:
+        """Record the allocations that grew while the block ran, by allocation traceback"""
+        if not self.memory_enabled:
+            yield
+            return
+
+        with self._lock:
+            self._memory_users += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(PROFILING_MEMORY_FRAMES)
+                self._started_tracemalloc = True
+        try:
+            before = tracemalloc.take_snapshot()
+            started = time.perf_counter()
+            yield
+            after = tracemalloc.take_snapshot()
+            seconds = time.perf_counter() - started
+        finally:
+            with self._lock:
+                self._memory_users -= 1
+                if not self._memory_users and self._started_tracemalloc:
+                    tracemalloc.stop()
+                    self._started_tracemalloc = False
+
+        try:
+            self._save_memory_diff(label, before, after, seconds, details)
+        except Exception as e:
+            # Profiling must never fail the work it observes
+            logger.error(f"Error saving memory diff of {label}: {str(e)}")
+
+    def _save_memory_diff(self, label: str, before, after, seconds: float, details: Dict[str, Any]):
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        differences = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "traceback")
+        grown = [stat for stat in differences if stat.size_diff > 0]
+        counts = Counter()
+        for stat in grown:
+            # Tracebacks are most recent call last, the order folded stacks use
+            stack = ";".join(_location(frame.filename, frame.lineno) for frame in stat.traceback)
+            counts[stack] += stat.size_diff
+        self.stats["memory_diffs"] += 1
+        self._save("memory", counts, {
+            "label": label,
+            "seconds": round(seconds, 3),
+            "grown_bytes": sum(stat.size_diff for stat in grown),
+            "net_bytes": sum(stat.size_diff for stat in differences),
+            "top": [
+                {"at": str(stat.traceback[-1]), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in grown[:10]
+            ],
+            **details
+        })
+
+    # ========================== STORAGE ==========================
+    def list_captures(self) -> List[Dict[str, Any]]:
+        """Metadata of stored captures, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        captures = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                        captures.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # pruned by another worker meanwhile
+        return captures
+
+    def get_capture(self, capture_id: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Metadata and folded stacks of one capture"""
+        meta = next((c for c in self.list_captures() if c["id"] == capture_id), None)
+        if meta is None:
+            return None
+        with open(os.path.join(self.directory, meta["file"]), encoding="utf-8") as f:
+            return meta, f.read()
+
+    def get_stats(self) -> Dict[str, Any]:
+        sampler = self._sampler
+        return {
+            "enabled": self.enabled,
+            "slow_request_ms": self.slow_request_ms or None,
+            "continuous_sampling": sampler is not None,
+            "sampling_overhead": (
+                round(sampler.sampling_seconds / (sampler.ticks * sampler.interval), 4)
+                if sampler is not None and sampler.ticks else None
+            ),
+            **self.stats
+        }
+
+    def _save(self, kind: str, counts: Counter, details: Dict[str, Any]) -> Dict[str, Any]:
+        os.makedirs(self.directory, exist_ok=True)
+        created = datetime.now(timezone.utc)
+        capture_id = f"{created.strftime('%Y%m%dT%H%M%S%f')}-{kind}-{uuid.uuid4().hex[:6]}"
+        meta = {
+            "id": capture_id,
+            "kind": kind,
+            "created_at": created.isoformat(),
+            "pid": os.getpid(),
+            "file": f"{capture_id}.folded",
+            "stacks": len(counts),
+            **details
+        }
+        with open(os.path.join(self.directory, meta["file"]), "w", encoding="utf-8") as f:
+            f.write(fold(counts))
+        with open(os.path.join(self.directory, f"{capture_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        self._prune()
+        logger.info(f"Saved {kind} profile {capture_id} ({len(counts)} stacks)")
+        return meta
+
+    def _prune(self):
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(".json"))
+        for name in names[:-self.keep] if len(names) > self.keep else []:
+            for path in (name, name[:-len(".json")] + ".folded"):
+                try:
+                    os.remove(os.path.join(self.directory, path))
+                except OSError:
+                    pass
+
+    def shutdown(self):
+        if self._sampler is not None:
+            self._sampler.stop()
+
+
+# Global profiler instance
+profiler = Profiler()
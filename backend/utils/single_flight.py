@@ -0,0 +1,45 @@
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Dict, Hashable
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight calls into one execution
+
+    The first caller for a key starts ``func`` in the threadpool; callers
+    arriving with the same key while it runs await the same task and receive
+    its result (or exception). The task is shielded, so a disconnecting
+    client does not cancel the work other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"executions": 0, "coalesced": 0}
+
+    async def run(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        task = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(run_in_threadpool(func, *args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.stats["executions"] += 1
+        else:
+            self.stats["coalesced"] += 1
+            logger.info(f"Coalesced request onto in-flight computation {key}")
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter went away
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,116 @@
+"""
+Application state shared by every API process.
+
+A small SQLite key-value store (WAL mode) for state that must look the same
+from every uvicorn/gunicorn worker, such as the uploaded HTML page and the
+latest script run results. Values are stored as JSON.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "state/app.db")
+
+# The uploaded target page, shared by the API and the CLI
+HTML_NAMESPACE = "html"
+HTML_STATE_KEY = "checkout_html"
+
+
+class StateStore:
+    """JSON values by (namespace, key) in a SQLite database"""
+
+    def __init__(self, path: str = STATE_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory and path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+                "PRIMARY KEY (namespace, key))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not thread-safe
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        row = self._connection().execute(
+            "SELECT value FROM state WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, namespace: str, key: str, value: Any):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO state (namespace, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP",
+                (namespace, key, json.dumps(value))
+            )
+
+    def contains(self, namespace: str, key: str) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM state WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone() is not None
+
+    def items(self, namespace: str, prefix: str = "") -> List[Tuple[str, Any]]:
+        """(key, value) pairs of a namespace whose keys start with ``prefix``, by key"""
+        rows = self._connection().execute(
+            "SELECT key, value FROM state WHERE namespace = ? AND substr(key, 1, ?) = ? ORDER BY key",
+            (namespace, len(prefix), prefix)
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def increment(self, namespace: str, key: str, amounts: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Add ``amounts`` to the numeric fields of a JSON object value
+
+        The read and write happen in one IMMEDIATE transaction, so concurrent
+        increments from other processes are never lost.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT value FROM state WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            value = json.loads(row[0]) if row else {}
+            for field, amount in amounts.items():
+                value[field] = value.get(field, 0) + amount
+            conn.execute(
+                "INSERT INTO state (namespace, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP",
+                (namespace, key, json.dumps(value))
+            )
+        return value
+
+    def delete(self, namespace: str, key: Optional[str] = None, prefix: Optional[str] = None):
+        """Delete one key, the keys starting with ``prefix``, or the whole namespace"""
+        with self._connection() as conn:
+            if key is not None:
+                conn.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+            elif prefix is not None:
+                conn.execute(
+                    "DELETE FROM state WHERE namespace = ? AND substr(key, 1, ?) = ?",
+                    (namespace, len(prefix), prefix)
+                )
+            else:
+                conn.execute("DELETE FROM state WHERE namespace = ?", (namespace,))
+
+
+# Global state store instance
+state_store = StateStore()
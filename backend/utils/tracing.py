@@ -0,0 +1,370 @@
+"""
+Request tracing with OpenTelemetry-style spans.
+
+A trace follows one request through the pipeline: every instrumented
+stage (HTML analysis, retrieval, embedding, Qdrant search, the LLM call,
+script cleaning and validation) opens a span that records its duration
+and attributes, nested under the span of the stage that called it. The
+current span is a context variable, so spans nest across ``await``,
+``run_in_threadpool`` and pool work submitted through
+``contextvars.copy_context().run``.
+
+Traces are continued from an incoming W3C ``traceparent`` header (the
+Streamlit frontend sends one per rerun), so every backend call made for
+one user action shares a trace id. A trace is sampled once, at its root,
+and the decision is inherited by its spans and passed on in
+``traceparent``. Without a sampled parent, ``TRACE_SAMPLE_RATE`` of the
+traces are kept, chosen by trace id so every service makes the same
+choice. Spans of unsampled traces record nothing, and with no
+``TRACE_EXPORTER`` tracing is off: either way a span is a shared no-op.
+
+Finished spans are queued and exported in batches by a background thread,
+off the request path; when the queue is full, spans are dropped (and
+counted) rather than slowing requests down. Exporters:
+
+- ``file``: one JSON span per line in ``TRACE_FILE_PATH``, for offline analysis
+- ``otlp``: OTLP/HTTP JSON to a local collector at ``TRACE_OTLP_ENDPOINT``
+  (OpenTelemetry Collector, Jaeger, Tempo)
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "")  # comma-separated: file, otlp
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", "logs/traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "qa-agent-backend")
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "4096"))
+TRACE_EXPORT_INTERVAL = float(os.getenv("TRACE_EXPORT_INTERVAL", "2"))
+TRACE_EXPORT_BATCH_SIZE = 512
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# OTLP span kinds and status codes
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+STATUS_CODES = {"ok": 1, "error": 2}
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """One timed stage of a trace; attributes are kept only when the trace is sampled"""
+
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "sampled",
+                 "attributes", "start_ns", "end_ns", "status", "status_message")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str], sampled: bool):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes: Dict[str, Any] = {}
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.status = "ok"
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any):
+        if self.sampled and value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def set_error(self, message: str):
+        self.status, self.status_message = "error", message
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self, service_name: str) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "service": service_name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": {"code": self.status.upper(), "message": self.status_message}
+        }
+
+
+class _DisabledSpan:
+    """Stand-in yielded when tracing is off"""
+
+    trace_id = span_id = parent_id = traceparent = None
+    sampled = False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes: Any):
+        pass
+
+    def set_error(self, message: str):
+        pass
+
+
+DISABLED_SPAN = _DisabledSpan()
+
+
+class _DisabledContext:
+    """Context manager of spans that record nothing"""
+
+    def __enter__(self) -> _DisabledSpan:
+        return DISABLED_SPAN
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+DISABLED_CONTEXT = _DisabledContext()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class JsonFileExporter:
+    """Appends spans as JSON lines"""
+
+    name = "file"
+
+    def __init__(self, path: str, service_name: str):
+        self.path = path
+        self.service_name = service_name
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(self.service_name), default=str) + "\n")
+
+
+class OtlpHttpExporter:
+    """Posts spans to an OpenTelemetry collector as OTLP/HTTP JSON"""
+
+    name = "otlp"
+
+    def __init__(self, endpoint: str, service_name: str):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.client = httpx.Client(timeout=5.0)
+
+    def export(self, spans: List[Span]):
+        response = self.client.post(self.endpoint, json={
+            "resourceSpans": [{
+                "resource": {"attributes": self._attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "backend.utils.tracing"},
+                    "spans": [self._span(span) for span in spans]
+                }]
+            }]
+        })
+        response.raise_for_status()
+
+    def _span(self, span: Span) -> Dict[str, Any]:
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": SPAN_KINDS[span.kind],
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": self._attributes(span.attributes),
+            "status": {"code": STATUS_CODES[span.status], "message": span.status_message}
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+    def _attributes(self, attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+        def value(v: Any) -> Dict[str, Any]:
+            if isinstance(v, bool):
+                return {"boolValue": v}
+            if isinstance(v, int):
+                return {"intValue": str(v)}
+            if isinstance(v, float):
+                return {"doubleValue": v}
+            if isinstance(v, (list, tuple)):
+                return {"arrayValue": {"values": [value(item) for item in v]}}
+            return {"stringValue": str(v)}
+
+        return [{"key": key, "value": value(v)} for key, v in attributes.items()]
+
+
+def create_exporters(names: str) -> List[Any]:
+    exporters = []
+    for name in filter(None, (n.strip().lower() for n in names.split(","))):
+        if name == "file":
+            exporters.append(JsonFileExporter(TRACE_FILE_PATH, TRACE_SERVICE_NAME))
+        elif name == "otlp":
+            exporters.append(OtlpHttpExporter(TRACE_OTLP_ENDPOINT, TRACE_SERVICE_NAME))
+        else:
+            raise ValueError(f"Unknown TRACE_EXPORTER: {name}")
+    return exporters
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace id, parent span id, sampled) of a W3C traceparent header"""
+    match = TRACEPARENT.match((header or "").strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+class Tracer:
+    """Opens spans, samples traces and exports finished spans in the background"""
+
+    def __init__(self, exporters: Optional[List[Any]] = None, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.exporters = create_exporters(TRACE_EXPORTER) if exporters is None else exporters
+        self.enabled = bool(self.exporters)
+        self.sample_rate = sample_rate
+        self.stats = {"traces": 0, "sampled_traces": 0, "spans": 0, "exported": 0, "dropped": 0, "export_errors": 0}
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=TRACE_QUEUE_SIZE)
+        self._export_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        if self.enabled:
+            atexit.register(self.flush)
+
+    def span(
+        self,
+        name: str,
+        traceparent: Optional[str] = None,
+        kind: str = "internal",
+        **attributes: Any
+    ):
+        """
+        Time the block as a span of the current trace
+
+        Args:
+            name: Stage name
+            traceparent: W3C header of a remote parent; starts the trace of an incoming request
+            kind: internal, server or client
+            attributes: Initial attributes
+
+        Returns:
+            Context manager yielding the span, to add attributes to
+        """
+        if not self.enabled:
+            return DISABLED_CONTEXT
+        parent = _current_span.get()
+        if parent is not None and not parent.sampled and traceparent is None:
+            # Nothing under an unsampled span is recorded
+            return DISABLED_CONTEXT
+        return self._span(name, traceparent, kind, parent, attributes)
+
+    @contextmanager
+    def _span(
+        self,
+        name: str,
+        traceparent: Optional[str],
+        kind: str,
+        parent: Optional[Span],
+        attributes: Dict[str, Any]
+    ) -> Iterator[Span]:
+        remote = parse_traceparent(traceparent) if traceparent else None
+        if remote is not None:
+            trace_id, parent_id, sampled = remote
+        elif parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = self._sample(trace_id)
+        if parent_id is None or remote is not None:
+            self.stats["traces"] += 1
+            self.stats["sampled_traces"] += int(sampled)
+
+        span = Span(name, kind, trace_id, parent_id, sampled)
+        span.set_attributes(**attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            if sampled:
+                span.end_ns = time.time_ns()
+                self._enqueue(span)
+
+    def flush(self):
+        """Export every queued span now"""
+        self._export_pending()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "exporters": [exporter.name for exporter in self.exporters],
+            "sample_rate": self.sample_rate,
+            "queued": self._queue.qsize(),
+            **self.stats
+        }
+
+    def _sample(self, trace_id: str) -> bool:
+        # Same rule as OpenTelemetry's TraceIdRatioBased sampler
+        return int(trace_id[16:], 16) < self.sample_rate * 2 ** 64
+
+    def _enqueue(self, span: Span):
+        self.stats["spans"] += 1
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            time.sleep(TRACE_EXPORT_INTERVAL)
+            self._export_pending()
+
+    def _export_pending(self):
+        with self._export_lock:
+            while not self._queue.empty():
+                batch = []
+                while len(batch) < TRACE_EXPORT_BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for exporter in self.exporters:
+                    try:
+                        exporter.export(batch)
+                    except Exception as e:
+                        self.stats["export_errors"] += 1
+                        logger.warning(f"Error exporting {len(batch)} spans to {exporter.name}: {str(e)}")
+                self.stats["exported"] += len(batch)
+
+
+# Global tracer instance
+tracer = Tracer()
@@ -0,0 +1,45 @@
+from typing import Iterable, Iterator, List, Tuple, Union
+import time
+import zipfile
+
+
+class _StreamBuffer:
+    """Write-only file object whose bytes are handed out after every entry"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(
+    entries: Iterable[Tuple[str, Union[str, bytes]]],
+    compression: int = zipfile.ZIP_DEFLATED
+) -> Iterator[bytes]:
+    """
+    ZIP archive of ``(name, content)`` entries, yielded entry by entry
+
+    The output is never seeked (sizes go into data descriptors), so only the
+    entry being written is held in memory and the first bytes are available
+    as soon as the first entry is. ``entries`` may itself be lazy.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=compression) as archive:
+        for name, content in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = compression
+            info.external_attr = 0o644 << 16
+            with archive.open(info, "w") as f:
+                f.write(content.encode("utf-8") if isinstance(content, str) else content)
+            yield buffer.drain()
+    yield buffer.drain()
@@ -0,0 +1,143 @@
+"""
+Flat vs structure-aware chunking of the knowledge base documents: chunk
+count, characters embedded, ingest time and retrieval hit rate on a set of
+labelled questions about ``project_assets``.
+
+Usage (from the project root):
+    python -m benchmarks.chunking [assets_dir] [--embeddings] [--k 3]
+
+"flat" is the previous pipeline (flattened text, fixed 1000/200 splits);
+"structured" follows headings, JSON records and DOM regions. Without
+``--embeddings`` retrieval is ranked with BM25 and ingest time covers
+chunking only; with it, chunks are embedded with the configured model and
+ranked by cosine similarity.
+"""
+import math
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from backend.services.document_processor import document_processor
+from backend.services.element_index import tokenize
+
+# (question, strings one retrieved chunk must contain to count as a hit)
+LABELLED_QUERIES = [
+    ("What discount does the SAVE15 code give?", ["SAVE15", "15% of subtotal"]),
+    ("How much does express shipping cost?", ["Express Shipping", "$10"]),
+    ("Error shown for an invalid email address", ["email", "Please enter a valid email address"]),
+    ("Price of the Smart Watch", ["Smart Watch", "$199.99"]),
+    ("What color must the Pay Now button be?", ["Pay Now", "#28a745"]),
+    ("apply_coupon response when the code is empty", ["apply_coupon", "Please enter a discount code"]),
+    ("Which fields are required to submit an order?", ["submit_order", "required_fields"]),
+    ("Is the discount code case insensitive?", ["save15", "uppercase"]),
+    ("What happens when the quantity is set to zero?", ["quantity", "remove"]),
+    ("Success message shown after payment", ["Payment Successful", "green"]),
+    ("Which tests are P0 critical?", ["P0", "Critical"]),
+    ("How must validation error messages be styled?", ["#dc3545", "below the field"]),
+    ("Shipping cost combined with a discount", ["Shipping Cost with Discount", "Express"]),
+]
+
+
+def load_documents(assets_dir: str):
+    documents = []
+    for filename in sorted(os.listdir(assets_dir)):
+        file_type = filename.rsplit(".", 1)[-1].lower()
+        if file_type not in ("md", "txt", "json", "html", "pdf"):
+            continue
+        mode = "rb" if file_type == "pdf" else "r"
+        with open(os.path.join(assets_dir, filename), mode, **({} if mode == "rb" else {"encoding": "utf-8"})) as f:
+            documents.append({"content": f.read(), "filename": filename, "file_type": file_type})
+    return documents
+
+
+class BM25:
+    def __init__(self, texts, k1: float = 1.5, b: float = 0.75):
+        self.docs = [Counter(tokenize(text)) for text in texts]
+        self.lengths = [sum(doc.values()) for doc in self.docs]
+        self.avg_length = sum(self.lengths) / max(1, len(self.lengths))
+        frequency = Counter(token for doc in self.docs for token in doc)
+        n = len(self.docs)
+        self.idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in frequency.items()}
+        self.k1, self.b = k1, b
+
+    def scores(self, query: str):
+        terms = tokenize(query)
+        result = []
+        for doc, length in zip(self.docs, self.lengths):
+            score = 0.0
+            for term in terms:
+                tf = doc.get(term, 0)
+                if tf:
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / self.avg_length)
+                    score += self.idf[term] * tf * (self.k1 + 1) / norm
+            result.append(score)
+        return np.array(result)
+
+
+def evaluate(mode: str, documents, k: int, embeddings=None):
+    document_processor.use_structured_chunking = mode == "structured"
+
+    started = time.perf_counter()
+    chunks = document_processor.process_multiple_documents(documents)
+    chunk_ms = (time.perf_counter() - started) * 1000
+    texts = [chunk.page_content for chunk in chunks]
+
+    embed_ms = 0.0
+    if embeddings is not None:
+        started = time.perf_counter()
+        vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+        embed_ms = (time.perf_counter() - started) * 1000
+        rank = lambda q: vectors @ np.asarray(embeddings.embed_text(q), dtype=np.float32)
+    else:
+        bm25 = BM25(texts)
+        rank = bm25.scores
+
+    hits = 0
+    for question, needles in LABELLED_QUERIES:
+        top = np.argsort(-rank(question))[:k]
+        if any(all(n.lower() in texts[i].lower() for n in needles) for i in top):
+            hits += 1
+
+    return {
+        "chunks": len(chunks),
+        "chars": sum(len(t) for t in texts),
+        "avg_chars": round(sum(len(t) for t in texts) / max(1, len(texts))),
+        "chunk_ms": round(chunk_ms, 1),
+        "embed_ms": round(embed_ms, 1),
+        "hit_rate": hits / len(LABELLED_QUERIES),
+    }
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    k = 3
+    if "--k" in sys.argv:
+        k = int(sys.argv[sys.argv.index("--k") + 1])
+        args = [a for a in args if a != str(k)]
+    assets_dir = args[0] if args else "project_assets"
+
+    embeddings = None
+    if "--embeddings" in sys.argv:
+        from backend.services.embeddings import embedding_service
+        embeddings = embedding_service
+
+    documents = load_documents(assets_dir)
+    print(f"{len(documents)} documents from {assets_dir}, {len(LABELLED_QUERIES)} labelled queries, "
+          f"{'embedding' if embeddings else 'BM25'} retrieval, hit@{k}\n")
+    # Warm up parsers and imports so neither mode pays first-use costs
+    for mode in ("flat", "structured"):
+        document_processor.use_structured_chunking = mode == "structured"
+        document_processor.process_multiple_documents(documents)
+
+    print(f"{'mode':<12}{'chunks':>8}{'chars':>9}{'avg':>7}{'chunk ms':>10}{'embed ms':>10}{'hit rate':>10}")
+    for mode in ("flat", "structured"):
+        r = evaluate(mode, documents, k, embeddings)
+        print(f"{mode:<12}{r['chunks']:>8}{r['chars']:>9}{r['avg_chars']:>7}{r['chunk_ms']:>10}"
+              f"{r['embed_ms']:>10}{r['hit_rate']:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
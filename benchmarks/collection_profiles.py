@@ -0,0 +1,132 @@
+"""
+Collection profiles: RAM footprint vs recall@k vs search latency.
+
+Usage (from the project root):
+    python -m benchmarks.collection_profiles [--points 20000] [--queries 200] [--k 10]
+                                             [--url http://localhost:6333]
+
+Each profile gets its own collection filled with the same clustered,
+unit-normalized 384-d vectors and chunk-sized payloads; recall@k is measured
+against exact NumPy search.
+
+RAM is estimated from the profile (float32 or quantized vectors, HNSW links
+and payloads, each counted only when held in RAM). The embedded Qdrant
+(default, no ``--url``) ignores quantization and HNSW settings and always
+searches exactly, so without a server the quantized recall is additionally
+emulated in NumPy (int8 scalar and binary codes, oversampled and rescored on
+the float32 vectors the same way Qdrant does).
+"""
+import sys
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from backend.services.collection_profiles import (
+    COLLECTION_PROFILES,
+    create_collection_kwargs,
+    get_profile,
+    search_params,
+)
+
+DIMENSION = 384
+PAYLOAD_BYTES = 1100  # ~1000 character chunk text plus metadata
+
+
+def option(name: str, default):
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def make_vectors(count: int, queries: int, clusters: int = 200):
+    rng = np.random.default_rng(7)
+    centers = rng.standard_normal((clusters, DIMENSION), dtype=np.float32)
+    data = centers[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, DIMENSION), dtype=np.float32)
+    query = centers[rng.integers(0, clusters, queries)] + 0.6 * rng.standard_normal((queries, DIMENSION), dtype=np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    query /= np.linalg.norm(query, axis=1, keepdims=True)
+    return data, query
+
+
+def estimated_ram_mb(profile, count: int) -> float:
+    code_bytes = {None: 0, "scalar": DIMENSION, "product": DIMENSION * 4 / 16, "binary": DIMENSION / 8}
+    total = count * code_bytes[profile["quantization"]]
+    if not profile["on_disk_vectors"]:
+        total += count * DIMENSION * 4
+    if not profile["hnsw_on_disk"]:
+        total += count * profile["hnsw_m"] * 2 * 4
+    if not profile["on_disk_payload"]:
+        total += count * PAYLOAD_BYTES
+    return total / 1024 / 1024
+
+
+def emulated_recall(kind, data, queries, truth, k: int, oversampling: float):
+    """Quantized candidate search + float32 rescoring, as Qdrant performs it"""
+    if kind == "scalar":
+        low, high = np.quantile(data, 0.005), np.quantile(data, 0.995)
+        scale = (high - low) / 255
+        codes = np.clip(np.round((data - low) / scale), 0, 255).astype(np.uint8)
+        approx = lambda q: codes.astype(np.float32) @ q
+    elif kind == "binary":
+        codes = data > 0
+        approx = lambda q: -np.count_nonzero(codes != (q > 0), axis=1)
+    else:
+        return None
+
+    candidates = int(k * oversampling)
+    hits = 0
+    for q, expected in zip(queries, truth):
+        shortlist = np.argpartition(-approx(q), candidates)[:candidates]
+        rescored = shortlist[np.argsort(-(data[shortlist] @ q))[:k]]
+        hits += len(set(rescored.tolist()) & set(expected.tolist()))
+    return hits / (len(queries) * k)
+
+
+def main():
+    count = int(option("--points", 20000))
+    query_count = int(option("--queries", 200))
+    k = int(option("--k", 10))
+    url = option("--url", None)
+
+    client = QdrantClient(url=url) if url else QdrantClient(location=":memory:")
+    data, queries = make_vectors(count, query_count)
+    truth = np.argsort(-(queries @ data.T), axis=1)[:, :k]
+    payloads = [{"text": "x" * (PAYLOAD_BYTES - 100), "source": f"doc_{i % 50}.md", "file_type": "md"} for i in range(count)]
+
+    print(f"Qdrant: {url or ':memory: (quantization emulated)'}, {count} points, {query_count} queries, recall@{k}\n")
+    print(f"{'profile':<10}{'RAM MB':>9}{'recall':>9}{'emulated':>10}{'p50 ms':>9}{'p95 ms':>9}")
+
+    for name in COLLECTION_PROFILES:
+        profile = get_profile(name)
+        collection = f"bench_profile_{name}"
+        if client.collection_exists(collection):
+            client.delete_collection(collection)
+        client.create_collection(collection, **create_collection_kwargs(profile, DIMENSION))
+        client.upload_collection(
+            collection_name=collection,
+            vectors=data,
+            payload=payloads,
+            ids=list(range(count)),
+            batch_size=256,
+            wait=True
+        )
+
+        latencies, hits = [], 0
+        params = search_params(profile)
+        for q, expected in zip(queries, truth):
+            started = time.perf_counter()
+            results = client.search(collection, query_vector=q, limit=k, search_params=params, with_payload=False)
+            latencies.append((time.perf_counter() - started) * 1000)
+            found = {r.id for r in results}
+            hits += len(found & set(expected.tolist()))
+
+        emulated = None if url else emulated_recall(profile["quantization"], data, queries, truth, k, profile["oversampling"])
+        print(
+            f"{name:<10}{estimated_ram_mb(profile, count):>9.1f}{hits / (query_count * k):>9.3f}"
+            f"{'' if emulated is None else f'{emulated:.3f}':>10}"
+            f"{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 95):>9.2f}"
+        )
+        client.delete_collection(collection)
+
+
+if __name__ == "__main__":
+    main()
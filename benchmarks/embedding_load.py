@@ -0,0 +1,154 @@
+"""
+Load test for the embedding worker: per-request embedding vs dynamic
+batching.
+
+Usage (from the project root):
+    python -m benchmarks.embedding_load [--concurrency 1,4,16,64] [--seconds 10]
+                                        [--query-rate 20] [--burst 1024]
+
+1. Throughput: N client threads each send single-query requests (unique
+   texts, so no cache hits) back to back; requests/s and latency
+   percentiles per concurrency level.
+2. Mixed traffic: queries arrive at ``--query-rate`` per second (Poisson)
+   while ``--burst`` document texts are ingested every 3 seconds, the way
+   an upload lands; query latency percentiles and ingest texts/s.
+
+Each part runs against a worker started with ``EMBEDDING_WORKER_BATCHING``
+false ("inline": every request embedded on its own, as before) and true
+("batched"). Uses the configured ``EMBEDDING_MODEL``.
+"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+os.environ["EMBEDDING_WORKER_SOCKET"] = ""
+
+from backend.services.embedding_client import RemoteEmbeddings
+from backend.services.embeddings import EMBEDDING_MODEL
+
+DOCUMENT = (
+    "The discount code SAVE15 applies 15% off the subtotal. Express shipping costs $10 "
+    "and standard shipping is free. Invalid email addresses show an inline red error. "
+)
+
+
+def option(name: str, default: str) -> str:
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def start_worker(batching: bool):
+    socket_path = os.path.join(tempfile.mkdtemp(), "embeddings.sock")
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.embedding_worker:app", "--uds", socket_path, "--log-level", "warning"],
+        env={**os.environ, "EMBEDDING_WORKER_BATCHING": str(batching).lower()}
+    )
+    for _ in range(600):
+        if os.path.exists(socket_path):
+            return worker, socket_path
+        time.sleep(0.1)
+    worker.kill()
+    raise RuntimeError("Embedding worker did not start")
+
+
+def percentiles(latencies):
+    if not latencies:
+        return "n/a"
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return f"{p50:>8.1f}{p95:>8.1f}{p99:>8.1f}"
+
+
+def throughput(socket_path: str, concurrency: int, seconds: float):
+    latencies, lock, stop = [], threading.Lock(), threading.Event()
+
+    def client(lane: int):
+        remote = RemoteEmbeddings(socket_path, EMBEDDING_MODEL)
+        i = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            remote.embed_query(f"lane {lane} query {i} {random.random()}: is the discount code case insensitive?")
+            with lock:
+                latencies.append(time.perf_counter() - started)
+            i += 1
+
+    threads = [threading.Thread(target=client, args=(lane,)) for lane in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / seconds, latencies
+
+
+def mixed(socket_path: str, seconds: float, query_rate: float, burst: int):
+    query_latencies, ingested, lock, stop = [], [0], threading.Lock(), threading.Event()
+
+    def query(i: int):
+        started = time.perf_counter()
+        RemoteEmbeddings(socket_path, EMBEDDING_MODEL).embed_query(f"query {i} {random.random()}: shipping cost?")
+        with lock:
+            query_latencies.append(time.perf_counter() - started)
+
+    def ingest():
+        remote = RemoteEmbeddings(socket_path, EMBEDDING_MODEL)
+        while not stop.is_set():
+            texts = [f"chunk {i} {random.random()} {DOCUMENT}" for i in range(burst)]
+            remote.embed_documents(texts)
+            ingested[0] += len(texts)
+            stop.wait(3)
+
+    ingest_thread = threading.Thread(target=ingest)
+    ingest_thread.start()
+    started, queries, i = time.perf_counter(), [], 0
+    while time.perf_counter() - started < seconds:
+        thread = threading.Thread(target=query, args=(i,))
+        thread.start()
+        queries.append(thread)
+        i += 1
+        time.sleep(random.expovariate(query_rate))
+    stop.set()
+    for thread in queries:
+        thread.join()
+    ingest_thread.join()
+    return query_latencies, ingested[0] / (time.perf_counter() - started)
+
+
+def main():
+    levels = [int(c) for c in option("--concurrency", "1,4,16,64").split(",")]
+    seconds = float(option("--seconds", "10"))
+    query_rate = float(option("--query-rate", "20"))
+    burst = int(option("--burst", "1024"))
+
+    print(f"Model: {EMBEDDING_MODEL}, {seconds:.0f}s per run\n")
+    rows = {}
+    for mode, batching in (("inline", False), ("batched", True)):
+        worker, socket_path = start_worker(batching)
+        try:
+            RemoteEmbeddings(socket_path, EMBEDDING_MODEL).embed_documents([DOCUMENT] * 8)  # warm up
+            rows[mode] = [(c,) + throughput(socket_path, c, seconds) for c in levels]
+            rows[mode + " mixed"] = mixed(socket_path, seconds, query_rate, burst)
+        finally:
+            worker.terminate()
+            worker.wait()
+
+    print("1. Single-query requests, back to back")
+    print(f"{'mode':<9}{'clients':>8}{'req/s':>9}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}")
+    for mode in ("inline", "batched"):
+        for concurrency, rate, latencies in rows[mode]:
+            print(f"{mode:<9}{concurrency:>8}{rate:>9.1f}{percentiles(latencies)}")
+
+    print(f"\n2. {query_rate:.0f} queries/s with {burst}-text ingest bursts every 3s")
+    print(f"{'mode':<9}{'queries':>8}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}{'ingest texts/s':>16}")
+    for mode in ("inline", "batched"):
+        latencies, ingest_rate = rows[mode + " mixed"]
+        print(f"{mode:<9}{len(latencies):>8}{percentiles(latencies)}{ingest_rate:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Streamlit page interaction latency against a live backend.
+
+Usage (from the project root):
+    python -m benchmarks.frontend_latency [--app frontend/app.py] [--reruns 20] [--cases 200]
+
+Starts the API on port 8000 (where the frontend points by default) with
+``LLM_PROVIDER=fake`` and an in-memory Qdrant, then drives the page with
+Streamlit's ``AppTest``:
+
+1. Idle rerun: what every click costs before the clicked action runs, in
+   ms, HTTP requests and new TCP connections per rerun.
+2. Test case list: a rerun of step 2 holding ``--cases`` test cases.
+3. Rebuilding the knowledge base with unchanged files: uploading every file
+   again vs sending content hashes first (``/api/documents/check``) and
+   uploading only unknown files. AppTest cannot drive ``st.file_uploader``,
+   so this part replays both request sequences directly.
+
+Pass ``--app`` an older copy of the page to compare.
+"""
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+import urllib3
+from streamlit.testing.v1 import AppTest
+
+API_BASE_URL = "http://127.0.0.1:8000"
+ASSETS = "project_assets"
+
+
+def option(name: str, default: str) -> str:
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+class Counter:
+    """Counts HTTP requests and new TCP connections made by the page"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        send, connect = requests.Session.send, urllib3.connection.HTTPConnection.connect
+
+        def counted_send(session, *args, **kwargs):
+            self.requests += 1
+            return send(session, *args, **kwargs)
+
+        def counted_connect(conn, *args, **kwargs):
+            self.connections += 1
+            return connect(conn, *args, **kwargs)
+
+        requests.Session.send = counted_send
+        urllib3.connection.HTTPConnection.connect = counted_connect
+
+    def reset(self):
+        self.requests = self.connections = 0
+
+
+def start_backend() -> subprocess.Popen:
+    state = tempfile.mkdtemp()
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", "8000", "--log-level", "warning"],
+        env={
+            **os.environ,
+            "LLM_PROVIDER": "fake",
+            "QDRANT_URL": ":memory:",
+            "KB_MANIFEST_PATH": os.path.join(state, "knowledge_base.json"),
+            "STATE_DB_PATH": os.path.join(state, "app.db"),
+            "REINDEX_STATE_PATH": os.path.join(state, "reindex.json")
+        }
+    )
+    for _ in range(600):
+        try:
+            requests.get(f"{API_BASE_URL}/health", timeout=1)
+            return backend
+        except requests.RequestException:
+            time.sleep(0.5)
+    backend.kill()
+    raise RuntimeError("Backend did not start")
+
+
+FEATURES = ["Discount Code", "Shipping", "Payment", "Cart", "Form Validation", "Checkout", "Email", "Address"]
+
+
+def fake_cases(count: int):
+    return [
+        {
+            "test_id": f"TC-{i:04d}",
+            "feature": FEATURES[i % len(FEATURES)],
+            "test_scenario": f"Scenario {i}: {FEATURES[i % len(FEATURES)].lower()} with a cart of {i % 5 + 1} items",
+            "test_type": ("positive", "negative", "edge-case")[i % 3],
+            "preconditions": "Cart contains one item",
+            "test_steps": ["Add an item to the cart", "Enter a discount code", "Click Apply"],
+            "expected_result": "The discount is applied to the total",
+            "grounded_in": "product_specs.md",
+            "priority": ("High", "Medium", "Low")[i % 3 - 1]
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def save_suite(test_cases) -> str:
+    response = requests.post(f"{API_BASE_URL}/api/test-suites", json={"query": "benchmark", "test_cases": test_cases})
+    response.raise_for_status()
+    return response.json()["suite_id"]
+
+
+def step_session(at: AppTest, step: int, test_cases):
+    """Session of a user who generated ``test_cases`` and is on ``step``"""
+    at.session_state["knowledge_base_built"] = True
+    at.session_state["html_uploaded"] = True
+    at.session_state["current_step"] = step
+    # Pages before server-side paging kept the cases in the session
+    at.session_state["test_cases"] = test_cases
+    at.session_state["suite_id"] = save_suite(test_cases)
+    at.session_state["suite_total"] = len(test_cases)
+
+
+def time_reruns(at: AppTest, counter: Counter, reruns: int):
+    at.run()  # warm up: first run, caches filled
+    counter.reset()
+    started = time.perf_counter()
+    for _ in range(reruns):
+        at.run()
+    elapsed = (time.perf_counter() - started) / reruns
+    return elapsed * 1000, counter.requests / reruns, counter.connections / reruns
+
+
+def asset_files():
+    files = []
+    for name in sorted(os.listdir(ASSETS)):
+        with open(os.path.join(ASSETS, name), "rb") as f:
+            files.append((name, f.read()))
+    return files
+
+
+def rebuild(files, hash_first: bool) -> float:
+    documents = [(name, data) for name, data in files if not name.endswith(".html")]
+    html = next((name, data) for name, data in files if name.endswith(".html"))
+    started = time.perf_counter()
+    with requests.Session() as session:
+        upload_docs, upload_page = documents, True
+        if hash_first:
+            check = session.post(f"{API_BASE_URL}/api/documents/check", json={
+                "documents": [{"filename": n, "content_hash": hashlib.sha256(d).hexdigest()} for n, d in documents],
+                "html": {"filename": html[0], "content_hash": hashlib.sha256(html[1]).hexdigest()}
+            }).json()
+            upload_docs = [(n, d) for n, d in documents if n in check["missing"]]
+            upload_page = not check["html_stored"]
+        if upload_docs:
+            session.post(
+                f"{API_BASE_URL}/api/upload-documents",
+                files=[("files", (n, d, "application/octet-stream")) for n, d in upload_docs]
+            ).raise_for_status()
+        if upload_page:
+            session.post(
+                f"{API_BASE_URL}/api/upload-html",
+                files={"file": (html[0], html[1], "text/html")}
+            ).raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    app = option("--app", "frontend/app.py")
+    reruns = int(option("--reruns", "20"))
+    cases = int(option("--cases", "200"))
+
+    backend = start_backend()
+    counter = Counter()
+    try:
+        files = asset_files()
+        rebuild(files, hash_first=False)  # knowledge base built once
+
+        print(f"App: {app}, {reruns} reruns each\n")
+        print(f"{'interaction':<28}{'ms':>9}{'requests':>10}{'connects':>10}")
+
+        at = AppTest.from_file(app, default_timeout=120)
+        ms, reqs, conns = time_reruns(at, counter, reruns)
+        print(f"{'idle rerun (step 1)':<28}{ms:>9.1f}{reqs:>10.1f}{conns:>10.1f}")
+
+        at = AppTest.from_file(app, default_timeout=120)
+        step_session(at, 2, fake_cases(cases))
+        ms, reqs, conns = time_reruns(at, counter, reruns)
+        print(f"{f'step 2 with {cases} cases':<28}{ms:>9.1f}{reqs:>10.1f}{conns:>10.1f}")
+        print(f"{'  elements rendered':<28}{len(at.markdown) + len(at.expander):>9}")
+
+        for label, hash_first in (("rebuild: upload all", False), ("rebuild: hash check first", True)):
+            timings = sorted(rebuild(files, hash_first) for _ in range(5))
+            print(f"{label:<28}{timings[2]:>9.1f}")
+    finally:
+        backend.terminate()
+        backend.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+API worker processes with an in-process embedding model each ("local") vs
+one shared embedding worker over a Unix socket ("shared"): query embedding
+requests/s and total RSS at 1, 4 and 8 API processes.
+
+Usage (from the project root):
+    python -m benchmarks.multiworker [--workers 1,4,8] [--seconds 10] [--threads 4]
+
+Every process imports ``backend.main`` exactly like a uvicorn worker, waits
+until all are loaded, then embeds unique queries (no cache hits) from
+``--threads`` threads for ``--seconds``. RSS is summed over the API
+processes plus, in shared mode, the embedding worker. Linux only (reads
+/proc). Qdrant runs in-memory and is not queried.
+"""
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def option(name: str, default: str) -> str:
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def api_process(index: int, threads: int, ready, start, stop, results):
+    import backend.main  # noqa: F401  (the whole app, as a uvicorn worker loads it)
+    from backend.services.vector_store import vector_store_service
+
+    embedder = vector_store_service.embedder
+    counts = [0] * threads
+
+    def loop(lane: int):
+        i = 0
+        while not stop.is_set():
+            embedder.embed_text(f"process {index} lane {lane} query {i}: validate the discount code on checkout")
+            counts[lane] += 1
+            i += 1
+
+    ready.put(os.getpid())
+    start.wait()
+    lanes = [threading.Thread(target=loop, args=(lane,)) for lane in range(threads)]
+    for lane in lanes:
+        lane.start()
+    for lane in lanes:
+        lane.join()
+    results.put((sum(counts), rss_mb(os.getpid())))
+
+
+def start_worker(socket_path: str) -> subprocess.Popen:
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.embedding_worker:app", "--uds", socket_path, "--log-level", "warning"],
+        env={**os.environ, "EMBEDDING_WORKER_SOCKET": ""}
+    )
+    for _ in range(600):
+        if os.path.exists(socket_path):
+            return worker
+        time.sleep(0.1)
+    worker.kill()
+    raise RuntimeError("Embedding worker did not start")
+
+
+def run(mode: str, processes: int, threads: int, seconds: float):
+    ctx = multiprocessing.get_context("spawn")
+    worker, socket_path = None, os.path.join(tempfile.mkdtemp(), "embeddings.sock")
+    if mode == "shared":
+        worker = start_worker(socket_path)
+    # Children inherit the environment at spawn time
+    os.environ["EMBEDDING_WORKER_SOCKET"] = socket_path if mode == "shared" else ""
+
+    ready, results = ctx.Queue(), ctx.Queue()
+    start, stop = ctx.Event(), ctx.Event()
+    children = [
+        ctx.Process(target=api_process, args=(i, threads, ready, start, stop, results))
+        for i in range(processes)
+    ]
+    try:
+        for child in children:
+            child.start()
+        for _ in children:
+            ready.get(timeout=600)
+
+        start.set()
+        time.sleep(seconds)
+        stop.set()
+        reports = [results.get(timeout=120) for _ in children]
+        for child in children:
+            child.join()
+
+        total_rss = sum(rss for _, rss in reports)
+        if worker is not None:
+            total_rss += rss_mb(worker.pid)
+        return sum(count for count, _ in reports) / seconds, total_rss
+    finally:
+        if worker is not None:
+            worker.terminate()
+            worker.wait()
+
+
+def main():
+    counts = [int(c) for c in option("--workers", "1,4,8").split(",")]
+    seconds = float(option("--seconds", "10"))
+    threads = int(option("--threads", "4"))
+
+    print(f"{seconds:.0f}s per run, {threads} threads per API process, unique queries\n")
+    print(f"{'processes':>9}  {'mode':<8}{'req/s':>9}{'RSS MB':>10}{'MB/process':>12}")
+    for processes in counts:
+        for mode in ("local", "shared"):
+            throughput, rss = run(mode, processes, threads, seconds)
+            print(f"{processes:>9}  {mode:<8}{throughput:>9.1f}{rss:>10.0f}{rss / processes:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
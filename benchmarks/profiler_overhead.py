@@ -0,0 +1,65 @@
+"""
+Cost of leaving the continuous stack sampler on.
+
+Usage (from the project root):
+    python -m benchmarks.profiler_overhead [--seconds 2] [--threads 4] [--repeat 3]
+
+Runs a CPU-bound workload (chunking text and hashing it, like ingestion)
+in ``--threads`` threads for ``--seconds``, without the sampler and with
+it at 50, 20 and 5 ms intervals, and reports the throughput lost (best of
+``--repeat`` runs each, after a warm-up run) and the CPU time the sampler
+thread spent per sample (waiting for the GIL excluded) with
+the share of one core that makes at that interval. Throughput is noisy
+on small machines; the sampler's CPU share is the stable figure.
+"""
+import hashlib
+import threading
+import time
+
+from backend.utils.profiling import StackSampler
+
+from benchmarks.frontend_latency import option
+
+TEXT = "The checkout form applies the discount code before shipping is computed. " * 200
+
+
+def workload(deadline: float, done: list):
+    count = 0
+    while time.perf_counter() < deadline:
+        for start in range(0, len(TEXT), 500):
+            hashlib.sha256(TEXT[start:start + 500].encode()).hexdigest()
+        count += 1
+    done.append(count)
+
+
+def throughput(seconds: float, threads: int) -> float:
+    done: list = []
+    deadline = time.perf_counter() + seconds
+    workers = [threading.Thread(target=workload, args=(deadline, done)) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(done) / seconds
+
+
+def main():
+    seconds = float(option("--seconds", "2"))
+    threads = int(option("--threads", "4"))
+    repeat = int(option("--repeat", "3"))
+
+    throughput(seconds, threads)
+    baseline = max(throughput(seconds, threads) for _ in range(repeat))
+    print(f"{'sampler':<20}{'ops/s':>12}{'slowdown':>10}{'cpu us/sample':>16}{'cpu share':>11}")
+    print(f"{'off':<20}{baseline:>12.0f}{'':>10}{'':>16}")
+    for interval_ms in (50, 20, 5):
+        sampler = StackSampler(interval_ms, window_seconds=120)
+        sampler.start()
+        rate = max(throughput(seconds, threads) for _ in range(repeat))
+        sampler.stop()
+        per_sample = sampler.sampling_seconds / max(sampler.ticks, 1) * 1e6
+        print(f"{f'every {interval_ms} ms':<20}{rate:>12.0f}{1 - rate / baseline:>10.1%}{per_sample:>16.1f}{per_sample / (interval_ms * 1000):>11.2%}")
+
+
+if __name__ == "__main__":
+    main()
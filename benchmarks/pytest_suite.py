@@ -0,0 +1,128 @@
+"""
+Wall time of a suite run as standalone scripts vs as the assembled pytest suite.
+
+Usage (from the project root):
+    python -m benchmarks.pytest_suite [--cases 100] [--workers 4]
+
+Starts the API on port 8000 with ``LLM_PROVIDER=fake`` and an in-memory
+Qdrant, uploads ``project_assets/checkout.html``, saves ``--cases`` test
+cases as a suite and exports it twice (``scripts.zip?generate_missing=true``
+with ``layout=scripts`` and ``layout=pytest``). Then it times:
+
+1. every script run one by one (``python TC-0001.py``): one interpreter and
+   one browser per script
+2. ``pytest`` on the assembled suite: one browser for the run
+3. ``pytest -n --workers`` (pytest-xdist): one browser per worker
+
+Running scripts needs Chrome. Without it only the browser-independent part
+is measured: interpreter start and Selenium imports per script vs one
+pytest collection of the suite.
+"""
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+import requests
+
+from benchmarks.frontend_latency import API_BASE_URL, fake_cases, option, save_suite, start_backend
+
+
+def export(suite_id: str, layout: str, target: str) -> str:
+    response = requests.get(
+        f"{API_BASE_URL}/api/test-suites/{suite_id}/scripts.zip",
+        params={"generate_missing": "true", "layout": layout},
+        timeout=600
+    )
+    response.raise_for_status()
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        archive.extractall(target)
+        root = archive.namelist()[0].split("/")[0]
+    return os.path.join(target, root)
+
+
+def timed(command, cwd: str):
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
+    return time.perf_counter() - started, result
+
+
+def has_chrome() -> bool:
+    from backend.services.driver_shim import create_headless_driver
+
+    try:
+        create_headless_driver().quit()
+        return True
+    except Exception:
+        return False
+
+
+def run_scripts(scripts_dir: str) -> float:
+    total, failed = 0.0, 0
+    scripts = sorted(f for f in os.listdir(scripts_dir) if f.endswith(".py") and f != "page_objects.py")
+    for script in scripts:
+        seconds, result = timed([sys.executable, script], scripts_dir)
+        total += seconds
+        failed += result.returncode != 0
+    print(f"{'scripts one by one':<34}{total:>9.1f}  {len(scripts)} scripts, {failed} failed")
+    return total
+
+
+def run_pytest(suite_dir: str, label: str, *args: str) -> float:
+    seconds, result = timed([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", *args], suite_dir)
+    print(f"{label:<34}{seconds:>9.1f}  {result.stdout.strip().splitlines()[-1]}")
+    return seconds
+
+
+def startup_overhead(scripts_dir: str, samples: int) -> float:
+    """Interpreter start and Selenium imports, paid once per standalone script"""
+    command = [sys.executable, "-c", "import selenium.webdriver, selenium.webdriver.support.ui"]
+    return sum(timed(command, scripts_dir)[0] for _ in range(samples)) / samples
+
+
+def main():
+    count = int(option("--cases", "100"))
+    workers = option("--workers", "4")
+
+    server = start_backend()
+    try:
+        with open(os.path.join("project_assets", "checkout.html"), "rb") as f:
+            requests.post(
+                f"{API_BASE_URL}/api/upload-html", files={"file": ("checkout.html", f, "text/html")}
+            ).raise_for_status()
+        suite_id = save_suite(fake_cases(count))
+        target = tempfile.mkdtemp()
+        scripts_root = export(suite_id, "scripts", os.path.join(target, "scripts"))
+        pytest_root = export(suite_id, "pytest", os.path.join(target, "pytest"))
+    finally:
+        server.terminate()
+        server.wait()
+
+    tests_dir = os.path.join(pytest_root, "tests")
+    functions = sum(
+        open(os.path.join(tests_dir, f), encoding="utf-8").read().count("\ndef test_")
+        for f in os.listdir(tests_dir)
+    )
+    print(f"{count} test cases -> {functions} test functions in {len(os.listdir(tests_dir))} modules\n")
+    print(f"{'run':<34}{'seconds':>9}")
+
+    scripts_dir = os.path.join(scripts_root, "scripts")
+    if has_chrome():
+        one_by_one = run_scripts(scripts_dir)
+        suite = run_pytest(pytest_root, "pytest suite")
+        parallel = run_pytest(pytest_root, f"pytest suite -n {workers}", "-n", workers)
+        print(f"\nspeedup: {one_by_one / suite:.1f}x, {one_by_one / parallel:.1f}x with xdist")
+        return
+
+    print("Chrome is not available: browser-independent overhead only\n")
+    per_script = startup_overhead(scripts_dir, samples=min(count, 20))
+    print(f"{'interpreter + imports per script':<34}{per_script:>9.3f}")
+    print(f"{'  x scripts one by one':<34}{per_script * count:>9.1f}")
+    run_pytest(pytest_root, "pytest collection", "--collect-only")
+
+
+if __name__ == "__main__":
+    main()
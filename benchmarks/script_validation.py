@@ -0,0 +1,126 @@
+"""
+Cost and rejection rates of the static script validator.
+
+Usage (from the project root):
+    python -m benchmarks.script_validation [--html project_assets/checkout.html] [--repeat 20]
+
+Validates, against the page's element index, a corpus of:
+
+- valid scripts: one per selector of the element index (raw locators) and
+  one per page object method, written the way the prompts ask for
+- defective scripts: a valid script with one typical LLM mistake each
+  (invented id, invented XPath, generic XPath, time.sleep, no assertion,
+  syntax error, Selenium 3 API, unknown page object method)
+- raw LLM output: markdown fences and missing imports, before and after
+  ``clean_script``
+
+and reports milliseconds per script and the share rejected per group.
+"""
+import statistics
+import time
+
+from backend.services.html_analyzer import analyze_html
+from backend.services.page_object_generator import page_object_generator
+from backend.services.script_validator import ScriptValidator, clean_script
+
+from benchmarks.frontend_latency import option
+
+HEADER = """from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+import os
+
+driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
+try:
+    driver.get("file://" + os.path.abspath("checkout.html"))
+    wait = WebDriverWait(driver, 10)
+"""
+
+FOOTER = """    assert driver.find_element(By.ID, "total").text
+finally:
+    driver.quit()
+"""
+
+PAGE_OBJECT_SCRIPT = """from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from page_objects import CheckoutPage
+
+driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
+try:
+    page = CheckoutPage(driver).open()
+    {call}
+    assert page.get_total_text()
+finally:
+    driver.quit()
+"""
+
+
+def raw_script(locator: str) -> str:
+    return HEADER + f"    wait.until(EC.element_to_be_clickable(({locator}))).click()\n" + FOOTER
+
+
+def corpus(element_info, page_object):
+    locators = [
+        element[key]
+        for group, elements in element_info.items() if group != "all_ids"
+        for element in elements
+        for key in ("selector_by_id", "selector_by_name", "selector_by_text") if element.get(key)
+    ]
+    calls = []
+    for method in page_object["api"]:
+        for signature in method["signature"].split(" / "):
+            name, params = signature.rstrip(")").split("(")
+            calls.append(f"page.{name}({', '.join(repr('x') for _ in params.split(', ') if params)})")
+    base = raw_script(locators[0])
+
+    return {
+        "valid: raw locators": [raw_script(locator) for locator in locators],
+        "valid: page object": [PAGE_OBJECT_SCRIPT.format(call=call) for call in calls],
+        "defect: invented id": [raw_script("By.ID, 'coupon-code-input'")],
+        "defect: invented XPath": [raw_script("By.XPATH, \"//button[text()='Redeem']\"")],
+        "defect: generic XPath": [raw_script("By.XPATH, '//button'")],
+        "defect: time.sleep": [base.replace("    wait = ", "    import time\n    time.sleep(3)\n    wait = ")],
+        "defect: no assertion": [base.replace(FOOTER, "    print('done')\nfinally:\n    driver.quit()\n")],
+        "defect: syntax error": [base.replace("try:", "try")],
+        "defect: Selenium 3 API": [base.replace(FOOTER, "    driver.find_element_by_id('total')\n" + FOOTER)],
+        "defect: unknown page method": [PAGE_OBJECT_SCRIPT.format(call="page.apply_coupon('SAVE10')")],
+    }
+
+
+def main():
+    html_path = option("--html", "project_assets/checkout.html")
+    repeat = int(option("--repeat", "20"))
+    with open(html_path, encoding="utf-8") as f:
+        html_content = f.read()
+
+    element_info = analyze_html(html_content)
+    page_object = page_object_generator.build(element_info)
+    validator = ScriptValidator()
+
+    started = time.perf_counter()
+    validator.validate("assert True", html_content, element_info, page_object["source"])
+    print(f"Page index for validation built in {(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+    print(f"{'scripts':<30}{'count':>6}{'rejected':>10}{'ms avg':>9}{'ms p95':>9}")
+    for label, scripts in corpus(element_info, page_object).items():
+        timings, rejected = [], 0
+        for script in scripts:
+            for _ in range(repeat):
+                result = validator.validate(script, html_content, element_info, page_object["source"])
+                timings.append(result["milliseconds"])
+            rejected += not result["valid"]
+        p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+        print(f"{label:<30}{len(scripts):>6}{rejected / len(scripts):>10.0%}{statistics.mean(timings):>9.2f}{p95:>9.2f}")
+
+    raw = "```python\n" + raw_script("By.ID, 'total'").split("\n\n", 1)[1] + "```"
+    for label, script in (("raw LLM output", raw), ("after clean_script", clean_script(raw))):
+        result = validator.validate(script, html_content, element_info, page_object["source"])
+        print(f"{label:<30}{1:>6}{int(not result['valid']):>10.0%}{result['milliseconds']:>9.2f}  {'; '.join(result['errors'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Prompt size of Selenium script generation: full element index vs page object
+API, each with and without relevance pruning, plus the coverage of elements
+each sample test case needs after pruning.
+
+Usage (from the project root):
+    python -m benchmarks.selenium_prompt_tokens [path/to/page.html] [--embeddings]
+
+Without ``--embeddings`` pruning uses lexical matching only (no model load).
+
+Token counts use tiktoken's o200k_base encoding (gpt-4o family) when it is
+available, otherwise a 4-characters-per-token estimate.
+"""
+import sys
+
+from backend.services.element_index import ElementIndexService
+from backend.services.html_analyzer import analyze_html
+from backend.services.page_object_generator import page_object_generator
+from backend.services.selenium_prompts import build_page_object_prompt, build_selenium_prompt
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text))
+except Exception:
+    # tiktoken missing or its encoding file unreachable
+    def count_tokens(text: str) -> int:
+        return len(text) // 4
+
+
+SAMPLE_TEST_CASES = [
+    {
+        "test_id": "TC-001",
+        "feature": "Discount Code",
+        "test_scenario": "Apply valid discount code SAVE15 to a cart with one item",
+        "test_type": "positive",
+        "preconditions": "Cart contains Wireless Headphones",
+        "test_steps": [
+            "Click Add to Cart for Wireless Headphones",
+            "Enter SAVE15 in the discount code field",
+            "Click Apply"
+        ],
+        "expected_result": "Discount of 15% is applied and the total is updated",
+        "needs": ["addToCart('Wireless Headphones', 79.99)", "discountCode", "applyDiscount()", "total"],
+    },
+    {
+        "test_id": "TC-002",
+        "feature": "Checkout Form",
+        "test_scenario": "Submit the form with an invalid email address",
+        "test_type": "negative",
+        "preconditions": "Cart contains at least one item",
+        "test_steps": [
+            "Add Smart Watch to cart",
+            "Enter name and address",
+            "Enter 'invalid-email' in the email field",
+            "Click Pay Now"
+        ],
+        "expected_result": "Error 'Please enter a valid email address' is shown in red",
+        "needs": ["addToCart('Smart Watch', 199.99)", "name", "email", "address", "payButton", "emailError"],
+    },
+]
+
+SAMPLE_CONTEXT = [open("project_assets/product_specs.md", encoding="utf-8").read()[:1000]]
+
+
+def _element_keys(element_info):
+    return {
+        element.get("id") or element.get("onclick") or element.get("name")
+        for elements in element_info.values() if isinstance(elements, list)
+        for element in elements
+    }
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    html_path = args[0] if args else "project_assets/checkout.html"
+    html_content = open(html_path, encoding="utf-8").read()
+
+    if "--embeddings" in sys.argv:
+        from backend.services.embeddings import embedding_service
+        indexes = ElementIndexService(embedding_service.embed_documents, embedding_service.embed_text)
+    else:
+        indexes = ElementIndexService()
+
+    element_info = analyze_html(html_content)
+    page_object = page_object_generator.get_page_object(html_content, element_info)
+    element_index = indexes.build_element_index(element_info)
+    api_index = indexes.build_api_index(page_object["api"])
+
+    print(f"{'test':<8}{'full index':>12}{'pruned':>8}{'page object':>13}{'pruned':>8}{'coverage':>10}")
+    for test_case in SAMPLE_TEST_CASES:
+        pruned_elements = indexes.prune_elements(element_index, element_info, test_case)
+        pruned_api = indexes.prune_api(api_index, page_object["api"], test_case)
+
+        full = sum(count_tokens(part) for part in build_selenium_prompt(test_case, element_info, SAMPLE_CONTEXT))
+        full_pruned = sum(count_tokens(part) for part in build_selenium_prompt(test_case, pruned_elements, SAMPLE_CONTEXT))
+        api = sum(count_tokens(part) for part in build_page_object_prompt(
+            test_case, page_object_generator.format_api(page_object), SAMPLE_CONTEXT))
+        api_pruned = sum(count_tokens(part) for part in build_page_object_prompt(
+            test_case, page_object_generator.format_api(page_object, pruned_api), SAMPLE_CONTEXT))
+
+        kept = _element_keys(pruned_elements)
+        coverage = sum(1 for need in test_case["needs"] if need in kept) / len(test_case["needs"])
+
+        print(f"{test_case['test_id']:<8}{full:>12}{full_pruned:>8}{api:>13}{api_pruned:>8}{coverage:>10.0%}")
+
+    print(f"\nPage object module: {count_tokens(page_object['source'])} tokens, generated once per HTML")
+    print(f"Pruning stats: {indexes.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
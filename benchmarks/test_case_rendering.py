@@ -0,0 +1,115 @@
+"""
+Render time of a large test case suite in the Streamlit page.
+
+Usage (from the project root):
+    python -m benchmarks.test_case_rendering [--app frontend/app.py] [--cases 1000] [--reruns 10]
+
+Starts the API on port 8000 with ``LLM_PROVIDER=fake`` and an in-memory
+Qdrant, saves ``--cases`` synthetic test cases as a suite
+(``POST /api/test-suites``) and drives the page with Streamlit's ``AppTest``:
+
+- step 2 (test case list): first render, rerun, next page, feature filter
+  and text search
+- step 3 (script generation): render with a selected test case
+- the backend listing endpoints behind them
+
+AppTest reruns the whole script for every interaction, including those in
+fragments, so interaction times are upper bounds of what the browser sees.
+Pass ``--app`` an older copy of the page to compare; interactions the page
+does not offer are reported as n/a.
+"""
+import time
+
+import requests
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.frontend_latency import API_BASE_URL, fake_cases, option, start_backend, step_session
+
+
+def timed(action) -> float:
+    started = time.perf_counter()
+    action()
+    return (time.perf_counter() - started) * 1000
+
+
+def widget(elements, key_suffix: str):
+    return next((e for e in elements if e.key and e.key.endswith(key_suffix)), None)
+
+
+def report(label: str, ms, extra: str = ""):
+    value = f"{ms:>9.1f}" if ms is not None else f"{'n/a':>9}"
+    print(f"{label:<32}{value}  {extra}")
+
+
+def elements(at: AppTest) -> int:
+    return len(at.markdown) + len(at.expander) + len(at.dataframe) + len(at.selectbox)
+
+
+def step2(app: str, cases, reruns: int):
+    at = AppTest.from_file(app, default_timeout=300)
+    step_session(at, 2, cases)
+    report("step 2: first render", timed(at.run), f"{elements(at)} elements")
+    report("step 2: rerun", sum(timed(at.run) for _ in range(reruns)) / reruns)
+
+    page = widget(at.number_input, "_page")
+    report("step 2: next page", timed(page.set_value(2).run) if page else None)
+
+    feature = widget(at.selectbox, "_feature")
+    if feature:
+        report("step 2: filter by feature", timed(feature.set_value(feature.options[1]).run))
+    else:
+        report("step 2: filter by feature", None)
+
+    search = widget(at.text_input, "_search")
+    report("step 2: text search", timed(search.input("cart of 3").run) if search else None)
+    if at.exception:
+        print(at.exception)
+
+
+def step3(app: str, cases):
+    at = AppTest.from_file(app, default_timeout=300)
+    step_session(at, 3, cases)
+    at.session_state["selected_test_id"] = cases[len(cases) // 2]["test_id"]
+    report("step 3: first render", timed(at.run), f"{elements(at)} elements")
+    report("step 3: rerun", timed(at.run))
+    if at.exception:
+        print(at.exception)
+
+
+def backend(suite_id: str, reruns: int):
+    url = f"{API_BASE_URL}/api/test-suites/{suite_id}/test-cases"
+    with requests.Session() as session:
+        for label, params in (
+            ("api: page 1", {"page": 1}),
+            ("api: page 20", {"page": 20}),
+            ("api: feature + priority", {"feature": "Payment", "priority": "High"}),
+            ("api: search", {"search": "shipping cart of 3"})
+        ):
+            ms = sum(timed(lambda: session.get(url, params=params).raise_for_status()) for _ in range(reruns)) / reruns
+            report(label, ms)
+        report("api: test case details", timed(lambda: session.get(f"{url}/TC-0500").raise_for_status()))
+
+
+def main():
+    app = option("--app", "frontend/app.py")
+    count = int(option("--cases", "1000"))
+    reruns = int(option("--reruns", "10"))
+
+    server = start_backend()
+    try:
+        cases = fake_cases(count)
+        print(f"App: {app}, {count} test cases\n")
+        print(f"{'interaction':<32}{'ms':>9}")
+        step2(app, cases, reruns)
+        step3(app, cases)
+        suite_id = requests.post(
+            f"{API_BASE_URL}/api/test-suites", json={"test_cases": cases}
+        ).json()["suite_id"]
+        backend(suite_id, reruns)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Cost of tracing per span and per generation request.
+
+Usage (from the project root):
+    python -m benchmarks.tracing_overhead [--spans 100000] [--per-request 15]
+
+Times opening and closing a span (nested one level under a request span,
+with two attributes, as the pipeline stages do) with tracing:
+
+1. off (no ``TRACE_EXPORTER``)
+2. on, trace not sampled
+3. on, trace sampled, exported to a JSON file by the background thread
+
+and the cost per request at ``--per-request`` spans (a script generation
+opens about 15) for sample rates of 1%, 10% and 100%.
+"""
+import os
+import tempfile
+import time
+
+from backend.utils.tracing import JsonFileExporter, Tracer
+
+from benchmarks.frontend_latency import option
+
+
+def per_span_us(tracer: Tracer, count: int) -> float:
+    with tracer.span("request", kind="server"):
+        started = time.perf_counter()
+        for _ in range(count):
+            with tracer.span("stage", **{"cache.hit": False}) as span:
+                span.set_attribute("retrieval.chunks", 5)
+        elapsed = time.perf_counter() - started
+    return elapsed / count * 1e6
+
+
+def main():
+    count = int(option("--spans", "100000"))
+    per_request = int(option("--per-request", "15"))
+    path = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+
+    off = per_span_us(Tracer(exporters=[]), count)
+    unsampled = per_span_us(Tracer(exporters=[JsonFileExporter(path, "benchmark")], sample_rate=0.0), count)
+    sampled_tracer = Tracer(exporters=[JsonFileExporter(path, "benchmark")], sample_rate=1.0)
+    sampled = per_span_us(sampled_tracer, count)
+    started = time.perf_counter()
+    sampled_tracer.flush()
+    export = (time.perf_counter() - started) / max(sampled_tracer.stats["exported"], 1) * 1e6
+
+    print(f"{'span':<32}{'us':>10}")
+    print(f"{'tracing off':<32}{off:>10.2f}")
+    print(f"{'not sampled':<32}{unsampled:>10.2f}")
+    print(f"{'sampled (request thread)':<32}{sampled:>10.2f}")
+    print(f"{'  export (background thread)':<32}{export:>10.2f}")
+    print(f"  {sampled_tracer.stats['exported']} exported, {sampled_tracer.stats['dropped']} dropped (queue full)\n")
+
+    print(f"{'per request, ' + str(per_request) + ' spans':<32}{'us':>10}")
+    for rate in (0.01, 0.1, 1.0):
+        cost = per_request * (rate * sampled + (1 - rate) * unsampled)
+        print(f"{'sample rate ' + format(rate, '.0%'):<32}{cost:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
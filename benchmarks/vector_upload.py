@@ -0,0 +1,97 @@
+"""
+Qdrant ingest throughput: one upsert of PointStructs built from Python lists
+(the previous add_documents path) vs batched, parallel ``upload_collection``
+straight from a float32 NumPy matrix (the current path).
+
+Usage (from the project root):
+    python -m benchmarks.vector_upload [--points 10000,100000] [--url http://localhost:6333]
+                                       [--batch-size 256] [--parallel 4] [--no-wait]
+
+Without ``--url`` an in-process Qdrant (``:memory:``) is used, which measures
+client-side cost only; pass a server URL to include serialization and
+network. Vectors are random and unit-normalized (no embedding model needed).
+"""
+import sys
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+DIMENSION = 384
+PAYLOAD_TEXT = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 14
+
+
+def option(name: str, default: str) -> str:
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def make_data(count: int):
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((count, DIMENSION), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    payloads = [
+        {"text": PAYLOAD_TEXT, "source": f"doc_{i % 50}.md", "file_type": "md", "chunk_index": i, "total_chunks": count}
+        for i in range(count)
+    ]
+    return vectors, payloads
+
+
+def fresh_collection(client: QdrantClient, name: str):
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(name, vectors_config=VectorParams(size=DIMENSION, distance=Distance.COSINE))
+
+
+def single_upsert(client, name, vectors, payloads, **_):
+    points = [
+        PointStruct(id=str(uuid.uuid4()), vector=vector, payload=payload)
+        for vector, payload in zip(vectors.tolist(), payloads)
+    ]
+    client.upsert(collection_name=name, points=points)
+
+
+def batched_upload(client, name, vectors, payloads, batch_size, parallel, wait):
+    client.upload_collection(
+        collection_name=name,
+        vectors=vectors,
+        payload=payloads,
+        ids=[str(uuid.uuid4()) for _ in payloads],
+        batch_size=batch_size,
+        parallel=parallel,
+        wait=wait
+    )
+
+
+def main():
+    counts = [int(c) for c in option("--points", "10000,100000").split(",")]
+    url = option("--url", None)
+    batch_size = int(option("--batch-size", "256"))
+    parallel = int(option("--parallel", "1" if url is None else "4"))
+    wait = "--no-wait" not in sys.argv
+
+    client = QdrantClient(url=url) if url else QdrantClient(location=":memory:")
+    print(f"Qdrant: {url or ':memory:'}, batch_size={batch_size}, parallel={parallel}, wait={wait}\n")
+    print(f"{'points':>8}  {'strategy':<28}{'seconds':>9}{'points/s':>11}")
+
+    strategies = [("single upsert (lists)", single_upsert), ("upload_collection (float32)", batched_upload)]
+    for count in counts:
+        vectors, payloads = make_data(count)
+        for label, strategy in strategies:
+            name = f"bench_upload_{count}"
+            fresh_collection(client, name)
+            started = time.perf_counter()
+            try:
+                strategy(client, name, vectors, payloads, batch_size=batch_size, parallel=parallel, wait=wait)
+            except Exception as e:
+                # A single request carrying every point can exceed the server's size limit
+                print(f"{count:>8}  {label:<28}{'failed':>9}  {type(e).__name__}: {str(e)[:60]}")
+                continue
+            elapsed = time.perf_counter() - started
+            print(f"{count:>8}  {label:<28}{elapsed:>9.2f}{count / elapsed:>11,.0f}")
+            client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,25 @@ Modern UI with latest Streamlit features
 """
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import hashlib
 import json
-from typing import List, Dict, Any
-import time
+import os
+import random
+import secrets
+import threading
+from typing import List, Dict, Any, Optional
 
 # Configuration
-API_BASE_URL = "http://127.0.0.1:8000"
+API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
+# Backend URL as seen from the browser, for downloads streamed straight from the API
+PUBLIC_API_URL = os.getenv("PUBLIC_API_URL", API_BASE_URL)
+# Seconds the sidebar reuses backend health and knowledge base status
+STATUS_TTL = int(os.getenv("FRONTEND_STATUS_TTL", "15"))
+TEST_CASES_PAGE_SIZE = 25
+# Share of reruns whose backend calls are traced (the backend follows this decision)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
 
 # Page config
 st.set_page_config(
@@ -190,20 +203,63 @@ st.markdown("""
 # Initialize session state
 if 'knowledge_base_built' not in st.session_state:
     st.session_state.knowledge_base_built = False
-if 'test_cases' not in st.session_state:
-    st.session_state.test_cases = []
+# Test cases stay on the backend; the page holds the suite id and pages through it
+if 'suite_id' not in st.session_state:
+    st.session_state.suite_id = None
+if 'suite_total' not in st.session_state:
+    st.session_state.suite_total = 0
+if 'selected_test_id' not in st.session_state:
+    st.session_state.selected_test_id = None
 if 'generated_script' not in st.session_state:
     st.session_state.generated_script = ""
+if 'page_object' not in st.session_state:
+    st.session_state.page_object = None
+if 'run_result' not in st.session_state:
+    st.session_state.run_result = None
 if 'html_uploaded' not in st.session_state:
     st.session_state.html_uploaded = False
 if 'current_step' not in st.session_state:
     st.session_state.current_step = 1
 
 
+# W3C traceparent of the current rerun; reruns of different browser sessions run in different threads
+_trace = threading.local()
+
+
+def start_trace() -> str:
+    """New trace for this rerun, so every backend call it makes shares one trace id"""
+    sampled = random.random() < TRACE_SAMPLE_RATE
+    _trace.traceparent = f"00-{secrets.token_hex(16)}-{secrets.token_hex(8)}-{'01' if sampled else '00'}"
+    return _trace.traceparent
+
+
+class TracingSession(requests.Session):
+    """Session sending the rerun's traceparent with every request"""
+
+    def request(self, method, url, **kwargs):
+        traceparent = getattr(_trace, "traceparent", None)
+        if traceparent:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), "traceparent": traceparent}
+        return super().request(method, url, **kwargs)
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One pooled HTTP session shared by all reruns and browser sessions"""
+    session = TracingSession()
+    # Only idempotent requests are retried; generation calls are not repeated
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=STATUS_TTL, show_spinner=False)
 def check_backend_health() -> Dict[str, Any]:
     """Check if backend is running and healthy"""
     try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=5)
+        response = get_session().get(f"{API_BASE_URL}/health", timeout=5)
         if response.status_code == 200:
             return response.json()
         return {"status": "unhealthy"}
@@ -211,6 +267,55 @@ def check_backend_health() -> Dict[str, Any]:
         return {"status": "offline"}
 
 
+@st.cache_data(ttl=STATUS_TTL, show_spinner=False)
+def get_knowledge_base_status() -> Dict[str, Any]:
+    """Documents and version of the knowledge base"""
+    try:
+        response = get_session().get(f"{API_BASE_URL}/api/knowledge-base/status", timeout=10)
+        if response.status_code == 200:
+            return response.json()
+        return {}
+    except Exception:
+        return {}
+
+
+@st.cache_data(ttl=STATUS_TTL, show_spinner=False)
+def get_llm_usage() -> Dict[str, Any]:
+    """Today's LLM usage and budget status"""
+    try:
+        response = get_session().get(f"{API_BASE_URL}/api/usage", params={"days": 1}, timeout=10)
+        if response.status_code == 200:
+            return response.json()
+        return {}
+    except Exception:
+        return {}
+
+
+def file_hash(file) -> str:
+    """SHA-256 of the raw file, as the backend hashes ingested content"""
+    return hashlib.sha256(file.getvalue()).hexdigest()
+
+
+def check_documents(files: List, html_file=None) -> Dict[str, Any]:
+    """Ask which files the knowledge base does not hold yet, by content hash"""
+    try:
+        response = get_session().post(
+            f"{API_BASE_URL}/api/documents/check",
+            json={
+                "documents": [{"filename": f.name, "content_hash": file_hash(f)} for f in files],
+                "html": {"filename": html_file.name, "content_hash": file_hash(html_file)} if html_file else None
+            },
+            timeout=10
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {"success": False, "error": response.text}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 def upload_documents(files: List) -> Dict[str, Any]:
     """Upload support documents to backend"""
     try:
@@ -218,7 +323,7 @@ def upload_documents(files: List) -> Dict[str, Any]:
         for file in files:
             files_data.append(('files', (file.name, file.getvalue(), file.type)))
         
-        response = requests.post(
+        response = get_session().post(
             f"{API_BASE_URL}/api/upload-documents",
             files=files_data,
             timeout=60
@@ -236,7 +341,7 @@ def upload_html(file) -> Dict[str, Any]:
     """Upload HTML file to backend"""
     try:
         files = {'file': (file.name, file.getvalue(), 'text/html')}
-        response = requests.post(
+        response = get_session().post(
             f"{API_BASE_URL}/api/upload-html",
             files=files,
             timeout=30
@@ -253,7 +358,7 @@ def upload_html(file) -> Dict[str, Any]:
 def generate_test_cases(query: str, max_cases: int = 10) -> Dict[str, Any]:
     """Generate test cases using RAG"""
     try:
-        response = requests.post(
+        response = get_session().post(
             f"{API_BASE_URL}/api/generate-test-cases",
             json={"query": query, "max_test_cases": max_cases},
             timeout=120
@@ -267,12 +372,43 @@ def generate_test_cases(query: str, max_cases: int = 10) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+# Suites never change once saved, so pages and details are cached without a TTL.
+# These raise on errors rather than return them, so failures are not cached.
+@st.cache_data(show_spinner=False, max_entries=256)
+def list_test_cases(
+    suite_id: str,
+    page: int,
+    feature: Optional[str] = None,
+    test_type: Optional[str] = None,
+    priority: Optional[str] = None,
+    search: Optional[str] = None
+) -> Dict[str, Any]:
+    """One page of a saved suite, filtered server-side"""
+    params = {"page": page, "page_size": TEST_CASES_PAGE_SIZE, "feature": feature,
+              "test_type": test_type, "priority": priority, "search": search}
+    response = get_session().get(
+        f"{API_BASE_URL}/api/test-suites/{suite_id}/test-cases",
+        params={k: v for k, v in params.items() if v},
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def get_test_case(suite_id: str, test_id: str) -> Dict[str, Any]:
+    """Full test case, fetched only when it is shown"""
+    response = get_session().get(f"{API_BASE_URL}/api/test-suites/{suite_id}/test-cases/{test_id}", timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
 def generate_selenium_script(test_case: Dict[str, Any]) -> Dict[str, Any]:
-    """Generate Selenium script for a test case"""
+    """Generate Selenium script for a test case, stored with the current suite"""
     try:
-        response = requests.post(
+        response = get_session().post(
             f"{API_BASE_URL}/api/generate-selenium-script",
-            json={"test_case": test_case, "html_content": ""},
+            json={"test_case": test_case, "html_content": "", "suite_id": st.session_state.suite_id},
             timeout=120
         )
         
@@ -284,8 +420,58 @@ def generate_selenium_script(test_case: Dict[str, Any]) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+def run_selenium_script(test_case_id: str, script: str) -> Dict[str, Any]:
+    """Execute a generated script in a headless browser on the backend"""
+    try:
+        response = get_session().post(
+            f"{API_BASE_URL}/api/run-selenium-scripts",
+            json={"scripts": [{"test_case_id": test_case_id, "script": script}]},
+            timeout=300
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {"success": False, "error": response.text}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def get_run_result(test_case_id: str, script: str) -> Optional[Dict[str, Any]]:
+    """Fetch the stored run result of a test case's script"""
+    try:
+        response = get_session().get(
+            f"{API_BASE_URL}/api/run-results/{test_case_id}",
+            params={"script_hash": hashlib.sha256(script.encode("utf-8")).hexdigest()},
+            timeout=10
+        )
+        if response.status_code == 200:
+            return response.json()
+        return None
+    except Exception:
+        return None
+
+
+def repair_selenium_script(test_case: Dict[str, Any], script: str) -> Dict[str, Any]:
+    """Regenerate a failing script from its run errors"""
+    try:
+        response = get_session().post(
+            f"{API_BASE_URL}/api/repair-selenium-scripts",
+            json={"items": [{"test_case": test_case, "script": script}], "suite_id": st.session_state.suite_id},
+            timeout=600
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {"success": False, "error": response.text}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 # Main App
 def main():
+    traceparent = start_trace()
     # Header
     st.markdown('<h1 class="main-header">Autonomous QA Agent</h1>', unsafe_allow_html=True)
     
@@ -314,13 +500,17 @@ def main():
         else:
             st.error(status_text)
 
+        if traceparent.endswith("-01"):
+            st.caption(f"Trace ID: `{traceparent.split('-')[1]}`")
+
 
         
         st.divider()
         
         st.header("Knowledge Base")
-        if st.session_state.knowledge_base_built:
-            st.success("Knowledge Base Built")
+        kb_status = get_knowledge_base_status()
+        if st.session_state.knowledge_base_built or kb_status.get("is_built"):
+            st.success(f"Knowledge Base Built ({len(kb_status.get('documents', []))} documents)")
         else:
             st.warning("Knowledge Base Not Built")
         
@@ -331,6 +521,23 @@ def main():
         
         st.divider()
         
+        st.header("LLM Usage")
+        usage = get_llm_usage()
+        if usage:
+            budget = usage["budget"]
+            spent = budget["spent_today_usd"]
+            st.metric(
+                "Spent today",
+                f"${spent:.4f}",
+                help=f"{usage['totals']['calls']} calls, {usage['totals']['total_tokens']} tokens"
+            )
+            if budget["daily_usd"]:
+                st.progress(min(spent / budget["daily_usd"], 1.0), text=f"of ${budget['daily_usd']:.2f} daily budget")
+        else:
+            st.caption("Usage unavailable")
+
+        st.divider()
+
         st.header("Current Step")
         st.info(f"Step {st.session_state.current_step} of 3")
         
@@ -339,13 +546,15 @@ def main():
         # Reset button
         if st.button("🔄 Reset Knowledge base"):
             try:
-                requests.delete(f"{API_BASE_URL}/api/knowledge-base/reset")
+                get_session().delete(f"{API_BASE_URL}/api/knowledge-base/reset", timeout=30)
+                get_knowledge_base_status.clear()
                 st.session_state.knowledge_base_built = False
                 st.session_state.html_uploaded = False
-                st.session_state.test_cases = []
+                st.session_state.suite_id = None
+                st.session_state.suite_total = 0
+                st.session_state.selected_test_id = None
                 st.session_state.current_step = 1
-                st.success("Reset complete!")
-                time.sleep(1)
+                st.toast("Reset complete!")
                 st.rerun()
             except Exception as e:
                 st.error(f"Error: {str(e)}")
@@ -403,27 +612,35 @@ def show_step1():
             st.error("Please upload HTML file")
         else:
             with st.spinner("Processing documents..."):
-                # Upload documents
-                doc_result = upload_documents(uploaded_docs)
+                # Send hashes first; files the knowledge base already holds are not uploaded again
+                check = check_documents(uploaded_docs, uploaded_html)
+                if check.get("success") is False:
+                    st.error(f"Error: {check.get('error')}")
+                    return
                 
-                if doc_result.get("success"):
-                    st.success(f"Processed {doc_result['document_count']} documents into {doc_result['chunks_created']} chunks")
-                    
-                    # Upload HTML
+                missing = [doc for doc in uploaded_docs if doc.name in check["missing"]]
+                if missing:
+                    doc_result = upload_documents(missing)
+                    if not doc_result.get("success"):
+                        st.error(f"Error: {doc_result.get('error')}")
+                        return
+                    st.toast(f"Processed {doc_result['document_count']} documents into {doc_result['chunks_created']} chunks")
+                if check["stored"]:
+                    st.toast(f"Already in the knowledge base: {', '.join(check['stored'])}")
+                
+                if not check["html_stored"]:
                     html_result = upload_html(uploaded_html)
-                    
-                    if html_result.get("success"):
-                        st.success(f"HTML file processed: {html_result['chunks_created']} chunks created")
-                        st.session_state.knowledge_base_built = True
-                        st.session_state.html_uploaded = True
-                        st.session_state.current_step = 2
-                        st.balloons()
-                        time.sleep(1)
-                        st.rerun()
-                    else:
+                    if not html_result.get("success"):
                         st.error(f"Error: {html_result.get('error')}")
-                else:
-                    st.error(f"Error: {doc_result.get('error')}")
+                        return
+                    st.toast(f"HTML file processed: {html_result['chunks_created']} chunks created")
+                
+                get_knowledge_base_status.clear()
+                st.session_state.knowledge_base_built = True
+                st.session_state.html_uploaded = True
+                st.session_state.current_step = 2
+                st.balloons()
+                st.rerun()
 
 
 def show_step2():
@@ -464,43 +681,31 @@ def show_step2():
         else:
             with st.spinner("🤖 AI is generating test cases..."):
                 result = generate_test_cases(query, max_cases)
+                get_llm_usage.clear()
                 
                 if result.get("success"):
-                    st.session_state.test_cases = result.get("test_cases", [])
-                    st.success(f"Generated {len(st.session_state.test_cases)} test cases!")
+                    st.session_state.suite_id = result.get("suite_id")
+                    st.session_state.suite_total = result.get("total_generated", 0)
+                    st.session_state.selected_test_id = None
+                    st.toast(f"Generated {st.session_state.suite_total} test cases!")
                     
                     # Show sources used
                     sources = result.get("sources_used", [])
                     if sources:
-                        st.info(f"Sources used: {', '.join(sources)}")
+                        st.toast(f"Sources used: {', '.join(sources)}")
                     
                     # Auto-advance to next step
                     st.session_state.current_step = 3
-                    time.sleep(1)
                     st.rerun()
                 else:
                     st.error(f"❌ Error: {result.get('error')}")
     
     # Display test cases
-    if st.session_state.test_cases:
+    if st.session_state.suite_id:
         st.divider()
-        st.subheader(f"Generated Test Cases ({len(st.session_state.test_cases)})")
+        st.subheader(f"Generated Test Cases ({st.session_state.suite_total})")
         
-        for idx, tc in enumerate(st.session_state.test_cases):
-            with st.expander(f"{tc['test_id']} - {tc['feature']}", expanded=False):
-                st.markdown(f"**Scenario:** {tc['test_scenario']}")
-                st.markdown(f"**Type:** `{tc['test_type']}`")
-                st.markdown(f"**Priority:** `{tc.get('priority', 'Medium')}`")
-                
-                if tc.get('preconditions'):
-                    st.markdown(f"**Preconditions:** {tc['preconditions']}")
-                
-                st.markdown("**Test Steps:**")
-                for step_idx, step in enumerate(tc['test_steps'], 1):
-                    st.markdown(f"{step_idx}. {step}")
-                
-                st.markdown(f"**Expected Result:** {tc['expected_result']}")
-                st.markdown(f"**Grounded In:** `{tc['grounded_in']}`")
+        show_test_case_browser("step2")
         
         # Option to proceed to next step
         if st.button("Proceed to Generate Scripts"):
@@ -508,11 +713,101 @@ def show_step2():
             st.rerun()
 
 
+def show_test_case_details(test_id: str):
+    """Steps and expected result of one test case, loaded on demand"""
+    try:
+        tc = get_test_case(st.session_state.suite_id, test_id)
+    except Exception as e:
+        st.error(f"❌ Error: {str(e)}")
+        return
+    
+    with st.container(border=True):
+        st.markdown(f"**{tc['test_id']} - {tc['feature']}**")
+        st.markdown(f"**Scenario:** {tc['test_scenario']}")
+        st.markdown(f"**Type:** `{tc['test_type']}` **Priority:** `{tc.get('priority', 'Medium')}`")
+        
+        if tc.get('preconditions'):
+            st.markdown(f"**Preconditions:** {tc['preconditions']}")
+        
+        st.markdown("**Test Steps:**")
+        st.markdown("\n".join(f"{step_idx}. {step}" for step_idx, step in enumerate(tc['test_steps'], 1)))
+        
+        st.markdown(f"**Expected Result:** {tc['expected_result']}")
+        st.markdown(f"**Grounded In:** `{tc['grounded_in']}`")
+
+
+@st.fragment
+def show_test_case_browser(key: str, show_details: bool = True):
+    """
+    Filterable, paged table of the current suite
+    
+    Paging, filtering and selecting rerun only this fragment. Rows come from the
+    backend one page at a time, and details are fetched only for the selected row:
+    shown below the table, or (show_details=False) stored as selected_test_id for
+    the rest of the page.
+    """
+    suite_id = st.session_state.suite_id
+    # Widget keys include the suite, so a new suite starts on page 1 without filters
+    prefix = f"{key}_{suite_id}"
+    filter_cols = st.columns([3, 2, 1, 1])
+    
+    # Widgets are drawn after the page loads, since their options come from it
+    state = st.session_state
+    selected = {field: state.get(f"{prefix}_{field}", "All") for field in ("feature", "test_type", "priority")}
+    try:
+        result = list_test_cases(
+            suite_id,
+            state.get(f"{prefix}_page", 1),
+            search=(state.get(f"{prefix}_search") or "").strip() or None,
+            **{field: None if value == "All" else value for field, value in selected.items()}
+        )
+    except Exception as e:
+        st.error(f"❌ Error: {str(e)}")
+        return
+    
+    with filter_cols[0]:
+        st.text_input("Search", key=f"{prefix}_search", placeholder="Words in id, scenario, steps...")
+    for col, (field, label) in zip(filter_cols[1:], (("feature", "Feature"), ("test_type", "Type"), ("priority", "Priority"))):
+        options = ["All"] + result["facets"].get(field, [])
+        if state.get(f"{prefix}_{field}") not in options:
+            state[f"{prefix}_{field}"] = "All"
+        with col:
+            st.selectbox(label, options=options, key=f"{prefix}_{field}")
+    
+    event = st.dataframe(
+        result["items"],
+        column_order=["test_id", "feature", "test_type", "priority", "steps", "test_scenario"],
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"{prefix}_table_{result['page']}"
+    )
+    
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        if result["pages"] > 1:
+            # The backend clamps the page when filters leave fewer pages
+            state[f"{prefix}_page"] = result["page"]
+            st.number_input(f"Page (of {result['pages']})", min_value=1, max_value=result["pages"], key=f"{prefix}_page")
+    with col2:
+        st.caption(f"{result['matched']} of {result['total']} test cases match")
+    
+    rows = event.selection.rows
+    test_id = result["items"][rows[0]]["test_id"] if rows and rows[0] < len(result["items"]) else None
+    if show_details:
+        if test_id:
+            show_test_case_details(test_id)
+    elif test_id and test_id != state.selected_test_id:
+        state.selected_test_id = test_id
+        st.rerun()
+
+
 def show_step3():
     """Step 3: Selenium Script Generation"""
     st.header("🤖 Step 3: Generate Selenium Scripts")
     
-    if not st.session_state.test_cases:
+    if not st.session_state.suite_id:
         st.warning("Please generate test cases first")
         if st.button("Go to Step 2"):
             st.session_state.current_step = 2
@@ -522,14 +817,33 @@ def show_step3():
     st.markdown("📄 Select a test case to generate an executable Python Selenium script.")
     
     # Test case selection
-    test_case_options = [f"{tc['test_id']} - {tc['feature']}" for tc in st.session_state.test_cases]
-    selected_option = st.selectbox(
-        "Select Test Case",
-        options=test_case_options
-    )
+    show_test_case_browser("step3", show_details=False)
+    
+    # Bulk download: the browser streams the ZIP straight from the backend
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        generate_missing = st.checkbox("Generate missing scripts", help="Scripts not generated yet are generated while the archive downloads")
+    with col2:
+        as_pytest = st.checkbox(
+            "As pytest suite",
+            help="Test modules sharing one browser, parametrized where cases differ only by data, with test type and priority markers"
+        )
+    with col3:
+        st.link_button(
+            "📦 Download All Scripts (ZIP)",
+            f"{PUBLIC_API_URL}/api/test-suites/{st.session_state.suite_id}/scripts.zip"
+            f"?generate_missing={str(generate_missing).lower()}&layout={'pytest' if as_pytest else 'scripts'}"
+        )
     
-    selected_idx = test_case_options.index(selected_option)
-    selected_tc = st.session_state.test_cases[selected_idx]
+    if not st.session_state.selected_test_id:
+        st.info("Select a test case in the table")
+        return
+    
+    try:
+        selected_tc = get_test_case(st.session_state.suite_id, st.session_state.selected_test_id)
+    except Exception as e:
+        st.error(f"❌ Error: {str(e)}")
+        return
     
     # Show selected test case details
     with st.expander("Selected Test Case Details", expanded=True):
@@ -542,10 +856,20 @@ def show_step3():
     if st.button("Generate Selenium Script", type="primary"):
         with st.spinner("🤖 AI is generating Selenium script..."):
             result = generate_selenium_script(selected_tc)
+            get_llm_usage.clear()
             
             if result.get("success"):
                 st.session_state.generated_script = result.get("script", "")
-                st.success("✅ Selenium script generated successfully!")
+                st.session_state.page_object = result.get("page_object")
+                st.session_state.run_result = None
+                validation = result.get("validation") or {}
+                if validation.get("valid", True):
+                    st.success("✅ Selenium script generated successfully!")
+                else:
+                    st.warning(
+                        "⚠️ Script generated, but it still fails static validation:\n"
+                        + "\n".join(f"- {error}" for error in validation.get("errors", []))
+                    )
             else:
                 st.error(f"❌ Error: {result.get('error')}")
     
@@ -563,6 +887,51 @@ def show_step3():
             file_name=f"{selected_tc['test_id']}_selenium_test.py",
             mime="text/x-python"
         )
+        
+        if st.session_state.page_object:
+            st.download_button(
+                label="💾 Download Page Object (page_objects.py)",
+                data=st.session_state.page_object,
+                file_name="page_objects.py",
+                mime="text/x-python"
+            )
+        
+        # Run button
+        if st.button("▶️ Run Script"):
+            with st.spinner("Running script in headless browser..."):
+                result = run_selenium_script(selected_tc['test_id'], st.session_state.generated_script)
+                
+                if result.get("success"):
+                    st.session_state.run_result = result["results"][0]
+                else:
+                    st.error(f"❌ Error: {result.get('error')}")
+        
+        run_result = st.session_state.run_result
+        if run_result and run_result["test_case_id"] == selected_tc["test_id"]:
+            if run_result["status"] == "passed":
+                st.success(f"Passed in {run_result['duration_ms']:.0f} ms")
+            else:
+                st.error(f"{run_result['status'].upper()}: {run_result.get('error')}")
+            
+            with st.expander("Run Logs", expanded=run_result["status"] != "passed"):
+                if run_result.get("traceback"):
+                    st.code(run_result["traceback"], language="text")
+                if run_result.get("stdout"):
+                    st.code(run_result["stdout"], language="text")
+                if run_result.get("browser_log"):
+                    st.code("\n".join(run_result["browser_log"]), language="text")
+            
+            if run_result["status"] != "passed" and st.button("🩹 Repair Script"):
+                with st.spinner("Regenerating failing script..."):
+                    result = repair_selenium_script(selected_tc, st.session_state.generated_script)
+                    
+                    if result.get("success"):
+                        repair = result["results"][0]
+                        st.session_state.generated_script = repair["script"]
+                        st.session_state.run_result = get_run_result(repair["test_case_id"], repair["script"])
+                        st.rerun()
+                    else:
+                        st.error(f"❌ Error: {result.get('error')}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,45 @@
+"""
+Shared test setup and fixtures.
+
+Backend modules create their global instances at import time, configured
+from the environment; point them at throwaway state and the offline LLM
+provider before any test module imports them.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+STATE_DIR = tempfile.mkdtemp(prefix="qa-agent-tests-")
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("STATE_DB_PATH", os.path.join(STATE_DIR, "app.db"))
+os.environ.setdefault("KB_MANIFEST_PATH", os.path.join(STATE_DIR, "knowledge_base.json"))
+os.environ.setdefault("REINDEX_STATE_PATH", os.path.join(STATE_DIR, "reindex.json"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def shared(tmp_path):
+    """State store of its own, shared by the objects a test builds on it"""
+    from backend.utils.state_store import StateStore
+
+    return StateStore(str(tmp_path / "state.db"))
+
+
+@pytest.fixture
+def make_case():
+    """Factory of test case dicts as the generator returns them"""
+    def make(test_id: str, feature: str = "Discount Code", test_type: str = "positive", priority: str = "High") -> dict:
+        return {
+            "test_id": test_id,
+            "feature": feature,
+            "test_type": test_type,
+            "priority": priority,
+            "test_scenario": f"Scenario of {test_id}",
+            "test_steps": ["Open checkout"],
+            "expected_result": "Total updated"
+        }
+    return make
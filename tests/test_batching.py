@@ -0,0 +1,140 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.utils.batching import DynamicBatcher, QueueFull
+
+
+class Recorder:
+    """Batch processor that records its batches and can hold the first one"""
+
+    def __init__(self, hold_first: bool = False):
+        self.batches = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not hold_first:
+            self.release.set()
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        self.started.set()
+        self.release.wait(5)
+        return [f"result:{item}" for item in items]
+
+
+async def wait_until_processing(recorder: Recorder):
+    await asyncio.get_running_loop().run_in_executor(None, recorder.started.wait, 5)
+
+
+def test_concurrent_submits_share_a_batch_and_get_their_own_results():
+    recorder = Recorder()
+    batcher = DynamicBatcher(recorder, max_batch_size=64, max_wait_ms=50)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.submit(["a", "b"]),
+            batcher.submit(["c"]),
+            batcher.submit(["d", "e", "f"])
+        )
+
+    results = asyncio.run(scenario())
+
+    assert results == [["result:a", "result:b"], ["result:c"], ["result:d", "result:e", "result:f"]]
+    assert recorder.batches == [["a", "b", "c", "d", "e", "f"]]
+
+
+def test_full_batch_is_dispatched_without_waiting():
+    recorder = Recorder()
+    batcher = DynamicBatcher(recorder, max_batch_size=4, max_wait_ms=10_000)
+
+    async def scenario():
+        return await asyncio.wait_for(batcher.submit(["a", "b", "c", "d"]), timeout=2)
+
+    assert asyncio.run(scenario()) == ["result:a", "result:b", "result:c", "result:d"]
+
+
+def test_interactive_items_run_before_queued_bulk_items():
+    recorder = Recorder(hold_first=True)
+    batcher = DynamicBatcher(recorder, max_batch_size=8, max_wait_ms=1, max_bulk_batch_size=2)
+
+    async def scenario():
+        first = asyncio.ensure_future(batcher.submit(["bulk-0"], priority="bulk"))
+        await wait_until_processing(recorder)
+        # Queued while the first batch runs
+        bulk = asyncio.ensure_future(batcher.submit(["bulk-1", "bulk-2", "bulk-3", "bulk-4"], priority="bulk"))
+        await asyncio.sleep(0)
+        query = asyncio.ensure_future(batcher.submit(["query"]))
+        await asyncio.sleep(0)
+        recorder.release.set()
+        return await asyncio.gather(first, bulk, query)
+
+    first, bulk, query = asyncio.run(scenario())
+
+    assert query == ["result:query"]
+    assert bulk == ["result:bulk-1", "result:bulk-2", "result:bulk-3", "result:bulk-4"]
+    assert recorder.batches == [["bulk-0"], ["query"], ["bulk-1", "bulk-2"], ["bulk-3", "bulk-4"]]
+    assert batcher.stats["interactive_batches"] == 1
+    assert batcher.stats["bulk_batches"] == 3
+
+
+def test_submit_beyond_max_queue_is_rejected():
+    recorder = Recorder(hold_first=True)
+    batcher = DynamicBatcher(recorder, max_batch_size=2, max_wait_ms=1, max_queue=3)
+
+    async def scenario():
+        running = asyncio.ensure_future(batcher.submit(["a"]))
+        await wait_until_processing(recorder)
+        queued = asyncio.ensure_future(batcher.submit(["b", "c"]))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFull):
+            await batcher.submit(["d", "e"])
+        recorder.release.set()
+        return await asyncio.gather(running, queued)
+
+    assert asyncio.run(scenario()) == [["result:a"], ["result:b", "result:c"]]
+    assert batcher.stats["rejected"] == 1
+
+
+def test_oversized_request_is_admitted_into_an_empty_queue():
+    recorder = Recorder()
+    batcher = DynamicBatcher(recorder, max_batch_size=2, max_wait_ms=1, max_queue=3)
+
+    results = asyncio.run(batcher.submit(["a", "b", "c", "d", "e"]))
+
+    assert results == [f"result:{item}" for item in "abcde"]
+    assert recorder.batches == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_cancelled_entries_are_not_processed():
+    recorder = Recorder(hold_first=True)
+    batcher = DynamicBatcher(recorder, max_batch_size=8, max_wait_ms=1)
+
+    async def scenario():
+        running = asyncio.ensure_future(batcher.submit(["a"]))
+        await wait_until_processing(recorder)
+        cancelled = asyncio.ensure_future(batcher.submit(["cancelled"]))
+        kept = asyncio.ensure_future(batcher.submit(["kept"]))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        recorder.release.set()
+        return await asyncio.gather(running, kept)
+
+    assert asyncio.run(scenario()) == [["result:a"], ["result:kept"]]
+    assert recorder.batches == [["a"], ["kept"]]
+
+
+def test_batch_failure_is_raised_to_every_caller_in_the_batch():
+    def fail(items):
+        raise RuntimeError("model crashed")
+
+    batcher = DynamicBatcher(fail, max_batch_size=8, max_wait_ms=20)
+
+    async def scenario():
+        return await asyncio.gather(batcher.submit(["a"]), batcher.submit(["b"]), return_exceptions=True)
+
+    first, second = asyncio.run(scenario())
+
+    assert isinstance(first, RuntimeError) and isinstance(second, RuntimeError)
+    assert batcher.stats["batches"] == 1
@@ -0,0 +1,25 @@
+from backend.services.chunking import StructuredChunker
+
+
+def chunks(html: str) -> list:
+    return [(chunk.metadata["section"], chunk.page_content) for chunk in StructuredChunker().split_html(html)]
+
+
+def test_heading_in_body_heads_the_content_that_follows_it():
+    html = "<html><head><title>page</title></head><body><h1>T</h1><p>a</p></body></html>"
+
+    assert chunks(html) == [("T", "T\na")]
+
+
+def test_body_headings_split_the_body_into_sections():
+    html = (
+        "<html><head><title>page</title></head><body>"
+        "<p>intro</p><h1>T</h1><p>a</p><h2>U</h2><p>b</p><div><h2>V</h2><p>c</p></div>"
+        "</body></html>"
+    )
+
+    assert chunks(html) == [("T | U | V | page", "T | U | V | page\nT\na\n\nU\nb\n\nV\nc\n\npage\nintro")]
+
+
+def test_page_of_headings_only_keeps_their_text():
+    assert chunks("<html><body><h1>T</h1><h2>U</h2></body></html>") == [("page", "page\nT\nU")]
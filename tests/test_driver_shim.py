@@ -0,0 +1,46 @@
+import sys
+
+import pytest
+
+from backend.services.driver_shim import run_script
+
+UNITTEST_SCRIPT = '''import sys
+import unittest
+
+
+class Checkout(unittest.TestCase):
+    def test_passes(self):
+        self.assertEqual(sys.argv, [__file__])
+
+
+if __name__ == "__main__":
+    unittest.main()
+'''
+
+
+@pytest.fixture
+def script(tmp_path):
+    def write(source: str) -> str:
+        path = tmp_path / "TC-001.py"
+        path.write_text(source)
+        return str(path)
+    return write
+
+
+def test_unittest_script_does_not_see_the_runner_arguments(script, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["pytest", "pytest_suite/", "-n", "4"])
+    path = script(UNITTEST_SCRIPT)
+
+    run_script(path)
+
+    assert sys.argv == ["pytest", "pytest_suite/", "-n", "4"]
+
+
+@pytest.mark.parametrize("source", ["import sys\nsys.exit(0)\n", "import sys\nsys.exit()\n"])
+def test_successful_exit_counts_as_passed(script, source):
+    run_script(script(source))
+
+
+def test_failing_exit_code_is_an_assertion_error(script):
+    with pytest.raises(AssertionError, match="exited with code 1"):
+        run_script(script("import sys\nsys.exit(1)\n"))
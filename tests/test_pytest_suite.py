@@ -0,0 +1,101 @@
+import ast
+
+from backend.services.pytest_suite import PytestSuiteBuilder
+
+SCRIPT = '''"""Apply discount code"""
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+
+
+def main():
+    driver = webdriver.Chrome()
+    driver.get("checkout.html")
+    driver.find_element(By.ID, "discount-code").send_keys("{code}")
+    assert "{message}" in driver.page_source
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+
+def build(scripts):
+    taken = set()
+    files, node_ids = PytestSuiteBuilder().build(scripts, taken)
+    for path, source in files.items():
+        # Standalone scripts are copied as they are, broken ones included
+        if path.endswith(".py") and not path.startswith("scripts/"):
+            compile(source, path, "exec")
+    return files, node_ids, taken
+
+
+def functions(source: str) -> dict:
+    return {node.name: node for node in ast.parse(source).body if isinstance(node, ast.FunctionDef)}
+
+
+def test_scripts_become_test_functions_in_one_module_per_feature(make_case):
+    files, node_ids, _ = build([
+        (make_case("TC-001"), SCRIPT.format(code="SAVE15", message="applied")),
+        (make_case("TC-002", feature="Shipping"), SCRIPT.format(code="FREESHIP", message="Free shipping")),
+    ])
+
+    discount = files["tests/test_discount_code.py"]
+    assert "tests/test_shipping.py" in files
+    assert discount.count("from selenium import webdriver") == 1
+    assert "__name__" not in discount
+    assert "Apply discount code" not in discount
+    assert list(functions(discount)) == ["test_tc_001"]
+    assert node_ids == {
+        "TC-001": "tests/test_discount_code.py::test_tc_001",
+        "TC-002": "tests/test_shipping.py::test_tc_002"
+    }
+    assert {"conftest.py", "pytest.ini", "requirements.txt"} <= set(files)
+
+
+def test_scripts_differing_only_in_literals_become_one_parametrized_test(make_case):
+    files, node_ids, _ = build([
+        (make_case("TC-001"), SCRIPT.format(code="SAVE15", message="applied")),
+        (make_case("TC-002", test_type="negative", priority="Low"), SCRIPT.format(code="BOGUS", message="invalid")),
+    ])
+
+    module = files["tests/test_discount_code.py"]
+    function = functions(module)["test_tc_001"]
+    assert [arg.arg for arg in function.args.args] == ["value_1", "value_2"]
+    assert "pytest.param('SAVE15', 'applied', id='TC-001', marks=[pytest.mark.positive, pytest.mark.high])" in module
+    assert "pytest.param('BOGUS', 'invalid', id='TC-002', marks=[pytest.mark.negative, pytest.mark.low])" in module
+    assert node_ids["TC-002"] == "tests/test_discount_code.py::test_tc_001[TC-002]"
+    for marker in ("high", "low", "negative", "positive"):
+        assert f"    {marker}:" in files["pytest.ini"]
+
+
+def test_parameter_names_do_not_shadow_script_names(make_case):
+    script = SCRIPT.replace("driver = webdriver.Chrome()", "value_1 = 3\n    driver = webdriver.Chrome()")
+    files, _, _ = build([
+        (make_case("TC-001"), script.format(code="SAVE15", message="applied")),
+        (make_case("TC-002"), script.format(code="BOGUS", message="invalid")),
+    ])
+
+    function = functions(files["tests/test_discount_code.py"])["test_tc_001"]
+    assert [arg.arg for arg in function.args.args] == ["value_2", "value_3"]
+
+
+def test_identical_scripts_stay_separate_tests(make_case):
+    script = SCRIPT.format(code="SAVE15", message="applied")
+    files, node_ids, _ = build([(make_case("TC-001"), script), (make_case("TC-001"), script)])
+
+    assert list(functions(files["tests/test_discount_code.py"])) == ["test_tc_001", "test_tc_001_2"]
+    assert node_ids["TC-001"] == "tests/test_discount_code.py::test_tc_001_2"
+
+
+def test_scripts_that_cannot_be_wrapped_are_kept_standalone(make_case):
+    exiting = "import sys\nprint('checked')\nsys.exit(1)\n"
+    broken = "def main(:\n    pass\n"
+    files, node_ids, taken = build([(make_case("TC-001"), exiting), (make_case("TC-002"), broken)])
+
+    module = files["tests/test_discount_code.py"]
+    assert "from driver_shim import run_script" in module
+    assert "run_script('TC-001.py')" in module
+    assert files["scripts/TC-001.py"] == exiting
+    assert files["scripts/TC-002.py"] == broken
+    assert taken == {"TC-001.py", "TC-002.py"}
+    assert node_ids["TC-002"] == "tests/test_discount_code.py::test_tc_002"
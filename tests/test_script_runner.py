@@ -0,0 +1,87 @@
+import multiprocessing
+import threading
+
+from selenium import webdriver
+
+from backend.services.script_runner import _worker_main
+
+
+class FakeBrowser:
+    """Stands in for webdriver.Chrome; a crashed one fails every command"""
+
+    launched = []
+
+    def __init__(self, *args, **kwargs):
+        self.crashed = False
+        FakeBrowser.launched.append(self)
+
+    def _check(self):
+        if self.crashed:
+            raise RuntimeError("session deleted because of page crash")
+
+    @property
+    def window_handles(self):
+        self._check()
+        return ["main"]
+
+    @property
+    def switch_to(self):
+        self._check()
+        return self
+
+    def window(self, handle):
+        pass
+
+    def execute_script(self, script):
+        self._check()
+
+    def delete_all_cookies(self):
+        self._check()
+
+    def get(self, url):
+        self._check()
+
+    def get_screenshot_as_file(self, path):
+        return False
+
+    def get_log(self, kind):
+        return []
+
+    def quit(self):
+        pass
+
+
+def job(tmp_path, test_case_id: str) -> dict:
+    return {
+        "test_case_id": test_case_id,
+        "script": "from selenium import webdriver\ndriver = webdriver.Chrome()\ndriver.get('about:blank')\n",
+        "script_path": str(tmp_path / f"{test_case_id}.py"),
+        "artifacts_dir": str(tmp_path),
+        "base_url": None,
+        "support_modules": []
+    }
+
+
+def test_worker_launches_a_new_browser_after_the_session_dies(tmp_path, monkeypatch):
+    monkeypatch.setattr(webdriver, "Chrome", FakeBrowser)
+    FakeBrowser.launched = []
+    parent, child = multiprocessing.Pipe()
+    worker = threading.Thread(target=_worker_main, args=(child, str(tmp_path)))
+    worker.start()
+
+    try:
+        parent.send(job(tmp_path, "TC-001"))
+        assert parent.recv()["status"] == "passed"
+
+        FakeBrowser.launched[0].crashed = True
+        parent.send(job(tmp_path, "TC-002"))
+        assert parent.recv()["status"] == "error"
+
+        parent.send(job(tmp_path, "TC-003"))
+        assert parent.recv()["status"] == "passed"
+        assert len(FakeBrowser.launched) == 2
+    finally:
+        parent.send(None)
+        worker.join(5)
+
+    assert webdriver.Chrome is FakeBrowser
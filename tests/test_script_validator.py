@@ -0,0 +1,152 @@
+import ast
+import os
+
+import pytest
+
+from backend.services.html_analyzer import analyze_html
+from backend.services.page_object_generator import page_object_generator
+from backend.services.script_validator import ScriptValidator, clean_script
+
+CHECKOUT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "project_assets", "checkout.html")
+
+TEMPLATE_PAGE = """<html><body>
+<div id="cartItems"></div>
+<script>
+    function render(empty) {
+        const cartItemsDiv = document.getElementById('cartItems');
+        if (empty) {
+            cartItemsDiv.innerHTML = '<div class="empty-cart" id="emptyCart">Your cart is empty</div>';
+            return;
+        }
+        cartItemsDiv.innerHTML = `
+            <div class="cart-item">
+                <input type="number" class="quantity-input" name="quantity" value="${item.quantity}">
+            </div>
+        `;
+    }
+</script>
+</body></html>"""
+
+SCRIPT = """from selenium import webdriver
+from selenium.webdriver.common.by import By
+
+driver = webdriver.Chrome()
+driver.get("page.html")
+{body}
+assert driver.title
+"""
+
+
+@pytest.fixture(scope="module")
+def checkout():
+    with open(CHECKOUT_PATH, "r", encoding="utf-8") as f:
+        html_content = f.read()
+    element_info = analyze_html(html_content)
+    return html_content, element_info, page_object_generator.build(element_info)["source"]
+
+
+def validate(body: str, html_content: str = TEMPLATE_PAGE) -> dict:
+    return ScriptValidator().validate(SCRIPT.format(body=body), html_content, analyze_html(html_content))
+
+
+def test_clean_script_strips_fences_and_adds_missing_imports_at_top_level():
+    script = clean_script("```python\ndriver = webdriver.Chrome()\ndriver.find_element(By.ID, 'name')\n```")
+
+    assert "```" not in script
+    module = ast.parse(script)
+    imported = [ast.unparse(node) for node in module.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    assert imported == ["from selenium import webdriver", "from selenium.webdriver.common.by import By"]
+
+
+def test_clean_script_does_not_duplicate_indented_imports():
+    script = (
+        "def main():\n"
+        "    from selenium import webdriver\n"
+        "    from selenium.webdriver.common.by import By\n"
+        "    driver = webdriver.Chrome()\n"
+        "    driver.find_element(By.ID, 'name')\n"
+    )
+
+    assert clean_script(script) == script.strip()
+    ast.parse(clean_script(script))
+
+
+def test_clean_script_only_adds_the_imports_still_missing():
+    script = clean_script("import os\nfrom selenium import webdriver\ndriver = webdriver.Chrome()\nWebDriverWait(driver, 5)\nos.getcwd()")
+
+    assert script.count("from selenium import webdriver") == 1
+    assert script.count("import os") == 1
+    assert script.startswith("from selenium.webdriver.support.ui import WebDriverWait\n\n")
+
+
+@pytest.mark.parametrize("body", [
+    "driver.find_element(By.ID, 'emptyCart')",
+    "driver.find_element(By.NAME, 'quantity')",
+    "driver.find_element(By.XPATH, \"//div[@class='cart-item']//input[@class='quantity-input']\")",
+])
+def test_locators_rendered_by_inner_html_templates_are_valid(body):
+    result = validate(body)
+
+    assert result["valid"], result["errors"]
+
+
+@pytest.mark.parametrize("body, error", [
+    ("driver.find_element(By.ID, 'cartTotal')", "By.ID 'cartTotal' is not an element id on the page"),
+    ("driver.find_element(By.NAME, 'coupon')", "By.NAME 'coupon' is not an element name on the page"),
+    ("driver.find_element(By.XPATH, \"//div[@class='cart-line']\")",
+     "XPath '//div[@class='cart-line']' matches no element on the page"),
+])
+def test_locators_missing_from_page_and_templates_are_rejected(body, error):
+    result = validate(body)
+
+    assert not result["valid"]
+    assert result["errors"] == [error]
+
+
+def test_checkout_cart_template_locator_is_valid(checkout):
+    html_content, element_info, _ = checkout
+    script = SCRIPT.format(body="driver.find_element(By.XPATH, \"//div[@class='cart-item']//input[@class='quantity-input']\")")
+
+    assert ScriptValidator().validate(script, html_content, element_info)["valid"]
+
+
+def test_page_object_methods_pass_and_unknown_members_are_reported(checkout):
+    html_content, element_info, page_object_source = checkout
+    script = (
+        "from selenium import webdriver\n"
+        "from checkout_page import CheckoutPage\n"
+        "\n"
+        "driver = webdriver.Chrome()\n"
+        "page = CheckoutPage(driver).open()\n"
+        "page.fill_discount_code('SAVE10')\n"
+        "page.click_apply_discount_button()\n"
+        "page.apply_coupon('SAVE10')\n"
+        "page.apply_coupon('SAVE20')\n"
+        "assert page.is_displayed(page.DISCOUNT_ERROR)\n"
+    )
+
+    result = ScriptValidator().validate(script, html_content, element_info, page_object_source)
+
+    assert not result["valid"]
+    assert result["errors"] == ["CheckoutPage has no member 'apply_coupon'"]
+
+
+def test_page_object_script_using_only_members_is_valid(checkout):
+    html_content, element_info, page_object_source = checkout
+    script = (
+        "from selenium import webdriver\n"
+        "from checkout_page import CheckoutPage\n"
+        "\n"
+        "driver = webdriver.Chrome()\n"
+        "page = CheckoutPage(driver)\n"
+        "page.open()\n"
+        "page.fill_name('Ada')\n"
+        "page.click_pay_button()\n"
+        "page.wait_for_text(page.SUCCESS_MESSAGE, 'Payment')\n"
+        "assert 'Payment' in page.text_of(page.SUCCESS_MESSAGE)\n"
+        "page.driver.quit()\n"
+    )
+
+    result = ScriptValidator().validate(script, html_content, element_info, page_object_source)
+
+    assert result["valid"], result["errors"]
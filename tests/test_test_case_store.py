@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+
+from backend.services import test_case_store
+from backend.utils.state_store import StateStore
+
+
+def worker(shared: StateStore, **settings) -> "test_case_store.TestCaseStore":
+    """A TestCaseStore as another API process would hold it: own cache, shared database"""
+    store = test_case_store.TestCaseStore()
+    store.store = shared
+    for name, value in settings.items():
+        setattr(store, name, value)
+    return store
+
+
+def test_suites_beyond_the_cap_are_pruned_with_their_scripts(shared, make_case):
+    store = worker(shared, max_suites=2)
+    first = store.create_suite([make_case("TC-001")])
+    store.save_script(first, "TC-001", "print('first')")
+    second = store.create_suite([make_case("TC-001")])
+    third = store.create_suite([make_case("TC-001")])
+
+    assert store.get_suite(first) is None
+    assert store.get_script(first, "TC-001") is None
+    assert store.get_suite(second) is not None
+    assert store.get_suite(third) is not None
+
+
+def test_expired_suites_are_pruned(shared, make_case):
+    store = worker(shared, ttl=timedelta(days=1))
+    old = store.create_suite([make_case("TC-001")])
+    shared.set(store.INDEX_NAMESPACE, old, (datetime.now(timezone.utc) - timedelta(days=2)).isoformat())
+
+    store.create_suite([make_case("TC-001")])
+
+    assert store.get_suite(old) is None
+
+
+def test_cached_suite_is_not_served_after_another_worker_clears_it(shared, make_case):
+    first, second = worker(shared), worker(shared)
+    suite_id = first.create_suite([make_case("TC-001")])
+    assert second.get_test_case(suite_id, "TC-001") is not None
+
+    first.clear()
+
+    assert second.get_suite(suite_id) is None
+    assert second.list_test_cases(suite_id) is None
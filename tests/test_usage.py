@@ -0,0 +1,87 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from backend.services import usage
+from backend.utils.state_store import StateStore
+
+
+@pytest.fixture
+def tracker(shared):
+    tracker = usage.UsageTracker()
+    tracker.store = shared
+    tracker.prices = {"gpt-4o-mini": (1.0, 2.0)}
+    return tracker
+
+
+def add_in_process(path: str, times: int):
+    store = StateStore(path)
+    for _ in range(times):
+        store.increment("counters", "shared", {"calls": 1, "cost_usd": 0.5})
+
+
+def test_increment_adds_to_existing_fields_and_creates_new_ones(shared):
+    shared.increment("counters", "key", {"calls": 1, "cost_usd": 0.25})
+    value = shared.increment("counters", "key", {"calls": 2, "tokens": 10})
+
+    assert value == {"calls": 3, "cost_usd": 0.25, "tokens": 10}
+    assert shared.get("counters", "key") == value
+
+
+def test_concurrent_increments_from_threads_are_not_lost(shared):
+    def add():
+        for _ in range(50):
+            shared.increment("counters", "shared", {"calls": 1})
+
+    threads = [threading.Thread(target=add) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert shared.get("counters", "shared") == {"calls": 400}
+
+
+def test_concurrent_increments_from_processes_are_not_lost(shared):
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=add_in_process, args=(shared.path, 25)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+
+    assert [process.exitcode for process in processes] == [0, 0, 0, 0]
+    assert shared.get("counters", "shared") == {"calls": 100, "cost_usd": 50.0}
+
+
+def test_project_names_with_separators_are_kept_apart(tracker):
+    for project in ("team|a", "team", "a|b|c"):
+        with tracker.scope("/api/generate", project=project):
+            tracker.record("gpt-4o-mini", {"prompt_tokens": 1_000_000, "completion_tokens": 0})
+
+    report = tracker.report(project="team|a")
+
+    assert [(row["endpoint"], row["project"], row["model"]) for row in report["rows"]] == [
+        ("/api/generate", "team|a", "gpt-4o-mini")
+    ]
+    assert report["budget"]["spent_today_by_project_usd"] == {"team|a": 1.0, "team": 1.0, "a|b|c": 1.0}
+    assert set(tracker.report()["by_project"]) == {"team|a", "team", "a|b|c"}
+
+
+def test_project_budget_applies_to_a_project_with_separators(tracker):
+    tracker.project_budget = 1.0
+    with tracker.scope("/api/generate", project="team|a"):
+        tracker.record("gpt-4o-mini", {"prompt_tokens": 1_000_000, "completion_tokens": 0})
+        with pytest.raises(usage.BudgetExceeded):
+            tracker.check_budget("gpt-4o-mini")
+    with tracker.scope("/api/generate", project="team"):
+        assert tracker.check_budget("gpt-4o-mini") == "gpt-4o-mini"
+
+
+def test_keys_written_before_json_keys_are_still_reported(tracker, shared):
+    shared.increment(tracker.NAMESPACE, f"{tracker._day()}|/api/chat|default|gpt-4o-mini", {"calls": 2, "cost_usd": 0.5})
+
+    rows = tracker.report()["rows"]
+
+    assert [(row["endpoint"], row["project"], row["calls"]) for row in rows] == [("/api/chat", "default", 2)]